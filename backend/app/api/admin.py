@@ -1,77 +1,135 @@
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
+from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
 from app import schemas, models
 from app.database import get_db
 from app.auth import get_current_active_admin
-from app.rag.parser import WebParser
-from app.rag.chroma_manager import ChromaManager
+from app.rag.crawl_jobs import ACTIVE_STATUSES
+from app.utils.ratings import apply_rating_delta
+from app.utils.response_cache import response_cache
 
 router = APIRouter()
 
 @router.post("/parse-venues")
 async def parse_venues(
     parser_config: schemas.ParserConfig,
-    background_tasks: BackgroundTasks,
     current_user: models.User = Depends(get_current_active_admin),
-    db: Session = Depends(get_db),
-    chroma_manager: ChromaManager = Depends(lambda: ChromaManager())
+    db: Session = Depends(get_db)
 ):
     """
-    Запускает фоновый процесс парсинга заведений (рестораны, бары и т.д.)
+    Ставит в очередь задачу парсинга заведений (рестораны, бары и т.д.)
     с картографического сервиса по заданным параметрам.
     
+    Парсинг выполняет отдельный процесс `crawler_worker.py`; ход выполнения
+    доступен через /crawl-jobs/{job_id}.
+    
     Args:
         parser_config: Конфигурация парсинга (город, категория, количество)
-        background_tasks: Фоновые задачи FastAPI для асинхронной обработки
         current_user: Текущий аутентифицированный администратор
         db: Сессия базы данных
-        chroma_manager: Менеджер векторной базы данных для хранения embeddings
     
     Returns:
-        dict: Сообщение о запуске фоновой задачи
-    """
-    print("Тест парсинга")
-    
-    async def parse_task():
-        """Фоновая задача парсинга и сохранения данных"""
-        parser = WebParser(headless=True)
-        try:
-            print("Парсинг начат")
-            venues = parser.parse_ymaps(
-                city=parser_config.city,
-                category=parser_config.category,
-                items=parser_config.max_items
-            )
-            
-            # Добавление в ChromaDB для векторного поиска
-            chroma_manager.add_venues(venues)
-            
-            # Сохранение в реляционную базу данных
-            for venue_data in venues:
-                venue = models.Venue(
-                    external_id=venue_data.get("external_id"),
-                    name=venue_data.get("name"),
-                    category=venue_data.get("category"),
-                    description=venue_data.get("description"),
-                    location=venue_data.get("location"),
-                    price_range=venue_data.get("price_range"),
-                    amenities=venue_data.get("amenities", []),
-                    parsed_data=venue_data,
-                    is_verified=False
-                )
-                db.add(venue)
-            
-            db.commit()
-            
-        finally:
-            print("Завершение парсинга")
-            # parser.close()
-    
-    background_tasks.add_task(parse_task)
-    
-    return {"message": "Парсинг запущен в фоновом режиме"}
+        dict: Сообщение и ID задачи
+    """
+    job = models.CrawlJob(
+        city=parser_config.city,
+        category=parser_config.category,
+        max_items=parser_config.max_items,
+        workers=parser_config.workers,
+        force_refresh=parser_config.force_refresh,
+        status="queued",
+        progress={},
+        created_by=current_user.id
+    )
+    db.add(job)
+    db.commit()
+    db.refresh(job)
+    
+    return {"message": "Задача парсинга поставлена в очередь", "job_id": job.id}
+
+@router.get("/crawl-jobs", response_model=List[schemas.CrawlJobResponse])
+def get_crawl_jobs(
+    status: Optional[str] = None,
+    limit: int = 20,
+    current_user: models.User = Depends(get_current_active_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Получает список задач парсинга (новые первыми).
+    
+    Args:
+        status: Фильтр по статусу (queued, running, completed, failed, cancelled)
+        limit: Максимальное количество задач
+        current_user: Текущий аутентифицированный администратор
+        db: Сессия базы данных
+    
+    Returns:
+        List[CrawlJobResponse]: Список задач с прогрессом
+    """
+    query = db.query(models.CrawlJob)
+    
+    if status:
+        query = query.filter(models.CrawlJob.status == status)
+    
+    return query.order_by(models.CrawlJob.id.desc()).limit(limit).all()
+
+@router.get("/crawl-jobs/{job_id}", response_model=schemas.CrawlJobResponse)
+def get_crawl_job(
+    job_id: int,
+    current_user: models.User = Depends(get_current_active_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Получает состояние и прогресс задачи парсинга.
+    
+    Raises:
+        HTTPException: Если задача не найдена
+    """
+    job = db.query(models.CrawlJob).filter(models.CrawlJob.id == job_id).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    
+    return job
+
+@router.post("/crawl-jobs/{job_id}/cancel", response_model=schemas.CrawlJobResponse)
+def cancel_crawl_job(
+    job_id: int,
+    current_user: models.User = Depends(get_current_active_admin),
+    db: Session = Depends(get_db)
+):
+    """
+    Отмена задачи парсинга.
+    
+    Задача в очереди отменяется сразу; выполняющаяся задача получает запрос
+    отмены и останавливается исполнителем при следующем heartbeat
+    (уже полученные заведения сохраняются).
+    
+    Raises:
+        HTTPException: Если задача не найдена или уже завершена
+    """
+    job = db.query(models.CrawlJob).filter(models.CrawlJob.id == job_id).first()
+    
+    if not job:
+        raise HTTPException(status_code=404, detail="Задача не найдена")
+    
+    if job.status not in ACTIVE_STATUSES:
+        raise HTTPException(status_code=400, detail="Задача уже завершена")
+    
+    # Условное обновление: исполнитель мог захватить задачу после чтения
+    cancelled = db.query(models.CrawlJob).filter(
+        models.CrawlJob.id == job_id,
+        models.CrawlJob.status == "queued"
+    ).update({"status": "cancelled", "finished_at": datetime.utcnow()}, synchronize_session=False)
+    if not cancelled:
+        job.cancel_requested = True
+    db.commit()
+    db.refresh(job)
+    
+    return job
 
 @router.get("/unmoderated-ratings")
 def get_unmoderated_ratings(
@@ -126,9 +184,14 @@ def moderate_rating(
     if approve:
         rating.is_moderated = True
     else:
+        # Оценка исключается из суммы и количества заведения в той же транзакции
+        current = select(models.VenueRating.rating).where(models.VenueRating.id == rating_id).scalar_subquery()
+        apply_rating_delta(db, rating.venue_id, -current, -1)
         db.delete(rating)
     
     db.commit()
+    if not approve:
+        response_cache.invalidate_venues([rating.venue_id])
     
     return {"message": "Отзыв успешно промодерирован"}
 
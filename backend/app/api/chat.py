@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks
 from sqlalchemy.orm import Session
 import uuid
-from datetime import datetime
+from datetime import datetime, timedelta
 
 from app import schemas, models
 from app.database import get_db
@@ -11,6 +11,7 @@ from app.auth import (
 )
 from app.llm.chains import RecommendationChain
 from app.llm.moderation import LlamaGuardModerator
+from app.llm.cache import CustomSemanticCache
 from app.rag.chroma_manager import ChromaManager
 from app.utils.clickhouse_client import ClickHouseMetrics
 from app.config import settings
@@ -190,12 +191,12 @@ async def send_message(
         print("Cache Hit!")
         print("Prompt:", cached_response[0]['prompt'])
         print("Response:", cached_response[0]['response'])
-        result = cached_response
+        result = cached_response[0]['response']
     else:
         print("Cache Missed!")
         recommender = RecommendationChain()
         print("PREFERENCES:",current_user.preferences or {})
-        result = await recommender.async_execute_query(
+        result = await recommender.execute_query(
             query=chat_message.message,
             user_preferences=current_user.preferences or {}
         )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 from typing import List, Optional
 from datetime import timedelta
 
@@ -210,7 +210,10 @@ def get_user_ratings(
     Returns:
         List[dict]: Список оценок пользователя
     """
-    ratings = db.query(models.VenueRating).filter(
+    # Название заведения загружается тем же запросом (JOIN), а не отдельным SELECT на каждую оценку
+    ratings = db.query(models.VenueRating).options(
+        joinedload(models.VenueRating.venue).load_only(models.Venue.name)
+    ).filter(
         models.VenueRating.user_id == current_user.id
     ).all()
     
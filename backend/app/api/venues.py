@@ -1,55 +1,267 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import Session
 from sqlalchemy import func
 from typing import List, Optional
+from datetime import datetime
 
 from app import schemas, models
 from app.database import get_db
 from app.auth import get_current_user
+from app.utils.categories import matching_category_ids
+from app.utils.opening_hours import slot_filter, week_slot
+from app.utils.venue_search import search_venue_ids
+from app.utils.geo import bbox_candidates, haversine_m, radius_bbox
+from app.utils.ratings import apply_rating_delta, current_rating
+from app.utils.pagination import NEXT_CURSOR_HEADER, encode_cursor, decode_cursor, after_cursor
+from app.utils.response_cache import response_cache, cached_json_response
 
 router = APIRouter()
 
+def parse_cursor(cursor: str, size: int) -> list:
+    try:
+        return decode_cursor(cursor, size)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def list_venues(db: Session, category: Optional[str], min_rating: Optional[float], price_range: Optional[str],
+                open_at: Optional[datetime], open_now: bool, limit: int, offset: int,
+                cursor: Optional[str]) -> List[models.Venue]:
+    """Выборка страницы списка заведений (см. `get_venues`)."""
+    query = db.query(models.Venue).filter(models.Venue.is_verified == True)
+    
+    if category:
+        # Название или вариант категории -> ID по справочнику, фильтр по индексу category_id
+        category_ids = matching_category_ids(db, category)
+        if not category_ids:
+            return []
+        query = query.filter(models.Venue.category_id.in_(category_ids))
+    
+    if min_rating is not None:
+        query = query.filter(models.Venue.rating >= min_rating)
+    
+    if price_range:
+        query = query.filter(models.Venue.price_range == price_range)
+    
+    if open_at is not None or open_now:
+        # Проверка бита слота недели прямо в SQL: символ маски должен быть
+        # одним из hex-символов с установленным битом
+        position, chars = slot_filter(open_at)
+        query = query.filter(func.instr(chars, func.substr(models.Venue.hours_bitmap, position, 1)) > 0)
+    
+    order = (models.Venue.rating.desc(), models.Venue.id.desc())
+    if cursor:
+        rating, venue_id = parse_cursor(cursor, 2)
+        unrated = query.filter(models.Venue.rating.is_(None))
+        if rating is None:
+            venues = unrated.filter(models.Venue.id < venue_id).order_by(*order).limit(limit).all()
+        else:
+            # Диапазон по индексу не включает NULL: заведения без рейтинга
+            # (они идут в конце списка) дочитываются отдельным запросом
+            venues = query.filter(
+                after_cursor((models.Venue.rating, models.Venue.id), (rating, venue_id))
+            ).order_by(*order).limit(limit).all()
+            if len(venues) < limit:
+                venues += unrated.order_by(*order).limit(limit - len(venues)).all()
+    else:
+        venues = query.order_by(*order).offset(offset).limit(limit).all()
+    
+    return venues
+
 @router.get("/", response_model=List[schemas.VenueResponse])
 def get_venues(
+    request: Request,
     category: Optional[str] = None,
     min_rating: Optional[float] = Query(None, ge=0, le=5),
     price_range: Optional[str] = None,
+    open_at: Optional[datetime] = None,
+    open_now: bool = False,
     limit: int = 20,
     offset: int = 0,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
     Получение списка заведений с возможностью фильтрации.
     
+    Поддерживаются два режима пагинации: по смещению (offset) и по курсору.
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor, если
+    страница заполнена; с курсором выборка продолжается по индексу
+    (is_verified, rating, id) без пропуска строк, и страницы не сдвигаются
+    при изменении рейтингов уже просмотренных заведений.
+    
+    Ответ кэшируется в Redis по нормализованным параметрам запроса и
+    сбрасывается при изменении заведений; ETag позволяет клиенту получить
+    304 Not Modified через If-None-Match.
+    
     Args:
-        category: Категория заведения (например, "ресторан", "кофейня")
+        category: Категория заведения (например, "ресторан", "кофейня");
+                  сопоставляется со справочником категорий и его вариантами
         min_rating: Минимальный рейтинг заведения (от 0 до 5)
         price_range: Ценовой диапазон (например, "$", "$$", "$$$")
+        open_at: Только заведения, открытые в указанный момент (ISO 8601;
+                 время без часового пояса считается местным, VENUE_TIMEZONE)
+        open_now: Только заведения, открытые сейчас
         limit: Количество заведений на странице
-        offset: Смещение для пагинации
+        offset: Смещение для пагинации (не используется вместе с cursor)
+        cursor: Курсор из заголовка X-Next-Cursor предыдущей страницы
         db: Сессия базы данных
     
     Returns:
         List[VenueResponse]: Список заведений, отсортированный по рейтингу
     """
-    query = db.query(models.Venue).filter(models.Venue.is_verified == True)
+    params = {
+        "category": category.strip().lower() if category else None,
+        "min_rating": min_rating,
+        "price_range": price_range,
+        "open_at": open_at,
+        "limit": limit,
+        "offset": offset,
+        "cursor": cursor,
+    }
+    if open_now:
+        # Ответ зависит от текущего 15-минутного слота недели
+        params["open_now_slot"] = week_slot()
     
-    if category:
-        query = query.filter(models.Venue.category.ilike(f"%{category}%"))
+    def build():
+        venues = list_venues(db, category, min_rating, price_range, open_at, open_now, limit, offset, cursor)
+        headers = {}
+        if limit > 0 and len(venues) == limit:
+            headers[NEXT_CURSOR_HEADER] = encode_cursor((venues[-1].rating, venues[-1].id))
+        return [schemas.VenueResponse.model_validate(venue) for venue in venues], headers
     
-    if min_rating is not None:
-        query = query.filter(models.Venue.rating >= min_rating)
+    return cached_json_response(request, response_cache.list_key("venues", params), build)
+
+@router.get("/search", response_model=List[schemas.VenueSearchResult])
+def search_venues(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    db: Session = Depends(get_db)
+):
+    """
+    Полнотекстовый поиск заведений без обращения к модели эмбеддингов.
     
-    if price_range:
-        query = query.filter(models.Venue.price_range == price_range)
+    Ищет по названию, категории, описанию, адресу и текстам отзывов
+    (индекс SQLite FTS5). Все слова запроса обязательны и ищутся по началу
+    слова; результаты ранжируются BM25 с большим весом совпадений в названии.
+    
+    Args:
+        q: Поисковый запрос (например, "пицц арбат")
+        limit: Количество результатов
+        offset: Смещение для пагинации
+        db: Сессия базы данных
+    
+    Returns:
+        List[VenueSearchResult]: Заведения с фрагментом совпадения и оценкой
+    """
+    hits = search_venue_ids(db, q, limit=limit, offset=offset)
+    if not hits:
+        return []
     
-    return query.order_by(models.Venue.rating.desc()).offset(offset).limit(limit).all()
+    venues = {
+        venue.id: venue
+        for venue in db.query(models.Venue).filter(models.Venue.id.in_([venue_id for venue_id, _, _ in hits]))
+    }
+    
+    results = []
+    for venue_id, snippet, score in hits:
+        venue = venues.get(venue_id)
+        if venue is None:
+            continue
+        results.append({
+            **schemas.VenueResponse.model_validate(venue).model_dump(),
+            "snippet": snippet or "",
+            "score": score,
+        })
+    return results
+
+@router.get("/nearby", response_model=List[schemas.VenueNearbyResult])
+def get_nearby_venues(
+    lat: Optional[float] = Query(None, ge=-90, le=90),
+    lon: Optional[float] = Query(None, ge=-180, le=180),
+    radius_m: float = Query(1000, gt=0, le=50000),
+    min_lat: Optional[float] = Query(None, ge=-90, le=90),
+    min_lon: Optional[float] = Query(None, ge=-180, le=180),
+    max_lat: Optional[float] = Query(None, ge=-90, le=90),
+    max_lon: Optional[float] = Query(None, ge=-180, le=180),
+    category: Optional[str] = None,
+    min_rating: Optional[float] = Query(None, ge=0, le=5),
+    limit: int = Query(20, ge=1, le=100),
+    db: Session = Depends(get_db)
+):
+    """
+    Поиск заведений рядом с точкой или в прямоугольнике карты.
+    
+    Кандидаты отбираются по пространственному индексу (SQLite R*Tree)
+    вместе с фильтрами по категории и рейтингу, затем отсекаются по точному
+    расстоянию и сортируются от ближайшего.
+    
+    Args:
+        lat, lon: Центр поиска (поиск по радиусу)
+        radius_m: Радиус поиска в метрах
+        min_lat, min_lon, max_lat, max_lon: Прямоугольник карты (вместо радиуса);
+            с центром сортировка по расстоянию от него, иначе - по рейтингу
+        category: Категория заведения (как в списке заведений)
+        min_rating: Минимальный рейтинг заведения
+        limit: Количество заведений
+        db: Сессия базы данных
+    
+    Returns:
+        List[VenueNearbyResult]: Заведения с координатами и расстоянием
+    
+    Raises:
+        HTTPException: Если не задан ни центр, ни прямоугольник
+    """
+    bbox = (min_lat, min_lon, max_lat, max_lon)
+    use_bbox = all(value is not None for value in bbox)
+    has_center = lat is not None and lon is not None
+    
+    if not use_bbox and not has_center:
+        raise HTTPException(status_code=400, detail="Укажите lat и lon или min_lat, min_lon, max_lat, max_lon")
+    if use_bbox and (min_lat > max_lat or min_lon > max_lon):
+        raise HTTPException(status_code=400, detail="Некорректный прямоугольник")
+    
+    category_ids = matching_category_ids(db, category) if category else None
+    candidates = bbox_candidates(
+        db, bbox if use_bbox else radius_bbox(lat, lon, radius_m),
+        category_ids=category_ids, min_rating=min_rating,
+        limit=None if has_center else limit
+    )
+    
+    distances = {}
+    if has_center:
+        for venue_id, venue_lat, venue_lon in candidates:
+            distance = haversine_m(lat, lon, venue_lat, venue_lon)
+            if use_bbox or distance <= radius_m:
+                distances[venue_id] = distance
+        venue_ids = sorted(distances, key=distances.get)[:limit]
+    else:
+        venue_ids = [venue_id for venue_id, _, _ in candidates]
+    
+    venues = {
+        venue.id: venue
+        for venue in db.query(models.Venue).filter(models.Venue.id.in_(venue_ids))
+    }
+    
+    return [
+        {
+            **schemas.VenueResponse.model_validate(venues[venue_id]).model_dump(),
+            "lat": venues[venue_id].lat,
+            "lon": venues[venue_id].lon,
+            "distance_m": distances.get(venue_id),
+        }
+        for venue_id in venue_ids
+        if venue_id in venues
+    ]
 
 @router.get("/{venue_id}", response_model=schemas.VenueResponse)
-def get_venue(venue_id: int, db: Session = Depends(get_db)):
+def get_venue(venue_id: int, request: Request, db: Session = Depends(get_db)):
     """
     Получение детальной информации о конкретном заведении.
     
+    Ответ кэшируется в Redis до изменения заведения (оценка, модерация,
+    загрузка данных); поддерживается If-None-Match.
+    
     Args:
         venue_id: ID заведения
         db: Сессия базы данных
@@ -60,12 +272,15 @@ def get_venue(venue_id: int, db: Session = Depends(get_db)):
     Raises:
         HTTPException: Если заведение не найдено
     """
-    venue = db.query(models.Venue).filter(models.Venue.id == venue_id).first()
-    
-    if not venue:
-        raise HTTPException(status_code=404, detail="Заведение не найдено")
+    def build():
+        venue = db.query(models.Venue).filter(models.Venue.id == venue_id).first()
+        
+        if not venue:
+            raise HTTPException(status_code=404, detail="Заведение не найдено")
+        
+        return schemas.VenueResponse.model_validate(venue), {}
     
-    return venue
+    return cached_json_response(request, response_cache.item_key(venue_id), build)
 
 @router.post("/{venue_id}/rate")
 def rate_venue(
@@ -77,6 +292,10 @@ def rate_venue(
     """
     Оценка заведения пользователем и обновление его среднего рейтинга.
     
+    Сумма и количество оценок заведения меняются атомарным UPDATE в той же
+    транзакции, что и оценка: новая оценка добавляет (+оценка, +1),
+    измененная - разницу со старой, без пересчета AVG/COUNT по всем оценкам.
+    
     Args:
         venue_id: ID заведения для оценки
         rating_data: Данные оценки (рейтинг, отзыв)
@@ -101,6 +320,8 @@ def rate_venue(
     ).first()
     
     if existing_rating:
+        # Разница считается в том же UPDATE по текущему значению оценки в базе
+        apply_rating_delta(db, venue_id, rating_data.rating - current_rating(current_user.id, venue_id))
         existing_rating.rating = rating_data.rating
         existing_rating.review = rating_data.review
     else:
@@ -111,43 +332,56 @@ def rate_venue(
             review=rating_data.review
         )
         db.add(rating)
-    
-    # Обновление среднего рейтинга заведения
-    ratings_query = db.query(
-        func.avg(models.VenueRating.rating).label('avg_rating'),
-        func.count(models.VenueRating.id).label('count')
-    ).filter(models.VenueRating.venue_id == venue_id)
-    
-    result = ratings_query.first()
-    venue.rating = result.avg_rating or 0
-    venue.review_count = result.count or 0
+        apply_rating_delta(db, venue_id, rating_data.rating, 1)
     
     db.commit()
+    db.refresh(venue)
+    response_cache.invalidate_venues([venue_id])
     
     return {"message": "Оценка успешно сохранена", "new_average": venue.rating}
 
 @router.get("/{venue_id}/reviews")
 def get_venue_reviews(
     venue_id: int,
+    response: Response,
     limit: int = 10,
     offset: int = 0,
+    cursor: Optional[str] = None,
     db: Session = Depends(get_db)
 ):
     """
     Получение отзывов о заведении (только промодерированные).
     
+    Курсор следующей страницы возвращается в заголовке X-Next-Cursor;
+    выборка по курсору идет по индексу (venue_id, is_moderated, created_at, id).
+    
     Args:
         venue_id: ID заведения
         limit: Количество отзывов на странице
-        offset: Смещение для пагинации
+        offset: Смещение для пагинации (не используется вместе с cursor)
+        cursor: Курсор из заголовка X-Next-Cursor предыдущей страницы
         db: Сессия базы данных
     
     Returns:
         List[VenueRating]: Список отзывов, отсортированный по дате (сначала новые)
     """
-    reviews = db.query(models.VenueRating).filter(
+    query = db.query(models.VenueRating).filter(
         models.VenueRating.venue_id == venue_id,
         models.VenueRating.is_moderated == True
-    ).order_by(models.VenueRating.created_at.desc()).offset(offset).limit(limit).all()
+    )
+    
+    if cursor:
+        created_at, rating_id = parse_cursor(cursor, 2)
+        query = query.filter(after_cursor(
+            (models.VenueRating.created_at, models.VenueRating.id), (created_at, rating_id)
+        ))
+        offset = 0
+    
+    reviews = query.order_by(
+        models.VenueRating.created_at.desc(), models.VenueRating.id.desc()
+    ).offset(offset).limit(limit).all()
+    
+    if limit > 0 and len(reviews) == limit:
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor((reviews[-1].created_at, reviews[-1].id))
     
     return reviews
\ No newline at end of file
@@ -13,6 +13,12 @@ class Settings(BaseSettings):
     # Redis
     REDIS_URL: str = "redis://redis:6379"
     
+    # Кэш ответов API заведений в Redis (app.utils.response_cache)
+    RESPONSE_CACHE_ENABLED: bool = True
+    RESPONSE_CACHE_TTL: int = 300  # Время жизни записи, сек
+    RESPONSE_CACHE_SOCKET_TIMEOUT: float = 0.25  # Таймаут Redis, сек: медленный Redis не задерживает ответ
+    RESPONSE_CACHE_RETRY_SECONDS: float = 30.0  # Пауза перед повторным подключением после ошибки Redis
+    
     # LLM
     LOCALAI_BASE_URL: str = "http://host.docker.internal:8080/v1"
     LLM_MODEL: str = "gemma-3-12b-it"
@@ -23,10 +29,61 @@ class Settings(BaseSettings):
     MODEL_TYPE: str = "OpenAI"
     MODEL_N_CTX: int = 1024
     EMBEDDING_CTX_LENGTH: int = 8192
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_MAX_WORKERS: int = 4
     
     # ChromaDB
-    #CHROMA_HOST: str = "http://chromadb:8000"
+    # Сервер ChromaDB; пусто - локальное хранилище CHROMA_PERSIST_DIR (только для одного процесса)
+    CHROMA_HOST: str = ""
+    CHROMA_PORT: int = 8000
     CHROMA_PERSIST_DIR: str = "./chroma_db"
+    CHROMA_UPSERT_BATCH_SIZE: int = 256
+    CHROMA_COLLECTION_NAME: str = "venue_data"
+    # Параметры HNSW применяются при создании коллекции (см. rebuild_index.py)
+    CHROMA_HNSW_SPACE: str = "l2"  # "l2", "cosine" или "ip"
+    CHROMA_HNSW_M: int = 16
+    CHROMA_HNSW_CONSTRUCTION_EF: int = 100
+    CHROMA_HNSW_SEARCH_EF: int = 10
+    
+    # Read-path векторный индекс: "chroma" - поиск через ChromaDB,
+    # "memmap" - поиск по локальной memory-mapped реплике эмбеддингов
+    VECTOR_INDEX_BACKEND: str = "chroma"
+    VECTOR_INDEX_DIR: str = "./chroma_db/replica"
+    # Квантование реплики: "none" - float32, "int8" - скалярное квантование
+    # с точным пересчетом VECTOR_INDEX_RESCORE_FACTOR * k лучших кандидатов
+    VECTOR_INDEX_QUANTIZATION: str = "none"
+    VECTOR_INDEX_RESCORE_FACTOR: int = 4
+    
+    # Parser
+    PARSER_WORKERS: int = 1  # Количество браузеров для параллельного обхода карточек
+    PARSER_MIN_PAGE_INTERVAL: float = 1.0  # Минимальный интервал между загрузками страниц одним браузером, сек
+    PARSER_WAIT_TIMEOUT: float = 10.0  # Таймаут ожидания готовности страницы, сек
+    PARSER_SCROLL_TIMEOUT: float = 3.0  # Таймаут ожидания подгрузки списка после прокрутки, сек
+    PARSER_BROWSER_MAX_PAGES: int = 200  # Перезапуск браузера после указанного числа страниц
+    PARSER_BLOCK_RESOURCES: bool = True  # Блокировка картинок, медиа, шрифтов и тайлов карты
+    PARSER_REFRESH_INTERVAL_HOURS: float = 24.0  # Заведения, спарсенные позже этого срока, не обходятся повторно
+    PARSER_REVIEWS_TARGET: int = 50  # Сколько отзывов собирать с карточки
+    PARSER_REVIEWS_TIME_BUDGET: float = 20.0  # Максимальное время сбора отзывов одной карточки, сек
+
+    # График работы заведений
+    VENUE_TIMEZONE: str = "Europe/Moscow"  # Часовой пояс для фильтра «открыто сейчас»
+    OPEN_FILTER_OVERFETCH: int = 4  # Во сколько раз больше кандидатов запрашивать при фильтре по графику
+
+    # Снимки страниц для повторного извлечения без парсинга
+    SNAPSHOT_ENABLED: bool = True
+    SNAPSHOT_DIR: str = "./snapshots"
+    SNAPSHOT_COMPRESSION: str = "gzip"  # gzip или zstd (требует пакет zstandard)
+    SNAPSHOT_COMPRESSION_LEVEL: int = 6
+
+    # Очередь задач парсинга (crawler_worker.py)
+    CRAWL_JOB_POLL_INTERVAL: float = 5.0  # Период опроса очереди, сек
+    CRAWL_JOB_HEARTBEAT_INTERVAL: float = 5.0  # Период записи прогресса и проверки отмены, сек
+    CRAWL_JOB_STALE_SECONDS: float = 120.0  # Задача без heartbeat дольше этого срока возвращается в очередь
+
+    # Потоковая загрузка (парсинг -> эмбеддинги -> запись)
+    INGEST_BATCH_SIZE: int = 16  # Размер порции эмбеддингов и записи
+    INGEST_FLUSH_INTERVAL: float = 2.0  # Максимальное ожидание наполнения порции, сек
+    INGEST_QUEUE_SIZE: int = 32  # Емкость очередей между стадиями
     
     # ClickHouse
     CLICKHOUSE_HOST: str = "localhost"
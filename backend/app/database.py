@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from app.config import settings
@@ -20,8 +20,94 @@ def get_db():
     finally:
         db.close()
 
+def add_missing_columns(metadata):
+    """
+    Добавление в существующие таблицы новых столбцов моделей.
+    `create_all` создает только отсутствующие таблицы, поэтому новые
+    nullable-столбцы добавляются через ALTER TABLE. Индексы и другие
+    изменения схемы существующих таблиц - миграциями (app/migrations).
+    """
+    inspector = inspect(engine)
+    with engine.begin() as connection:
+        for table in metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                connection.execute(text(f'ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}'))
+                print(f"Добавлен столбец {table.name}.{column.name}")
+
+def backfill_hours_bitmaps():
+    """Расчет маски графика работы для заведений, сохраненных до ее появления."""
+    from app.models import Venue
+    from app.utils.opening_hours import parse_opening_hours
+
+    db = SessionLocal()
+    try:
+        venues = db.query(Venue).filter(Venue.hours_bitmap.is_(None)).all()
+        updated = 0
+        for venue in venues:
+            bitmap = parse_opening_hours((venue.parsed_data or {}).get("opening_hours") or [])
+            if bitmap:
+                venue.hours_bitmap = bitmap
+                updated += 1
+        db.commit()
+        if updated:
+            print(f"Рассчитан график работы для {updated} заведений")
+    finally:
+        db.close()
+
+def backfill_venue_categories():
+    """Заполнение справочника категорий и ссылок на него у сохраненных заведений."""
+    from app.models import Venue
+    from app.utils.categories import seed_categories, resolve_category_id
+
+    db = SessionLocal()
+    try:
+        seed_categories(db)
+        venues = db.query(Venue).filter(Venue.category_id.is_(None), Venue.category.isnot(None)).all()
+        cache = {}
+        updated = 0
+        for venue in venues:
+            venue.category_id = resolve_category_id(db, venue.category, cache=cache)
+            updated += venue.category_id is not None
+        db.commit()
+        if updated:
+            print(f"Привязано к справочнику категорий заведений: {updated}")
+    finally:
+        db.close()
+
+def backfill_rating_aggregates():
+    """Расчет суммы и количества оценок для заведений, сохраненных до их появления."""
+    from app.utils.ratings import reconcile_rating_aggregates
+
+    db = SessionLocal()
+    try:
+        venue_ids = reconcile_rating_aggregates(db, only_missing=True)
+        if venue_ids:
+            print(f"Рассчитаны агрегаты рейтинга для {len(venue_ids)} заведений")
+    finally:
+        db.close()
+
 def init_db():
     from app.models import Base  # Импорт здесь для избежания циклических импортов
+    from app.utils.venue_search import create_search_index
+    from app.utils.geo import create_geo_index
+    from app.migrations.runner import run_migrations
+    from app.utils.response_cache import response_cache
     print("Создание таблиц базы данных...")
     Base.metadata.create_all(bind=engine)
+    add_missing_columns(Base.metadata)
+    run_migrations(engine)
+    create_search_index(engine)
+    create_geo_index(engine)
+    backfill_hours_bitmaps()
+    backfill_venue_categories()
+    backfill_rating_aggregates()
+    # Миграции и заполнение столбцов меняют заведения в обход API и загрузки,
+    # поэтому закэшированные ответы (в том числе других процессов) сбрасываются
+    response_cache.invalidate_venues()
     print("Таблицы базы данных успешно созданы!")
\ No newline at end of file
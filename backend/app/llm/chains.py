@@ -8,10 +8,13 @@ from langchain.memory import ConversationBufferMemory
 from langchain.callbacks.base import BaseCallbackHandler
 from langchain_core.callbacks import CallbackManager
 from langchain.chains import LLMChain
-from langchain.vectorstores import Chroma
+from langchain.schema import BaseRetriever, Document
+from langchain.schema.vectorstore import VectorStore
+from langchain.callbacks.manager import CallbackManagerForRetrieverRun
 
 from app.config import settings
-from app.rag.chroma_manager import ChromaManager
+from app.rag.chroma_manager import ChromaManager, chroma_vectorstore
+from app.utils.opening_hours import is_open, wants_open_now
 
 class StreamingCallbackHandler(BaseCallbackHandler):
     
@@ -19,6 +22,29 @@ class StreamingCallbackHandler(BaseCallbackHandler):
         """Обработка нового токена, сгенерированного LLM."""
         print(f"Новый токен: {token}", end="", flush=True)
 
+class OpeningHoursRetriever(BaseRetriever):
+    """
+    Retriever с фильтром по графику работы.
+    
+    Если в запросе есть ограничение «открыто сейчас», из векторного хранилища
+    запрашивается в `overfetch` раз больше документов и остаются только
+    заведения, открытые в текущий момент по маске графика в метаданных.
+    """
+    
+    vectorstore: VectorStore
+    k: int = 4
+    overfetch: int = 4
+    
+    class Config:
+        arbitrary_types_allowed = True
+    
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        if not wants_open_now(query):
+            return self.vectorstore.similarity_search(query, k=self.k)
+        
+        docs = self.vectorstore.similarity_search(query, k=self.k * self.overfetch)
+        return [doc for doc in docs if is_open(doc.metadata.get("hours_bitmap"))][:self.k]
+
 class RecommendationChain:
     
     def __init__(self):
@@ -55,17 +81,16 @@ class RecommendationChain:
             """
         )
 
-        # Инициализация векторного хранилища Chroma с персистентностью
-        self.vectorstore = Chroma(
-            collection_name="venue_data",
-            embedding_function=self.embedding_function,
-            persist_directory=settings.CHROMA_PERSIST_DIR,  # Включение персистентности данных
-            # collection_metadata={"hnsw:space": "cosine"}  # Метрика схожести
-        )
+        # Инициализация векторного хранилища Chroma (сервер или локальное хранилище)
+        self.vectorstore = chroma_vectorstore(self.embedding_function)
         
         # Настройка retriever'а для извлечения релевантных документов
         target_source_chunks = 4  # Количество извлекаемых фрагментов
-        self.retriever = self.vectorstore.as_retriever(search_kwargs={"k": target_source_chunks})
+        self.retriever = OpeningHoursRetriever(
+            vectorstore=self.vectorstore,
+            k=target_source_chunks,
+            overfetch=settings.OPEN_FILTER_OVERFETCH
+        )
 
         # Создание RetrievalQA цепочки
         self.chain = RetrievalQA.from_chain_type(
@@ -43,6 +43,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],  # Курсор keyset-пагинации
 )
 
 app.include_router(chat.router, prefix="/api/chat", tags=["chat"])
@@ -0,0 +1,31 @@
+"""
+Составные индексы для частых запросов API.
+
+Все индексы объявлены и в моделях, так что новая база получает их от
+`create_all`, а миграция (с IF NOT EXISTS) добавляет их в базы, созданные
+раньше, в том числе индексы списков заведений и отзывов.
+"""
+from sqlalchemy import text
+
+INDEXES = [
+    # GET /api/venues: фильтр is_verified, сортировка и курсор по (rating, id)
+    "CREATE INDEX IF NOT EXISTS ix_venues_verified_rating_id ON venues (is_verified, rating, id)",
+    # GET /api/venues?category=...: равенство по category_id и та же сортировка
+    "CREATE INDEX IF NOT EXISTS ix_venues_category_verified_rating_id ON venues (category_id, is_verified, rating, id)",
+    # GET /api/venues/{id}/reviews: сортировка и курсор по (created_at, id)
+    "CREATE INDEX IF NOT EXISTS ix_venue_ratings_venue_moderated_created_id "
+    "ON venue_ratings (venue_id, is_moderated, created_at, id)",
+    # Оценка заведения (поиск оценки пользователя), /api/users/me/ratings и /me/stats
+    "CREATE INDEX IF NOT EXISTS ix_venue_ratings_user_venue ON venue_ratings (user_id, venue_id)",
+    # GET /api/admin/unmoderated-ratings: очередь модерации по дате
+    "CREATE INDEX IF NOT EXISTS ix_venue_ratings_moderated_created ON venue_ratings (is_moderated, created_at)",
+    # История чата пользователя (сначала новые), /api/users/me/stats
+    "CREATE INDEX IF NOT EXISTS ix_chat_history_user_created ON chat_history (user_id, created_at)",
+    # POST /api/chat/rate-answer: оценка ответа пользователем, /api/users/me/stats
+    "CREATE INDEX IF NOT EXISTS ix_answer_ratings_user_chat ON answer_ratings (user_id, chat_id)",
+]
+
+
+def upgrade(connection):
+    for statement in INDEXES:
+        connection.execute(text(statement))
@@ -0,0 +1,30 @@
+"""
+Удаление ошибочных вариантов категорий.
+
+"music" вел к "Театр оперы и балета", а "спорт" - к "Стадион", так что
+фильтр по ним и заведения с такой категорией в карточке попадали не в ту
+категорию. Варианты удаляются, ссылки заведений этих категорий
+сбрасываются и заново вычисляются `backfill_venue_categories` при запуске.
+"""
+from sqlalchemy import text
+
+WRONG_ALIASES = {
+    "music": "Театр оперы и балета",
+    "спорт": "Стадион",
+}
+
+
+def upgrade(connection):
+    for alias, category in WRONG_ALIASES.items():
+        category_id = connection.execute(
+            text("SELECT category_id FROM category_aliases WHERE alias = :alias "
+                 "AND category_id = (SELECT id FROM categories WHERE name = :category)"),
+            {"alias": alias, "category": category},
+        ).scalar()
+        if category_id is None:
+            continue
+        connection.execute(text("DELETE FROM category_aliases WHERE alias = :alias"), {"alias": alias})
+        connection.execute(
+            text("UPDATE venues SET category_id = NULL WHERE category_id = :category_id"),
+            {"category_id": category_id},
+        )
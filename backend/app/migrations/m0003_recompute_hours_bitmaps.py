@@ -0,0 +1,13 @@
+"""
+Пересчет масок графика работы.
+
+Раньше выходной день ("Su off") сбрасывал и ночные часы предыдущего дня
+("Sa 20:00-04:00"), если шел в графике после него. Маски сбрасываются и
+заново рассчитываются `backfill_hours_bitmaps` при запуске по сохраненному
+графику (parsed_data).
+"""
+from sqlalchemy import text
+
+
+def upgrade(connection):
+    connection.execute(text("UPDATE venues SET hours_bitmap = NULL WHERE parsed_data IS NOT NULL"))
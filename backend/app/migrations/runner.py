@@ -0,0 +1,80 @@
+import importlib
+import os
+import pkgutil
+import re
+from typing import List, Set, Tuple
+
+from sqlalchemy import text
+
+# Миграции схемы базы данных.
+#
+# `create_all` создает только отсутствующие таблицы, `add_missing_columns`
+# добавляет новые nullable-столбцы. Остальные изменения схемы уже созданной
+# базы (составные индексы, перестройка индексов, преобразование данных)
+# оформляются миграциями: модулями `mNNNN_<название>.py` в этом пакете с
+# функцией `upgrade(connection)`. Каждая миграция выполняется один раз, в
+# порядке номеров и в собственной транзакции, вместе с записью в
+# schema_migrations. Миграция должна описывать схему явным SQL, а не
+# читать ее из моделей: модели меняются, а примененная миграция - нет.
+MIGRATIONS_TABLE = "schema_migrations"
+
+_MODULE_NAME = re.compile(r"^m(\d{4})_\w+$")
+
+
+def discover_migrations() -> List[Tuple[str, str]]:
+    """
+    Модули миграций пакета в порядке номеров.
+
+    Returns:
+        List[Tuple[str, str]]: Номер миграции и имя модуля
+    """
+    directory = os.path.dirname(os.path.abspath(__file__))
+    migrations = []
+    for module in pkgutil.iter_modules([directory]):
+        match = _MODULE_NAME.match(module.name)
+        if match:
+            migrations.append((match.group(1), module.name))
+    migrations.sort()
+    versions = [version for version, _ in migrations]
+    duplicates = sorted({version for version in versions if versions.count(version) > 1})
+    if duplicates:
+        raise RuntimeError(f"Повторяющиеся номера миграций: {', '.join(duplicates)}")
+    return migrations
+
+
+def applied_versions(connection) -> Set[str]:
+    """Номера примененных миграций."""
+    return {row.version for row in connection.execute(text(f"SELECT version FROM {MIGRATIONS_TABLE}"))}
+
+
+def run_migrations(engine) -> List[str]:
+    """
+    Применение новых миграций.
+
+    Returns:
+        List[str]: Имена примененных миграций
+    """
+    with engine.begin() as connection:
+        connection.execute(text(f"""
+            CREATE TABLE IF NOT EXISTS {MIGRATIONS_TABLE} (
+                version VARCHAR(4) PRIMARY KEY,
+                name VARCHAR(100) NOT NULL,
+                applied_at DATETIME DEFAULT CURRENT_TIMESTAMP
+            )
+        """))
+        applied = applied_versions(connection)
+
+    names = []
+    for version, name in discover_migrations():
+        if version in applied:
+            continue
+        module = importlib.import_module(f"{__package__}.{name}")
+        with engine.begin() as connection:
+            module.upgrade(connection)
+            connection.execute(
+                text(f"INSERT INTO {MIGRATIONS_TABLE} (version, name) VALUES (:version, :name)"),
+                {"version": version, "name": name},
+            )
+        print(f"Применена миграция {name}")
+        names.append(name)
+    return names
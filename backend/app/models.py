@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON, Enum
+from sqlalchemy import Column, Integer, String, Float, Boolean, DateTime, Text, ForeignKey, JSON, Enum, Index
 from sqlalchemy.orm import relationship, declarative_base
 from sqlalchemy.sql import func
 import enum
@@ -39,6 +39,29 @@ class ChatHistory(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     user = relationship("User", back_populates="chat_history")
+    
+    __table_args__ = (
+        # История чата пользователя: сначала новые
+        Index("ix_chat_history_user_created", "user_id", "created_at"),
+    )
+
+class Category(Base):
+    __tablename__ = "categories"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String(100), unique=True, nullable=False)  # Каноническое название (как в хлебных крошках)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    aliases = relationship("CategoryAlias", back_populates="category", cascade="all, delete-orphan")
+
+class CategoryAlias(Base):
+    __tablename__ = "category_aliases"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    alias = Column(String(100), unique=True, index=True, nullable=False)  # Нормализованная запись (app.utils.categories)
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="CASCADE"), nullable=False)
+    
+    category = relationship("Category", back_populates="aliases")
 
 class Venue(Base):
     __tablename__ = "venues"
@@ -47,18 +70,32 @@ class Venue(Base):
     external_id = Column(String(100), unique=True, index=True)
     name = Column(String(200), nullable=False)
     category = Column(String(100))
+    category_id = Column(Integer, ForeignKey("categories.id", ondelete="SET NULL"))  # Нормализованная категория
     description = Column(Text)
     location = Column(JSON)
+    lat = Column(Float)  # Широта (индекс venues_rtree, app.utils.geo)
+    lon = Column(Float)  # Долгота
     price_range = Column(String(20))
     rating = Column(Float, default=0.0)
     review_count = Column(Integer, default=0)
+    rating_sum = Column(Float, default=0.0)  # Сумма оценок пользователей (app.utils.ratings)
+    rating_count = Column(Integer, default=0)  # Количество оценок пользователей
     amenities = Column(JSON, default=[])
     parsed_data = Column(JSON, default={})
+    content_hash = Column(String(64))  # Хэш данных парсинга без времени (пропуск неизмененных при загрузке)
     is_verified = Column(Boolean, default=False)
+    hours_bitmap = Column(String(168))  # Недельная маска графика работы (app.utils.opening_hours)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     ratings = relationship("VenueRating", back_populates="venue", cascade="all, delete-orphan")
+    
+    __table_args__ = (
+        # Список заведений: фильтр is_verified, сортировка и курсор по (rating, id)
+        Index("ix_venues_verified_rating_id", "is_verified", "rating", "id"),
+        # Фильтр по категории: равенство по category_id и та же сортировка
+        Index("ix_venues_category_verified_rating_id", "category_id", "is_verified", "rating", "id"),
+    )
 
 class VenueRating(Base):
     __tablename__ = "venue_ratings"
@@ -73,6 +110,15 @@ class VenueRating(Base):
     
     user = relationship("User", back_populates="venue_ratings")
     venue = relationship("Venue", back_populates="ratings")
+    
+    __table_args__ = (
+        # Отзывы заведения: сортировка и курсор по (created_at, id)
+        Index("ix_venue_ratings_venue_moderated_created_id", "venue_id", "is_moderated", "created_at", "id"),
+        # Оценка пользователя для заведения и оценки пользователя
+        Index("ix_venue_ratings_user_venue", "user_id", "venue_id"),
+        # Очередь модерации по дате
+        Index("ix_venue_ratings_moderated_created", "is_moderated", "created_at"),
+    )
 
 class AnswerRating(Base):
     __tablename__ = "answer_ratings"
@@ -84,4 +130,50 @@ class AnswerRating(Base):
     feedback = Column(Text)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
-    user = relationship("User", back_populates="answer_ratings")
\ No newline at end of file
+    user = relationship("User", back_populates="answer_ratings")
+    
+    __table_args__ = (
+        Index("ix_answer_ratings_user_chat", "user_id", "chat_id"),
+    )
+
+class CrawlState(Base):
+    __tablename__ = "crawl_state"
+
+    yandex_id = Column(String(100), primary_key=True)
+    last_scraped_at = Column(DateTime(timezone=True), index=True, nullable=False)
+    content_hash = Column(String(64))
+    payload = Column(JSON)  # Последний результат парсинга карточки
+    ingested_at = Column(DateTime(timezone=True))  # Запись последнего результата в хранилища (по ней считается свежесть)
+
+class CrawlCheckpoint(Base):
+    __tablename__ = "crawl_checkpoints"
+
+    id = Column(Integer, primary_key=True, index=True)
+    city = Column(String(100), nullable=False)
+    category = Column(String(100), nullable=False)
+    items = Column(Integer, nullable=False)
+    status = Column(String(20), default="running", index=True)  # running / completed
+    organization_urls = Column(JSON, default=[])  # Курсор результатов поиска: собранные ссылки
+    processed_ids = Column(JSON, default=[])  # yandex_id карточек, обработанных в этом запуске
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+class CrawlJob(Base):
+    __tablename__ = "crawl_jobs"
+
+    id = Column(Integer, primary_key=True, index=True)
+    city = Column(String(100), nullable=False)
+    category = Column(String(100), nullable=False)
+    max_items = Column(Integer, nullable=False)
+    workers = Column(Integer)
+    force_refresh = Column(Boolean, default=False)
+    status = Column(String(20), default="queued", index=True)  # queued / running / completed / failed / cancelled
+    cancel_requested = Column(Boolean, default=False)
+    progress = Column(JSON, default={})  # Счетчики парсера и загрузки
+    error = Column(Text)
+    worker_id = Column(String(100))  # Процесс, выполняющий задачу
+    created_by = Column(Integer, ForeignKey("users.id", ondelete="SET NULL"))
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    started_at = Column(DateTime(timezone=True))
+    heartbeat_at = Column(DateTime(timezone=True))
+    finished_at = Column(DateTime(timezone=True))
@@ -0,0 +1,216 @@
+from selenium import webdriver
+from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+from webdriver_manager.core.os_manager import ChromeType
+from contextlib import contextmanager
+from functools import lru_cache
+from queue import Queue, Empty
+from threading import Lock
+from typing import Dict, Any, Optional
+
+from app.config import settings
+
+# Ресурсы, которые парсер не читает: картинки, видео, шрифты и тайлы карты
+BLOCKED_URL_PATTERNS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.avif", "*.ico",
+    "*.mp4", "*.webm", "*.m3u8", "*.mp3",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*core-renderer-tiles.maps.yandex.net*",
+    "*core-sat.maps.yandex.net*",
+    "*core-carparks-renderer-lots.maps.yandex.net*",
+    "*avatars.mds.yandex.net*",
+    "*/tiles?*",
+]
+
+PAGE_METRICS_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const resources = performance.getEntriesByType('resource');
+let bytes = nav ? nav.transferSize : 0;
+for (const entry of resources) { bytes += entry.transferSize || 0; }
+return {bytes: bytes, load_ms: nav ? nav.duration : 0, resources: resources.length};
+"""
+
+
+@lru_cache(maxsize=1)
+def chromedriver_path() -> str:
+    """Путь к chromedriver; установка выполняется один раз на процесс."""
+    return ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install()
+
+
+class PooledBrowser:
+    """Браузер из пула со счетчиком загруженных страниц."""
+
+    def __init__(self, driver):
+        self.driver = driver
+        self.pages = 0
+
+
+class BrowserPool:
+    """
+    Пул долгоживущих экземпляров браузера для парсера.
+
+    Браузеры запускаются лениво при первом запросе и переиспользуются между
+    карточками и запусками парсинга. Экземпляр перезапускается после
+    `max_pages` загруженных страниц (чтобы не копить утечки памяти Chromium)
+    или если он перестал отвечать. Картинки, медиа, шрифты и тайлы карты
+    блокируются настройками браузера и через DevTools (Network.setBlockedURLs).
+    """
+
+    def __init__(self, size: int = 1, headless: bool = True, max_pages: Optional[int] = None,
+                 block_resources: Optional[bool] = None):
+        self.size = max(1, size)
+        self.headless = headless
+        self.max_pages = max_pages or settings.PARSER_BROWSER_MAX_PAGES
+        self.block_resources = settings.PARSER_BLOCK_RESOURCES if block_resources is None else block_resources
+
+        self._idle = Queue()
+        self._created = 0
+        self._browsers: Dict[int, PooledBrowser] = {}
+        self._lock = Lock()
+        self.stats = {"started": 0, "recycled": 0, "crashed": 0, "pages": 0, "bytes": 0, "load_ms": 0.0}
+
+    def _options(self) -> Options:
+        chrome_options = Options()
+        chrome_options.add_argument('--no-sandbox')
+        if self.headless:
+            chrome_options.add_argument('--headless')
+        chrome_options.add_argument('--disable-dev-shm-usage')
+        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
+        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
+        chrome_options.add_experimental_option('useAutomationExtension', False)
+
+        if self.block_resources:
+            chrome_options.add_argument("--blink-settings=imagesEnabled=false")
+            chrome_options.add_argument("--autoplay-policy=user-gesture-required")
+            chrome_options.add_experimental_option("prefs", {
+                "profile.managed_default_content_settings.images": 2,
+                "profile.managed_default_content_settings.media_stream": 2,
+                "profile.managed_default_content_settings.plugins": 2,
+                "profile.managed_default_content_settings.geolocation": 2,
+                "profile.managed_default_content_settings.notifications": 2,
+            })
+        return chrome_options
+
+    def _start(self) -> PooledBrowser:
+        driver = webdriver.Chrome(chromedriver_path(), options=self._options())
+        if self.block_resources:
+            try:
+                # Шрифты и тайлы карты не отключаются настройками, поэтому
+                # блокируются на сетевом уровне через DevTools
+                driver.execute_cdp_cmd("Network.enable", {})
+                driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URL_PATTERNS})
+            except (WebDriverException, AttributeError) as e:
+                print(f"Не удалось включить блокировку ресурсов: {e}")
+
+        browser = PooledBrowser(driver)
+        with self._lock:
+            self._browsers[id(driver)] = browser
+            self.stats["started"] += 1
+        return browser
+
+    def _stop(self, browser: PooledBrowser):
+        with self._lock:
+            self._browsers.pop(id(browser.driver), None)
+            self._created -= 1
+        try:
+            browser.driver.quit()
+        except WebDriverException:
+            pass
+
+    @staticmethod
+    def _alive(browser: PooledBrowser) -> bool:
+        try:
+            browser.driver.window_handles
+            return True
+        except WebDriverException:
+            return False
+
+    def acquire(self) -> PooledBrowser:
+        """Получение свободного браузера; при необходимости запускается новый."""
+        while True:
+            try:
+                return self._idle.get_nowait()
+            except Empty:
+                pass
+
+            with self._lock:
+                can_start = self._created < self.size
+                if can_start:
+                    self._created += 1
+            if can_start:
+                try:
+                    return self._start()
+                except Exception:
+                    with self._lock:
+                        self._created -= 1
+                    raise
+
+            # Все браузеры заняты: ждем возврата или освобождения слота
+            # (остановленный при перезапуске браузер не возвращается в очередь)
+            try:
+                return self._idle.get(timeout=1)
+            except Empty:
+                continue
+
+    def release(self, browser: PooledBrowser):
+        """Возврат браузера в пул; исчерпавшие лимит страниц и упавшие перезапускаются."""
+        if not self._alive(browser):
+            reason = "crashed"
+        elif browser.pages >= self.max_pages:
+            reason = "recycled"
+        else:
+            self._idle.put(browser)
+            return
+
+        with self._lock:
+            self.stats[reason] += 1
+        self._stop(browser)
+
+    @contextmanager
+    def session(self):
+        """Контекстный менеджер, выдающий драйвер из пула."""
+        browser = self.acquire()
+        try:
+            yield browser.driver
+        finally:
+            self.release(browser)
+
+    def record_page(self, driver) -> Dict[str, Any]:
+        """
+        Учет загруженной страницы: счетчик для перезапуска и метрики
+        объема и времени загрузки из Navigation/Resource Timing API.
+        """
+        with self._lock:
+            browser = self._browsers.get(id(driver))
+            if browser is not None:
+                browser.pages += 1
+            self.stats["pages"] += 1
+
+        try:
+            metrics = driver.execute_script(PAGE_METRICS_SCRIPT) or {}
+        except WebDriverException:
+            metrics = {}
+
+        with self._lock:
+            self.stats["bytes"] += int(metrics.get("bytes") or 0)
+            self.stats["load_ms"] += float(metrics.get("load_ms") or 0)
+        return metrics
+
+    def summary(self) -> Dict[str, Any]:
+        """Сводка по пулу со средними объемом и временем загрузки страницы."""
+        pages = self.stats["pages"] or 1
+        return {
+            **self.stats,
+            "avg_page_bytes": self.stats["bytes"] / pages,
+            "avg_page_load_ms": self.stats["load_ms"] / pages,
+        }
+
+    def close(self):
+        """Остановка всех браузеров пула."""
+        while True:
+            try:
+                browser = self._idle.get_nowait()
+            except Empty:
+                break
+            self._stop(browser)
@@ -1,48 +1,149 @@
 # backend/app/rag/chroma_manager.py
 from langchain.vectorstores import Chroma
-from langchain_core.documents import Document
 from langchain.embeddings import LocalAIEmbeddings
-from typing import List, Dict, Any, Optional
+from langchain_core.embeddings import Embeddings
+from typing import List, Dict, Any, Optional, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from datetime import datetime
 import uuid
+import hashlib
 from app.config import settings
 import chromadb
 from chromadb.config import Settings
+from app.rag.vector_index import MemmapVectorIndex, UnsupportedFilterError, distance_to_score
+from app.utils.opening_hours import parse_opening_hours, is_open
+
+
+def collection_metadata(
+    space: Optional[str] = None,
+    m: Optional[int] = None,
+    construction_ef: Optional[int] = None,
+    search_ef: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Параметры HNSW-индекса коллекции ChromaDB.
+    
+    Значения, не переданные явно, берутся из настроек. Параметры применяются
+    только при создании коллекции; для существующей коллекции используйте
+    `rebuild_index.py`.
+    
+    Returns:
+        Dict[str, Any]: Метаданные коллекции в формате ChromaDB
+    """
+    return {
+        "hnsw:space": space or settings.CHROMA_HNSW_SPACE,
+        "hnsw:M": m or settings.CHROMA_HNSW_M,
+        "hnsw:construction_ef": construction_ef or settings.CHROMA_HNSW_CONSTRUCTION_EF,
+        "hnsw:search_ef": search_ef or settings.CHROMA_HNSW_SEARCH_EF,
+    }
+
+
+def chroma_client():
+    """
+    Клиент ChromaDB: сервер CHROMA_HOST или локальное хранилище CHROMA_PERSIST_DIR.
+    
+    API и исполнитель задач парсинга (crawler_worker.py) работают в разных
+    процессах, а PersistentClient не перечитывает HNSW-индекс, записанный
+    другим процессом: новые заведения были бы не видны API до перезапуска.
+    Поэтому при совместной работе оба процесса подключаются к серверу.
+    """
+    if settings.CHROMA_HOST:
+        return chromadb.HttpClient(host=settings.CHROMA_HOST, port=settings.CHROMA_PORT)
+    return chromadb.PersistentClient(path=settings.CHROMA_PERSIST_DIR)
+
+
+def collection_metadata_for(name: str, client=None) -> Optional[Dict[str, Any]]:
+    """
+    Метаданные для открытия коллекции через LangChain.
+    
+    ChromaDB перезаписывает метаданные существующей коллекции при
+    `get_or_create_collection`, не перестраивая индекс, поэтому для уже
+    созданной коллекции возвращаются ее собственные метаданные, а параметры
+    из настроек используются только для новой.
+    """
+    client = client or chroma_client()
+    for collection in client.list_collections():
+        if collection.name == name:
+            return collection.metadata
+    return collection_metadata()
+
+
+def chroma_vectorstore(embedding_function: Embeddings) -> Chroma:
+    """Коллекция заведений через LangChain с клиентом `chroma_client`."""
+    client = chroma_client()
+    return Chroma(
+        client=client,
+        collection_name=settings.CHROMA_COLLECTION_NAME,
+        embedding_function=embedding_function,
+        # Локальному хранилищу нужен каталог для persist(); сервер сохраняет данные сам
+        persist_directory=None if settings.CHROMA_HOST else settings.CHROMA_PERSIST_DIR,
+        collection_metadata=collection_metadata_for(settings.CHROMA_COLLECTION_NAME, client)  # Метрика и параметры HNSW
+    )
+
 
 class ChromaManager:
-    def __init__(self):
-        self.embedding_function = LocalAIEmbeddings(
+    def __init__(self, embedding_function: Optional[Embeddings] = None):
+        # Функцию эмбеддингов можно подменить (например, в бенчмарках без LocalAI)
+        self.embedding_function = embedding_function or LocalAIEmbeddings(
             openai_api_base=settings.LOCALAI_BASE_URL,
             openai_api_key=settings.OPENAI_API_KEY,
             model=settings.EMBEDDING_MODEL,
             embedding_ctx_length=settings.EMBEDDING_CTX_LENGTH
         )
-        self.vectorstore = Chroma(
-            collection_name="venue_data",
-            embedding_function=self.embedding_function,
-            persist_directory=settings.CHROMA_PERSIST_DIR,  # Включение персистентности данных
-            # collection_metadata={"hnsw:space": "cosine"}  # Метрика схожести (закомментировано)
-        )
+        self.vectorstore = chroma_vectorstore(self.embedding_function)
+        # Фактическая метрика коллекции (у ранее созданной может отличаться от настроек)
+        self.space = (self.vectorstore._collection.metadata or {}).get("hnsw:space", "l2")
+        
+        # Локальная реплика индекса для read-пути (включается настройкой)
+        self.replica = None
+        if settings.VECTOR_INDEX_BACKEND == "memmap":
+            self.replica = MemmapVectorIndex(
+                settings.VECTOR_INDEX_DIR,
+                quantization=settings.VECTOR_INDEX_QUANTIZATION,
+                rescore_factor=settings.VECTOR_INDEX_RESCORE_FACTOR,
+                space=self.space  # Ранжирование и расстояния как у коллекции
+            )
+            if len(self.replica) == 0:
+                self.sync_replica()
 
-    def add_venues(self, venues: List[Dict[str, Any]]) -> int:
+    @staticmethod
+    def venue_id(venue: Dict[str, Any]) -> Optional[str]:
         """
-        Добавление списка заведений в векторное хранилище.
+        Стабильный идентификатор заведения для upsert.
         
-        Преобразует данные о заведениях в документы LangChain, генерирует эмбеддинги
-        и сохраняет в ChromaDB с персистентностью на диск.
+        Предпочтительно используется Yandex ID; если его нет, идентификатор
+        выводится детерминированно из ссылки на карточку или из пары
+        название + адрес, поэтому повторный парсинг не создает дубликатов.
         
         Args:
-            venues: Список словарей с данными о заведениях
+            venue: Словарь с данными о заведении
         
         Returns:
-            int: Количество успешно добавленных заведений
+            Optional[str]: Идентификатор или None, если заведение не идентифицируемо
         """
-        print("Добавление заведений...")
-        documents = []
-        ids = []
+        if venue.get("yandex_id"):
+            return str(venue["yandex_id"])
+        if venue.get("ypage"):
+            return str(uuid.uuid5(uuid.NAMESPACE_URL, venue["ypage"]))
+        if venue.get("name"):
+            key = f"{venue.get('name', '')}|{venue.get('address', '')}".strip().lower()
+            return str(uuid.uuid5(uuid.NAMESPACE_OID, key))
+        return None
+    
+    @staticmethod
+    def venue_document(venue: Dict[str, Any]):
+        """
+        Текстовое представление заведения и метаданные для фильтрации.
         
-        for venue in venues:
-            # Создание текстового представления заведения
-            doc_text = f"""
+        Args:
+            venue: Словарь с данными о заведении
+        
+        Returns:
+            Tuple[str, Dict[str, Any]]: Текст документа и метаданные
+        """
+        # Создание текстового представления заведения
+        doc_text = f"""
             Название: {venue.get('name', '')}
             Категория: {venue.get('category', '')}
             Адрес: {venue.get('address', '')}
@@ -51,52 +152,193 @@ class ChromaManager:
             Ссылка на Яндекс.Карты: {venue.get('ypage', '')}
             Товары и услуги: {venue.get('goods', '')}
             """
-            # Отзывы: {venue.get('reviews', '')}
-            
-            # Создание метаданных для фильтрации
-            metadata = {
-                "name": venue.get("name", ""),
-                "category": venue.get("category", ""),
-                "rating": str(venue.get("rating", 0)),
-                "source": venue.get("source", "parser")
-            }
-            
-            # Создание объекта документа LangChain
-            doc = Document(
-                page_content=doc_text,
-                metadata=metadata
-            )
-            documents.append(doc)
+        # Отзывы: {venue.get('reviews', '')}
+        
+        # Создание метаданных для фильтрации
+        metadata = {
+            "name": venue.get("name", ""),
+            "category": venue.get("category", ""),
+            "rating": str(venue.get("rating", 0)),
+            "source": venue.get("source", "parser"),
+            # Недельная маска графика работы для фильтра «открыто в момент времени»
+            "hours_bitmap": parse_opening_hours(venue.get("opening_hours") or []) or ""
+        }
+        return doc_text, metadata
+    
+    @staticmethod
+    def content_hash(doc_text: str) -> str:
+        """Хеш текста документа для пропуска повторной генерации эмбеддингов."""
+        return hashlib.sha256(doc_text.encode("utf-8")).hexdigest()
+    
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Генерация эмбеддингов порциями по EMBEDDING_BATCH_SIZE,
+        не более EMBEDDING_MAX_WORKERS параллельных запросов к LocalAI.
+        
+        Args:
+            texts: Тексты документов
+        
+        Returns:
+            List[List[float]]: Эмбеддинги в порядке исходных текстов
+        """
+        batch_size = settings.EMBEDDING_BATCH_SIZE
+        batches = [texts[i:i + batch_size] for i in range(0, len(texts), batch_size)]
+        if len(batches) <= 1:
+            return self.embedding_function.embed_documents(texts) if texts else []
+        
+        with ThreadPoolExecutor(max_workers=settings.EMBEDDING_MAX_WORKERS) as executor:
+            results = executor.map(self.embedding_function.embed_documents, batches)
+            return [embedding for batch in results for embedding in batch]
+
+    def prepare_documents(self, venues: List[Dict[str, Any]], seen: Optional[set] = None):
+        """
+        Подготовка документов порции заведений к записи.
+        
+        Args:
+            venues: Порция словарей с данными о заведениях
+            seen: Идентификаторы, уже встреченные в текущей загрузке
+        
+        Returns:
+            Tuple[List[str], List[str], List[Dict], int]: Идентификаторы, тексты,
+            метаданные и количество пропущенных (неидентифицируемых или повторных) заведений
+        """
+        seen = set() if seen is None else seen
+        ids, texts, metadatas = [], [], []
+        skipped = 0
+        for venue in venues:
+            venue_id = self.venue_id(venue)
+            # Пропуск неидентифицируемых заведений и повторов внутри одной загрузки
+            if venue_id is None or venue_id in seen:
+                skipped += 1
+                continue
+            seen.add(venue_id)
             
-            # Генерация уникального ID (предпочтительно Yandex ID)
-            venue_id = venue.get("yandex_id") or str(uuid.uuid4())
-            print("YANDEX ID", venue_id)
+            doc_text, metadata = self.venue_document(venue)
+            metadata["content_hash"] = self.content_hash(doc_text)
+            metadata["external_id"] = venue_id
             ids.append(venue_id)
+            texts.append(doc_text)
+            metadatas.append(metadata)
+        return ids, texts, metadatas, skipped
+    
+    def changed_documents(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]]):
+        """
+        Отбор документов, текст которых отличается от сохраненного в коллекции.
         
-        # Добавление документов в векторное хранилище через LangChain
-        added_ids = self.vectorstore.add_documents(
-            documents=documents,
-            ids=ids
+        Коллекция целиком не читается: хеши запрашиваются только для переданных id.
+        Документы с прежним текстом, но новыми метаданными (например, после
+        добавления поля) обновляются на месте без генерации эмбеддингов.
+        
+        Returns:
+            Tuple[List[str], List[str], List[Dict], set]: Изменившиеся документы
+            и множество id, которые уже есть в коллекции
+        """
+        if not ids:
+            return [], [], [], set()
+        
+        collection = self.vectorstore._collection
+        stored = collection.get(ids=ids, include=["metadatas"])
+        stored_metadatas = {
+            stored_id: stored_metadata or {}
+            for stored_id, stored_metadata in zip(stored["ids"], stored["metadatas"])
+        }
+        stored_hashes = {stored_id: metadata.get("content_hash") for stored_id, metadata in stored_metadatas.items()}
+        
+        # Документы с неизменившимся текстом не эмбеддятся повторно
+        changed = [
+            i for i, venue_id in enumerate(ids)
+            if stored_hashes.get(venue_id) != metadatas[i]["content_hash"]
+        ]
+        
+        metadata_only = [
+            i for i, venue_id in enumerate(ids)
+            if stored_hashes.get(venue_id) == metadatas[i]["content_hash"]
+            and stored_metadatas[venue_id] != metadatas[i]
+        ]
+        if metadata_only:
+            metadata_ids = [ids[i] for i in metadata_only]
+            collection.update(ids=metadata_ids, metadatas=[metadatas[i] for i in metadata_only])
+            if self.replica is not None:
+                self.sync_replica(ids=metadata_ids)
+        return (
+            [ids[i] for i in changed],
+            [texts[i] for i in changed],
+            [metadatas[i] for i in changed],
+            set(stored_hashes)
         )
+    
+    def upsert_documents(self, ids: List[str], texts: List[str], metadatas: List[Dict[str, Any]],
+                         embeddings: List[List[float]]):
+        """Запись документов с готовыми эмбеддингами в коллекцию и локальную реплику."""
+        if not ids:
+            return
+        self.vectorstore._collection.upsert(ids=ids, embeddings=embeddings, metadatas=metadatas, documents=texts)
         
+        # Инкрементальное обновление локальной реплики
+        if self.replica is not None:
+            self.replica.upsert(ids, embeddings, texts, metadatas)
+    
+    def persist(self):
+        """Сохранение данных на диск для персистентности."""
         try:
-            # Сохранение данных на диск для персистентности
             if hasattr(self.vectorstore, '_persist_directory') and self.vectorstore._persist_directory:
                 self.vectorstore.persist()
-                print(f"Сохранено {len(added_ids)} заведений на диск.")
         except Exception as e:
-            print(f"Ошибка удаления: {e}")
-            return False
-        
-        # Проверка содержимого коллекции (для отладки)
-        client = chromadb.PersistentClient(path=settings.CHROMA_PERSIST_DIR)
-        collection = client.get_collection("venue_data")
-        collection_data = collection.get()
-        print(collection_data)
+            print(f"Ошибка сохранения: {e}")
 
-        return len(added_ids)
+    def add_venues(self, venues: Iterable[Dict[str, Any]], batch_size: Optional[int] = None) -> Dict[str, int]:
+        """
+        Потоковый upsert заведений в векторное хранилище.
+        
+        Заведения читаются из итератора порциями по `batch_size`, для каждой
+        порции эмбеддинги генерируются ограниченным числом параллельных
+        запросов, после чего порция записывается через `upsert` по стабильным
+        идентификаторам. Коллекция целиком не читается: наличие записей
+        проверяется только для id текущей порции.
+        
+        В метаданных каждого документа хранится хеш его текста: документы,
+        хеш которых совпадает с сохраненным, не эмбеддятся и не перезаписываются.
+        
+        Args:
+            venues: Итерируемый набор словарей с данными о заведениях
+            batch_size: Размер порции записи (по умолчанию CHROMA_UPSERT_BATCH_SIZE)
+        
+        Returns:
+            Dict[str, int]: Количество добавленных (inserted), обновленных (updated),
+                            неизменившихся (unchanged) и пропущенных (skipped) заведений
+        """
+        print("Добавление заведений...")
+        batch_size = batch_size or settings.CHROMA_UPSERT_BATCH_SIZE
+        stats = {"inserted": 0, "updated": 0, "unchanged": 0, "skipped": 0}
+        seen = set()
+        
+        iterator = iter(venues)
+        while True:
+            chunk = list(islice(iterator, batch_size))
+            if not chunk:
+                break
+            
+            ids, texts, metadatas, skipped = self.prepare_documents(chunk, seen)
+            stats["skipped"] += skipped
+            
+            changed_ids, texts, metadatas, stored_ids = self.changed_documents(ids, texts, metadatas)
+            stats["unchanged"] += len(ids) - len(changed_ids)
+            if not changed_ids:
+                continue
+            
+            self.upsert_documents(changed_ids, texts, metadatas, self.embed_documents(texts))
+            
+            updated = sum(1 for venue_id in changed_ids if venue_id in stored_ids)
+            stats["updated"] += updated
+            stats["inserted"] += len(changed_ids) - updated
+        
+        self.persist()
+        
+        print(f"Заведения сохранены: {stats}")
+        return stats
 
-    def search_similar(self, query: str, n_results: int = 5, filters: Optional[Dict] = None) -> List[Dict[str, Any]]:
+    def search_similar(self, query: str, n_results: int = 5, filters: Optional[Dict] = None,
+                       open_at: Optional[datetime] = None) -> List[Dict[str, Any]]:
         """
         Поиск семантически похожих заведений по текстовому запросу.
         
@@ -107,14 +349,32 @@ class ChromaManager:
             query: Текстовый запрос для поиска
             n_results: Количество возвращаемых результатов (по умолчанию 5)
             filters: Опциональные фильтры по метаданным (например, {"category": "Ресторан"})
+            open_at: Вернуть только заведения, открытые в этот момент. Маска графика
+                     проверяется после поиска, поэтому кандидатов запрашивается
+                     в OPEN_FILTER_OVERFETCH раз больше.
         
         Returns:
             List[Dict[str, Any]]: Список найденных заведений с метаданными и оценкой схожести
         """
+        if open_at is not None:
+            candidates = self.search_similar(query, n_results * settings.OPEN_FILTER_OVERFETCH, filters)
+            return [
+                venue for venue in candidates
+                if is_open(venue["metadata"].get("hours_bitmap"), open_at)
+            ][:n_results]
+        
         try:
+            query_embedding = self.embedding_function.embed_query(query)
+            if self.replica is not None:
+                # Поиск по локальной реплике без обращения к ChromaDB
+                try:
+                    return self.replica.search(query_embedding, k=n_results, filters=filters)
+                except UnsupportedFilterError:
+                    pass  # Фильтр с операторами, которые вычисляет только ChromaDB
+            
             # Выполнение семантического поиска с использованием векторного хранилища
-            results = self.vectorstore.similarity_search_with_score(
-                query=query,
+            results = self.vectorstore.similarity_search_by_vector_with_relevance_scores(
+                embedding=query_embedding,
                 k=n_results,
                 filter=filters
             )
@@ -122,7 +382,7 @@ class ChromaManager:
             venues = []
             for doc, score in results:
                 # Преобразование расстояния в оценку схожести
-                similarity_score = 1.0 / (1.0 + score) if score != 0 else 1.0
+                similarity_score = distance_to_score(score, self.space)
                 
                 venue = {
                     "id": doc.metadata.get("external_id", str(uuid.uuid4())),
@@ -165,7 +425,47 @@ class ChromaManager:
         """
         try:
             self.vectorstore.delete(ids=ids)
+            if self.replica is not None:
+                self.replica.delete(ids)
             return True
         except Exception as e:
             print(f"Ошибка удаления: {e}")
-            return False
\ No newline at end of file
+            return False
+    
+    def sync_replica(self, ids: Optional[List[str]] = None, batch_size: int = 1000) -> int:
+        """
+        Синхронизация локальной memory-mapped реплики с коллекцией ChromaDB.
+        
+        Args:
+            ids: Идентификаторы заведений для инкрементального обновления.
+                 Если не указаны, реплика полностью пересобирается из коллекции
+                 и атомарно заменяет прежнюю (`MemmapVectorIndex.rebuilding`).
+            batch_size: Размер порции при постраничной выгрузке коллекции
+        
+        Returns:
+            int: Количество записей, выгруженных в реплику
+        """
+        if self.replica is None:
+            return 0
+        
+        collection = self.vectorstore._collection
+        include = ["embeddings", "documents", "metadatas"]
+        
+        if ids is not None:
+            data = collection.get(ids=list(ids), include=include)
+            return self.replica.upsert(data["ids"], data["embeddings"], data["documents"], data["metadatas"])
+        
+        # Новая реплика заполняется в отдельном каталоге и подменяет прежнюю
+        # целиком: поиск в других процессах не видит частично выгруженных данных
+        exported = 0
+        offset = 0
+        with self.replica.rebuilding() as staging:
+            while True:
+                data = collection.get(include=include, limit=batch_size, offset=offset)
+                if not data["ids"]:
+                    break
+                exported += staging.upsert(data["ids"], data["embeddings"], data["documents"], data["metadatas"])
+                offset += batch_size
+        
+        print(f"Реплика индекса обновлена: {exported} заведений.")
+        return exported
@@ -0,0 +1,242 @@
+import os
+import socket
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from threading import Event, Thread
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+
+ACTIVE_STATUSES = ("queued", "running")
+
+
+def default_worker_id() -> str:
+    """Идентификатор процесса-исполнителя: хост и PID."""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+def job_to_dict(job: models.CrawlJob) -> Dict[str, Any]:
+    """Параметры задачи, нужные исполнителю (без привязки к сессии)."""
+    return {
+        "id": job.id,
+        "city": job.city,
+        "category": job.category,
+        "max_items": job.max_items,
+        "workers": job.workers,
+        "force_refresh": bool(job.force_refresh),
+    }
+
+
+class CrawlJobQueue:
+    """
+    Очередь задач парсинга в реляционной базе (`crawl_jobs`).
+
+    API только ставит задачу в очередь и читает ее состояние, а парсинг
+    выполняет отдельный процесс `crawler_worker.py`: браузеры и загрузка
+    в ChromaDB не занимают пул потоков веб-сервера, задача переживает
+    перезапуск API и может быть отменена.
+
+    Жизненный цикл задачи:
+        queued -> running -> completed / failed / cancelled
+
+    Захват задачи атомарен (UPDATE ... WHERE status = 'queued'), поэтому
+    несколько исполнителей не возьмут одну задачу. Исполнитель периодически
+    обновляет heartbeat_at и прогресс; задача, исполнитель которой перестал
+    отвечать дольше CRAWL_JOB_STALE_SECONDS, возвращается в очередь и
+    продолжается с контрольной точки парсинга (`CrawlStateStore`).
+    """
+
+    def __init__(self, session_factory=SessionLocal, stale_seconds: Optional[float] = None):
+        self.session_factory = session_factory
+        self.stale_after = timedelta(seconds=(
+            settings.CRAWL_JOB_STALE_SECONDS if stale_seconds is None else stale_seconds
+        ))
+
+    @contextmanager
+    def _session(self):
+        db = self.session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def requeue_stale(self) -> int:
+        """Возврат в очередь задач, исполнитель которых перестал присылать heartbeat."""
+        cutoff = datetime.utcnow() - self.stale_after
+        with self._session() as db:
+            requeued = db.query(models.CrawlJob).filter(
+                models.CrawlJob.status == "running",
+                models.CrawlJob.heartbeat_at < cutoff
+            ).update({"status": "queued", "worker_id": None}, synchronize_session=False)
+            db.commit()
+        if requeued:
+            print(f"Возвращено в очередь зависших задач парсинга: {requeued}")
+        return requeued
+
+    def claim(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Захват самой старой задачи из очереди.
+
+        Returns:
+            Optional[Dict[str, Any]]: Параметры задачи или None, если очередь пуста
+        """
+        self.requeue_stale()
+        with self._session() as db:
+            candidates = db.query(models.CrawlJob.id).filter(
+                models.CrawlJob.status == "queued"
+            ).order_by(models.CrawlJob.id).limit(10).all()
+
+            for (job_id,) in candidates:
+                now = datetime.utcnow()
+                # Задачу мог захватить другой исполнитель или отменить администратор
+                claimed = db.query(models.CrawlJob).filter(
+                    models.CrawlJob.id == job_id,
+                    models.CrawlJob.status == "queued"
+                ).update({
+                    "status": "running",
+                    "worker_id": worker_id,
+                    "started_at": now,
+                    "heartbeat_at": now,
+                }, synchronize_session=False)
+                db.commit()
+                if claimed:
+                    return job_to_dict(db.get(models.CrawlJob, job_id))
+        return None
+
+    def heartbeat(self, job_id: int, worker_id: str, progress: Dict[str, Any]) -> bool:
+        """
+        Сохранение прогресса задачи.
+
+        Returns:
+            bool: True, если задачу нужно остановить (запрошена отмена
+            или задача больше не принадлежит исполнителю)
+        """
+        with self._session() as db:
+            updated = db.query(models.CrawlJob).filter(
+                models.CrawlJob.id == job_id,
+                models.CrawlJob.worker_id == worker_id,
+                models.CrawlJob.status == "running"
+            ).update({"heartbeat_at": datetime.utcnow(), "progress": progress}, synchronize_session=False)
+            db.commit()
+            if not updated:
+                return True
+            job = db.get(models.CrawlJob, job_id)
+            return bool(job.cancel_requested)
+
+    def finish(self, job_id: int, worker_id: str, status: str,
+               progress: Optional[Dict[str, Any]] = None, error: Optional[str] = None):
+        """Завершение задачи со статусом completed, failed или cancelled."""
+        values = {"status": status, "finished_at": datetime.utcnow(), "error": error}
+        if progress is not None:
+            values["progress"] = progress
+        with self._session() as db:
+            db.query(models.CrawlJob).filter(
+                models.CrawlJob.id == job_id,
+                models.CrawlJob.worker_id == worker_id
+            ).update(values, synchronize_session=False)
+            db.commit()
+
+    def release(self, job_id: int, worker_id: str, progress: Optional[Dict[str, Any]] = None):
+        """Возврат задачи в очередь при остановке исполнителя (продолжится с контрольной точки)."""
+        values = {"status": "queued", "worker_id": None}
+        if progress is not None:
+            values["progress"] = progress
+        with self._session() as db:
+            db.query(models.CrawlJob).filter(
+                models.CrawlJob.id == job_id,
+                models.CrawlJob.worker_id == worker_id,
+                models.CrawlJob.status == "running"
+            ).update(values, synchronize_session=False)
+            db.commit()
+
+
+def _until(venues: Iterator[Dict[str, Any]], stop: Event, interrupted: Event) -> Iterable[Dict[str, Any]]:
+    """
+    Поток заведений, прерываемый событием `stop`; парсер закрывается при выходе.
+
+    Заведение, полученное от парсера в момент остановки, уже разобрано и
+    учтено в его счетчиках, поэтому оно передается на загрузку до прерывания.
+    """
+    try:
+        for venue in venues:
+            yield venue
+            if stop.is_set():
+                interrupted.set()
+                break
+    finally:
+        # Незавершенный запуск остается в контрольной точке и будет продолжен
+        venues.close()
+
+
+def run_job(queue: CrawlJobQueue, job: Dict[str, Any], worker_id: str,
+            shutdown: Optional[Event] = None, chroma_manager=None) -> str:
+    """
+    Выполнение задачи парсинга: парсер, потоковая загрузка и heartbeat.
+
+    Отдельный поток раз в CRAWL_JOB_HEARTBEAT_INTERVAL секунд сохраняет
+    счетчики парсера и загрузки и проверяет запрос отмены. При отмене или
+    остановке исполнителя (`shutdown`) поток карточек прерывается, уже
+    полученные заведения дописываются в хранилища.
+
+    Returns:
+        str: Итоговый статус (completed, failed, cancelled или queued,
+        если задача возвращена в очередь при остановке исполнителя)
+    """
+    from app.rag.chroma_manager import ChromaManager
+    from app.rag.crawl_state import CrawlStateStore
+    from app.rag.ingestion import IngestionPipeline
+    from app.rag.parser import WebParser
+
+    shutdown = shutdown or Event()
+    stop = Event()
+    interrupted = Event()
+    finished = Event()
+    cancelled = Event()
+
+    state = CrawlStateStore(refresh_interval_hours=0 if job["force_refresh"] else None)
+    parser = WebParser(headless=True, workers=job["workers"], state=state)
+    pipeline = IngestionPipeline(chroma_manager or ChromaManager(), state=state)
+
+    def progress() -> Dict[str, Any]:
+        return {**parser.progress, "ingest": dict(pipeline.stats)}
+
+    def beat():
+        while not finished.wait(settings.CRAWL_JOB_HEARTBEAT_INTERVAL):
+            try:
+                if queue.heartbeat(job["id"], worker_id, progress()):
+                    cancelled.set()
+                    stop.set()
+            except Exception as e:
+                print(f"Ошибка сохранения прогресса задачи #{job['id']}: {e}")
+            if shutdown.is_set():
+                stop.set()
+
+    heartbeat = Thread(target=beat, name=f"crawl-job-{job['id']}-heartbeat", daemon=True)
+    heartbeat.start()
+    print(f"Задача парсинга #{job['id']}: {job['city']}, {job['category']}, {job['max_items']} шт.")
+    try:
+        venues = parser.iter_ymaps(city=job["city"], category=job["category"], items=job["max_items"])
+        pipeline.run(_until(venues, stop, interrupted))
+    except Exception as e:
+        finished.set()
+        queue.finish(job["id"], worker_id, "failed", progress(), f"{type(e).__name__}: {e}")
+        print(f"Задача парсинга #{job['id']} завершилась ошибкой: {e}")
+        return "failed"
+    finally:
+        finished.set()
+        heartbeat.join()
+        parser.close()
+
+    if not interrupted.is_set():
+        status = "completed"
+        queue.finish(job["id"], worker_id, status, progress())
+    elif cancelled.is_set():
+        status = "cancelled"
+        queue.finish(job["id"], worker_id, status, progress())
+    else:
+        status = "queued"
+        queue.release(job["id"], worker_id, progress())
+    print(f"Задача парсинга #{job['id']}: {status}")
+    return status
@@ -0,0 +1,203 @@
+import hashlib
+import json
+import re
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from threading import Lock
+from typing import Dict, Any, List, Optional, Iterable, Set, Tuple
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+
+ORG_URL_PATTERN = re.compile(r"/org/[^/]+/(\d+)")
+
+
+def yandex_id_from_url(url: str) -> Optional[str]:
+    """Извлечение Yandex ID организации из ссылки на карточку."""
+    match = ORG_URL_PATTERN.search(url or "")
+    return match.group(1) if match else None
+
+
+def venue_content_hash(venue: Dict[str, Any]) -> str:
+    """Хэш содержимого карточки без служебных полей (время парсинга)."""
+    content = {key: value for key, value in venue.items() if key != "parsed_at"}
+    return hashlib.sha256(json.dumps(content, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class CrawlStateStore:
+    """
+    Состояние инкрементального парсинга в реляционной базе.
+
+    Хранит для каждого `yandex_id` время последнего парсинга, хэш содержимого,
+    последний результат и время его записи в хранилища (`crawl_state`),
+    а также контрольные точки запусков
+    (`crawl_checkpoints`): собранные ссылки результатов поиска и список уже
+    обработанных карточек. Это позволяет:
+        - пропускать заведения, загруженные в хранилища не раньше
+          PARSER_REFRESH_INTERVAL_HOURS (карточка, которую не удалось
+          эмбеддить или записать, свежей не считается и обходится повторно);
+        - продолжать прерванный запуск с того же места без повторного поиска;
+        - повторно обходить только устаревшие карточки.
+
+    Методы потокобезопасны: каждый вызов работает в собственной сессии,
+    запись сериализуется блокировкой (карточки сохраняются из воркеров парсера).
+    """
+
+    def __init__(self, refresh_interval_hours: Optional[float] = None, session_factory=SessionLocal):
+        self.refresh_interval = timedelta(hours=(
+            settings.PARSER_REFRESH_INTERVAL_HOURS if refresh_interval_hours is None else refresh_interval_hours
+        ))
+        self.session_factory = session_factory
+        self._lock = Lock()
+
+    @contextmanager
+    def _session(self):
+        db = self.session_factory()
+        try:
+            yield db
+        finally:
+            db.close()
+
+    def start_run(self, city: str, category: str, items: int) -> Tuple[int, Dict[str, Any]]:
+        """
+        Начало запуска парсинга.
+
+        Если для тех же города, категории и количества есть незавершенный
+        запуск, он продолжается; иначе создается новая контрольная точка.
+
+        Returns:
+            Tuple[int, Dict[str, Any]]: ID контрольной точки и ее содержимое
+            (organization_urls, processed_ids, resumed)
+        """
+        with self._lock, self._session() as db:
+            checkpoint = db.query(models.CrawlCheckpoint).filter(
+                models.CrawlCheckpoint.city == city,
+                models.CrawlCheckpoint.category == category,
+                models.CrawlCheckpoint.items == items,
+                models.CrawlCheckpoint.status == "running"
+            ).order_by(models.CrawlCheckpoint.id.desc()).first()
+
+            resumed = checkpoint is not None
+            if checkpoint is None:
+                checkpoint = models.CrawlCheckpoint(
+                    city=city,
+                    category=category,
+                    items=items,
+                    status="running",
+                    organization_urls=[],
+                    processed_ids=[]
+                )
+                db.add(checkpoint)
+                db.commit()
+                db.refresh(checkpoint)
+
+            return checkpoint.id, {
+                "organization_urls": list(checkpoint.organization_urls or []),
+                "processed_ids": list(checkpoint.processed_ids or []),
+                "resumed": resumed,
+            }
+
+    def save_cursor(self, run_id: int, organization_urls: List[str]):
+        """Сохранение собранных ссылок результатов поиска."""
+        with self._lock, self._session() as db:
+            checkpoint = db.get(models.CrawlCheckpoint, run_id)
+            checkpoint.organization_urls = list(organization_urls)
+            db.commit()
+
+    def fresh_ids(self, yandex_ids: Iterable[str]) -> Set[str]:
+        """Заведения, загруженные в хранилища в пределах интервала обновления."""
+        yandex_ids = [yandex_id for yandex_id in yandex_ids if yandex_id]
+        if not yandex_ids or self.refresh_interval.total_seconds() <= 0:
+            return set()
+
+        cutoff = datetime.utcnow() - self.refresh_interval
+        with self._session() as db:
+            rows = db.query(models.CrawlState.yandex_id).filter(
+                models.CrawlState.yandex_id.in_(yandex_ids),
+                models.CrawlState.ingested_at >= cutoff
+            ).all()
+        return {row.yandex_id for row in rows}
+
+    def pending_urls(self, checkpoint: Dict[str, Any], organization_urls: List[str]) -> List[str]:
+        """
+        Ссылки, которые нужно обойти в текущем запуске: без уже обработанных
+        в этом запуске и без свежих заведений.
+        """
+        processed = set(checkpoint["processed_ids"])
+        fresh = self.fresh_ids(yandex_id_from_url(url) for url in organization_urls)
+
+        pending = []
+        for url in organization_urls:
+            yandex_id = yandex_id_from_url(url)
+            if yandex_id in processed or yandex_id in fresh:
+                continue
+            pending.append(url)
+
+        skipped = len(organization_urls) - len(pending)
+        if skipped:
+            print(f"Пропущено карточек: {skipped} (обработаны ранее или еще не устарели)")
+        return pending
+
+    def record(self, run_id: Optional[int], venue: Dict[str, Any]) -> bool:
+        """
+        Сохранение результата парсинга карточки и отметка в контрольной точке.
+
+        Свежей карточка становится только после записи в хранилища
+        (`mark_ingested`), до этого отметка о прошлой загрузке сбрасывается.
+
+        Returns:
+            bool: True, если содержимое изменилось с прошлого парсинга
+        """
+        yandex_id = venue.get("yandex_id")
+        if not yandex_id:
+            return True
+
+        content_hash = venue_content_hash(venue)
+        with self._lock, self._session() as db:
+            state = db.get(models.CrawlState, yandex_id)
+            changed = state is None or state.content_hash != content_hash
+            if state is None:
+                state = models.CrawlState(yandex_id=yandex_id)
+                db.add(state)
+            state.last_scraped_at = datetime.utcnow()
+            state.content_hash = content_hash
+            state.payload = venue
+            state.ingested_at = None
+
+            if run_id is not None:
+                checkpoint = db.get(models.CrawlCheckpoint, run_id)
+                processed = list(checkpoint.processed_ids or [])
+                if yandex_id not in processed:
+                    # Присваивается новый список, чтобы изменение JSON-поля попало в UPDATE
+                    checkpoint.processed_ids = processed + [yandex_id]
+
+            db.commit()
+        return changed
+
+    def mark_ingested(self, yandex_ids: Iterable[str]):
+        """Отметка о записи заведений в ChromaDB и реляционную базу (после фиксации)."""
+        yandex_ids = [yandex_id for yandex_id in yandex_ids if yandex_id]
+        if not yandex_ids:
+            return
+        with self._lock, self._session() as db:
+            db.query(models.CrawlState).filter(models.CrawlState.yandex_id.in_(yandex_ids)).update(
+                {"ingested_at": datetime.utcnow()}, synchronize_session=False
+            )
+            db.commit()
+
+    def payloads(self, yandex_ids: List[str]) -> List[Dict[str, Any]]:
+        """Сохраненные результаты парсинга в порядке переданных ID."""
+        if not yandex_ids:
+            return []
+        with self._session() as db:
+            rows = db.query(models.CrawlState).filter(models.CrawlState.yandex_id.in_(yandex_ids)).all()
+        by_id = {row.yandex_id: row.payload for row in rows}
+        return [by_id[yandex_id] for yandex_id in yandex_ids if by_id.get(yandex_id)]
+
+    def finish_run(self, run_id: int):
+        """Завершение запуска: контрольная точка больше не продолжается."""
+        with self._lock, self._session() as db:
+            checkpoint = db.get(models.CrawlCheckpoint, run_id)
+            checkpoint.status = "completed"
+            db.commit()
@@ -0,0 +1,187 @@
+import re
+from urllib.parse import unquote
+
+import lxml.html
+from lxml import etree
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+
+def _has_class(name: str) -> str:
+    """XPath-условие наличия класса в атрибуте class (как `find_all(class_=...)` в BeautifulSoup)."""
+    return f"contains(concat(' ', normalize-space(@class), ' '), ' {name} ')"
+
+
+# Все поля карточки организации выбираются одним скомпилированным выражением;
+# найденные элементы разбираются по полям за один проход в порядке документа
+ORG_FIELDS_XPATH = etree.XPath(" | ".join([
+    f"//h1[{_has_class('orgpage-header-view__header')}]",
+    "//a[normalize-space(@class) = 'breadcrumbs-view__breadcrumb _outline']",
+    f"//a[{_has_class('business-contacts-view__address-link')}]",
+    f"//span[{_has_class('business-urls-view__text')}]",
+    "//meta[@itemprop = 'openingHours']",
+    f"//span[{_has_class('business-summary-rating-badge-view__rating-text')}]",
+    f"//div[{_has_class('related-item-photo-view__title')}]",
+    f"//span[{_has_class('related-product-view__price')}]",
+    f"//div[{_has_class('related-item-list-view__title')}]",
+    f"//div[{_has_class('related-item-list-view__price')}]",
+]))
+
+REVIEWS_XPATH = etree.XPath(f"//span[{_has_class('spoiler-view__text-container')}]")
+REVIEWS_COUNTER_XPATH = etree.XPath(f"(//div[{_has_class('tabs-select-view__counter')}])[last()]")
+
+# Координаты организации: атрибут data-coordinates ("долгота,широта") или
+# параметр ll= (тоже долгота, широта) в ссылках маршрута и карты самой
+# карточки. Ссылки вне карточки (похожие места, реклама, og:image) ведут
+# на другие точки и не учитываются
+COORDINATES_ATTR_XPATH = etree.XPath("//*[@data-coordinates]/@data-coordinates")
+MAP_LINKS_XPATH = etree.XPath(f"//div[{_has_class('business-card-view')}]//a/@href[contains(., 'll=')]")
+LL_PATTERN = re.compile(r"[?&]ll=(-?\d+(?:\.\d+)?),(-?\d+(?:\.\d+)?)")
+LON_LAT_PATTERN = re.compile(r"^\s*(-?\d+(?:\.\d+)?)\s*,\s*(-?\d+(?:\.\d+)?)\s*$")
+
+# Текст элемента без содержимого script/style, как `getText()` в BeautifulSoup
+TEXT_XPATH = etree.XPath("descendant::text()[not(ancestor::script or ancestor::style or ancestor::template)]")
+
+# Класс элемента -> поле карточки; для meta поле определяется по itemprop
+CLASS_FIELDS = {
+    ("h1", "orgpage-header-view__header"): "name",
+    ("a", "business-contacts-view__address-link"): "address",
+    ("span", "business-urls-view__text"): "website",
+    ("span", "business-summary-rating-badge-view__rating-text"): "rating",
+    ("div", "related-item-photo-view__title"): "photo_dishes",
+    ("span", "related-product-view__price"): "photo_prices",
+    ("div", "related-item-list-view__title"): "list_dishes",
+    ("div", "related-item-list-view__price"): "list_prices",
+}
+
+HtmlSource = Union[str, bytes, etree._Element]
+
+
+def parse_html(html: HtmlSource) -> etree._Element:
+    """Разбор HTML страницы в дерево lxml (уже разобранное дерево возвращается как есть)."""
+    if isinstance(html, etree._Element):
+        return html
+    return lxml.html.document_fromstring(html)
+
+
+def element_text(element: etree._Element) -> str:
+    return "".join(TEXT_XPATH(element))
+
+
+def extract_org(html: HtmlSource) -> Dict[str, Any]:
+    """
+    Извлечение полей карточки организации за один разбор страницы.
+
+    Результат совпадает с методами `InfoGetter`: для полей, встречающихся
+    несколько раз, берется последнее вхождение (name, category, address,
+    website), рейтинг склеивается из всех фрагментов, товары собираются
+    из витрины и списка.
+
+    Args:
+        html: HTML страницы (или уже разобранное дерево)
+
+    Returns:
+        Dict[str, Any]: name, category, address, website, opening_hours, rating, goods
+    """
+    tree = parse_html(html)
+
+    fields = {"name": "", "category": "", "address": "", "website": ""}
+    opening_hours = []
+    rating = []
+    menu = {"photo_dishes": [], "photo_prices": [], "list_dishes": [], "list_prices": []}
+
+    for element in ORG_FIELDS_XPATH(tree):
+        tag = element.tag
+        if tag == "meta":
+            opening_hours.append(element.get("content"))
+            continue
+
+        classes = (element.get("class") or "").split()
+        if tag == "a" and " ".join(classes) == "breadcrumbs-view__breadcrumb _outline":
+            fields["category"] = element_text(element)
+            continue
+
+        for class_name in classes:
+            field = CLASS_FIELDS.get((tag, class_name))
+            if field is None:
+                continue
+            text = element_text(element)
+            if field == "rating":
+                rating.append(text)
+            elif field in menu:
+                menu[field].append(text)
+            else:
+                fields[field] = text
+            break
+
+    dishes = menu["photo_dishes"] + menu["list_dishes"]
+    prices = menu["photo_prices"] + menu["list_prices"]
+    return {
+        **fields,
+        "opening_hours": opening_hours,
+        "rating": "".join(rating),
+        "goods": dict(zip(dishes, prices)),
+    }
+
+
+def extract_goods(html: HtmlSource) -> Dict[str, str]:
+    """Товары и услуги с ценами (как `InfoGetter.get_goods`)."""
+    return extract_org(html)["goods"]
+
+
+def extract_reviews(html: HtmlSource) -> List[str]:
+    """Тексты отзывов со страницы отзывов (как итоговый разбор в `InfoGetter.get_reviews`)."""
+    return [element_text(element) for element in REVIEWS_XPATH(parse_html(html))]
+
+
+def extract_reviews_count(html: HtmlSource) -> Optional[int]:
+    """
+    Количество отзывов из счетчика вкладки.
+
+    Returns:
+        Optional[int]: Количество, 0 если счетчик не число, None если счетчика нет
+    """
+    counters = REVIEWS_COUNTER_XPATH(parse_html(html))
+    if not counters:
+        return None
+    try:
+        return int(element_text(counters[0]))
+    except ValueError:
+        return 0
+
+
+def _lat_lon(lon: str, lat: str) -> Optional[Tuple[float, float]]:
+    lat, lon = float(lat), float(lon)
+    if -90 <= lat <= 90 and -180 <= lon <= 180:
+        return lat, lon
+    return None
+
+
+def extract_coordinates(html: HtmlSource, url: Optional[str] = None) -> Optional[Tuple[float, float]]:
+    """
+    Координаты организации с карточки.
+
+    Порядок источников: атрибут data-coordinates, параметр ll= в адресе
+    страницы (карта центрируется на организации), затем ll= в ссылках
+    маршрута и карты внутри карточки организации. Если ни один источник
+    не найден, возвращается None: первая попавшаяся ссылка страницы может
+    указывать на другое место. Яндекс.Карты записывают координаты как
+    «долгота,широта».
+
+    Args:
+        html: HTML карточки (или уже разобранное дерево)
+        url: Адрес страницы после загрузки (`driver.current_url`)
+
+    Returns:
+        Optional[Tuple[float, float]]: (широта, долгота) или None
+    """
+    tree = parse_html(html)
+    for value in COORDINATES_ATTR_XPATH(tree):
+        match = LON_LAT_PATTERN.match(value)
+        if match and _lat_lon(*match.groups()):
+            return _lat_lon(*match.groups())
+
+    for link in ([url] if url else []) + [str(value) for value in MAP_LINKS_XPATH(tree)]:
+        match = LL_PATTERN.search(unquote(link))
+        if match and _lat_lon(*match.groups()):
+            return _lat_lon(*match.groups())
+    return None
@@ -0,0 +1,324 @@
+import time
+from queue import Queue, Empty, Full
+from threading import Thread, Event, Lock
+from typing import Dict, Any, List, Iterable, Optional
+
+from sqlalchemy import func
+from sqlalchemy.dialects.sqlite import insert
+
+from app import models
+from app.config import settings
+from app.database import SessionLocal
+from app.rag.chroma_manager import ChromaManager
+from app.rag.crawl_state import CrawlStateStore, venue_content_hash
+from app.utils.categories import resolve_category_id
+from app.utils.opening_hours import parse_opening_hours
+from app.utils.response_cache import response_cache
+
+_DONE = object()
+
+
+# Столбцы, которые загрузка перезаписывает; is_verified и агрегаты оценок
+# пользователей при обновлении не трогаются
+UPSERT_COLUMNS = (
+    "name", "category", "category_id", "description", "location", "lat", "lon",
+    "price_range", "amenities", "parsed_data", "hours_bitmap", "content_hash",
+)
+UPSERT_CHUNK_SIZE = 500  # Строк в одном INSERT (ограничение числа параметров SQLite)
+
+
+def venue_row(db, external_id: str, venue_data: Dict[str, Any], categories: Dict[str, int]) -> Dict[str, Any]:
+    """Значения столбцов venues для заведения из парсера."""
+    coordinates = venue_data.get("coordinates") or {}
+    return {
+        "external_id": external_id,
+        "name": venue_data.get("name"),
+        "category": venue_data.get("category"),
+        "category_id": resolve_category_id(db, venue_data.get("category"), cache=categories),
+        "description": venue_data.get("description"),
+        "location": venue_data.get("location") or (dict(coordinates) if coordinates else None),
+        "lat": coordinates.get("lat"),
+        "lon": coordinates.get("lon"),
+        "price_range": venue_data.get("price_range"),
+        "amenities": venue_data.get("amenities", []),
+        "parsed_data": venue_data,
+        "hours_bitmap": parse_opening_hours(venue_data.get("opening_hours") or []),
+        "content_hash": venue_content_hash(venue_data),
+    }
+
+
+def upsert_venue_rows(db, venues: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Запись порции заведений в реляционную базу одной транзакцией.
+
+    Заведения сопоставляются с существующими строками по external_id
+    (стабильный идентификатор `ChromaManager.venue_id`), поэтому повторный
+    парсинг обновляет строки, а не создает дубликаты. Порция пишется одним
+    `INSERT ... ON CONFLICT (external_id) DO UPDATE`; строка обновляется,
+    только если изменился хэш данных парсинга, так что неизмененные
+    заведения не перезаписываются и не переиндексируются триггерами.
+
+    Args:
+        db: Сессия базы данных (у загрузки - собственная, не сессия запроса)
+        venues: Заведения в формате парсера
+
+    Returns:
+        Dict[str, int]: Количество новых (inserted), обновленных (updated)
+        и неизмененных (unchanged) заведений
+    """
+    by_id = {}
+    for venue_data in venues:
+        external_id = ChromaManager.venue_id(venue_data)
+        if external_id is not None:
+            by_id[external_id] = venue_data
+    if not by_id:
+        return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    existing = {
+        row.external_id
+        for row in db.query(models.Venue.external_id).filter(models.Venue.external_id.in_(list(by_id)))
+    }
+
+    categories = {}
+    rows = [venue_row(db, external_id, venue_data, categories) for external_id, venue_data in by_id.items()]
+
+    # Один скомпилированный оператор на все строки (executemany): SQLAlchemy
+    # сам разбивает их на INSERT ... VALUES по UPSERT_CHUNK_SIZE строк
+    venues_table = models.Venue.__table__
+    stmt = insert(venues_table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[venues_table.c.external_id],
+        set_={**{column: stmt.excluded[column] for column in UPSERT_COLUMNS}, "updated_at": func.now()},
+        where=venues_table.c.content_hash.is_distinct_from(stmt.excluded.content_hash),
+    ).returning(venues_table.c.id, venues_table.c.external_id)
+    params = [
+        {**row, "is_verified": False, "rating": 0.0, "review_count": 0, "rating_sum": 0.0, "rating_count": 0}
+        for row in rows
+    ]
+    # RETURNING отдает вставленные и обновленные строки, пропущенные по WHERE - нет
+    result = db.execute(stmt.execution_options(insertmanyvalues_page_size=UPSERT_CHUNK_SIZE), params)
+    written = {row.external_id: row.id for row in result}
+
+    db.commit()
+
+    inserted = len(by_id) - len(existing)
+    updated = sum(1 for external_id in written if external_id in existing)
+    if written:
+        # Закэшированные ответы API по измененным заведениям и страницы списков устарели
+        response_cache.invalidate_venues(written.values())
+    return {"inserted": inserted, "updated": updated, "unchanged": len(existing) - updated}
+
+
+class IngestionPipeline:
+    """
+    Потоковая загрузка заведений: парсинг -> нормализация -> эмбеддинги -> запись.
+
+    Стадии работают в отдельных потоках и связаны ограниченными очередями
+    (INGEST_QUEUE_SIZE), поэтому медленная стадия притормаживает предыдущие,
+    а в памяти одновременно находится ограниченное число заведений.
+    Эмбеддинги генерируются порциями по INGEST_BATCH_SIZE; неполная порция
+    отправляется не позже чем через INGEST_FLUSH_INTERVAL секунд после
+    первого заведения в ней. Каждая порция сразу записывается в ChromaDB
+    (и локальную реплику) и в реляционную базу, так что заведения становятся
+    доступны для поиска через несколько секунд после парсинга. Если передано
+    состояние парсинга, записанные заведения отмечаются в нем свежими.
+
+    Пример:
+        pipeline = IngestionPipeline(chroma_manager)
+        stats = pipeline.run(parser.iter_ymaps(city, category, items))
+    """
+
+    def __init__(self, chroma_manager: ChromaManager, session_factory=SessionLocal,
+                 batch_size: Optional[int] = None, flush_interval: Optional[float] = None,
+                 queue_size: Optional[int] = None, state: Optional[CrawlStateStore] = None):
+        self.chroma_manager = chroma_manager
+        self.state = state
+        self.session_factory = session_factory
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.flush_interval = settings.INGEST_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self.queue_size = queue_size or settings.INGEST_QUEUE_SIZE
+
+        self._stop = Event()
+        self._errors: List[BaseException] = []
+        self._lock = Lock()
+        self.stats: Dict[str, Any] = {}
+
+    def _count(self, key: str, value: float = 1):
+        with self._lock:
+            self.stats[key] = self.stats.get(key, 0) + value
+
+    def _put(self, queue: Queue, item) -> bool:
+        """Запись в ограниченную очередь; прерывается при остановке конвейера."""
+        while not self._stop.is_set():
+            try:
+                queue.put(item, timeout=0.5)
+                return True
+            except Full:
+                continue
+        return False
+
+    def _get(self, queue: Queue, deadline: Optional[float] = None):
+        """
+        Чтение из очереди; при остановке конвейера возвращает маркер завершения.
+        Если задан `deadline` и он истек, выбрасывается Empty.
+        """
+        while not self._stop.is_set():
+            timeout = 0.5
+            if deadline is not None:
+                timeout = min(timeout, deadline - time.monotonic())
+                if timeout <= 0:
+                    raise Empty
+            try:
+                return queue.get(timeout=timeout)
+            except Empty:
+                continue
+        return _DONE
+
+    def _stage(self, target, *args) -> Thread:
+        def run():
+            try:
+                target(*args)
+            except BaseException as e:
+                print(f"Ошибка конвейера загрузки: {e}")
+                self._errors.append(e)
+                self._stop.set()
+
+        thread = Thread(target=run, daemon=True)
+        thread.start()
+        return thread
+
+    def _normalize(self, inbox: Queue, outbox: Queue):
+        """Нормализация: стабильный id, текст документа и метаданные."""
+        seen = set()
+        while True:
+            item = self._get(inbox)
+            if item is _DONE:
+                break
+            venue, scraped_at = item
+            ids, texts, metadatas, skipped = self.chroma_manager.prepare_documents([venue], seen)
+            if skipped:
+                self._count("skipped")
+                continue
+            if not self._put(outbox, (venue, ids[0], texts[0], metadatas[0], scraped_at)):
+                return
+        self._put(outbox, _DONE)
+
+    def _embed(self, inbox: Queue, outbox: Queue):
+        """Сборка порций и генерация эмбеддингов для изменившихся документов."""
+        finished = False
+        while not finished:
+            batch = []
+            deadline = None
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._get(inbox, deadline)
+                except Empty:
+                    break  # Истек интервал: неполная порция отправляется дальше
+                if item is _DONE:
+                    finished = True
+                    break
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+
+            if not batch or self._stop.is_set():
+                continue
+
+            venues = [item[0] for item in batch]
+            ids, texts, metadatas = [item[1] for item in batch], [item[2] for item in batch], [item[3] for item in batch]
+            changed_ids, changed_texts, changed_metadatas, stored_ids = self.chroma_manager.changed_documents(
+                ids, texts, metadatas
+            )
+            self._count("unchanged", len(ids) - len(changed_ids))
+            embeddings = self.chroma_manager.embed_documents(changed_texts) if changed_texts else []
+
+            if not self._put(outbox, {
+                "venues": venues,
+                "ids": changed_ids,
+                "texts": changed_texts,
+                "metadatas": changed_metadatas,
+                "embeddings": embeddings,
+                "stored_ids": stored_ids,
+                "scraped_at": min(item[4] for item in batch),
+            }):
+                return
+        self._put(outbox, _DONE)
+
+    def _store(self, inbox: Queue):
+        """Запись порций в ChromaDB и реляционную базу."""
+        db = self.session_factory()
+        try:
+            while True:
+                batch = self._get(inbox)
+                if batch is _DONE:
+                    break
+
+                self.chroma_manager.upsert_documents(
+                    batch["ids"], batch["texts"], batch["metadatas"], batch["embeddings"]
+                )
+                updated = sum(1 for venue_id in batch["ids"] if venue_id in batch["stored_ids"])
+                self._count("inserted", len(batch["ids"]) - updated)
+                self._count("updated", updated)
+
+                sql_stats = upsert_venue_rows(db, batch["venues"])
+                self._count("sql_inserted", sql_stats["inserted"])
+                self._count("sql_updated", sql_stats["updated"])
+                self._count("sql_unchanged", sql_stats["unchanged"])
+                if self.state is not None:
+                    self.state.mark_ingested(venue.get("yandex_id") for venue in batch["venues"])
+
+                # Задержка от парсинга самого раннего заведения порции до его доступности в поиске
+                lag = time.monotonic() - batch["scraped_at"]
+                self._count("batches")
+                with self._lock:
+                    self.stats["max_lag_seconds"] = max(self.stats.get("max_lag_seconds", 0.0), lag)
+        finally:
+            db.close()
+
+    def run(self, venues: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Загрузка потока заведений; стадия парсинга выполняется в вызывающем потоке.
+
+        Args:
+            venues: Итератор заведений (например, `WebParser.iter_ymaps`)
+
+        Returns:
+            Dict[str, Any]: Счетчики по стадиям и максимальная задержка до записи
+        """
+        self._stop.clear()
+        self._errors = []
+        self.stats = {
+            "scraped": 0, "skipped": 0, "unchanged": 0, "inserted": 0, "updated": 0,
+            "sql_inserted": 0, "sql_updated": 0, "sql_unchanged": 0, "batches": 0, "max_lag_seconds": 0.0,
+        }
+
+        scraped = Queue(maxsize=self.queue_size)
+        normalized = Queue(maxsize=self.queue_size)
+        # Порции крупнее отдельных заведений, поэтому их очередь короче
+        embedded = Queue(maxsize=max(1, self.queue_size // self.batch_size))
+
+        stages = [
+            self._stage(self._normalize, scraped, normalized),
+            self._stage(self._embed, normalized, embedded),
+            self._stage(self._store, embedded),
+        ]
+
+        started = time.monotonic()
+        try:
+            for venue in venues:
+                # При заполненной очереди парсер ждет, пока стадии загрузки освободят место
+                if not self._put(scraped, (venue, time.monotonic())):
+                    break
+                self._count("scraped")
+        finally:
+            if not self._stop.is_set():
+                self._put(scraped, _DONE)
+            for stage in stages:
+                stage.join()
+            self.chroma_manager.persist()
+
+        self.stats["seconds"] = time.monotonic() - started
+        print(f"Загрузка завершена: {self.stats}")
+        if self._errors:
+            raise self._errors[0]
+        return self.stats
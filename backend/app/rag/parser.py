@@ -1,47 +1,124 @@
-from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.chrome.options import Options
 from selenium.webdriver.common.keys import Keys
-from selenium.common.exceptions import NoSuchElementException, MoveTargetOutOfBoundsException
+from selenium.common.exceptions import NoSuchElementException, WebDriverException, TimeoutException
 from selenium.webdriver import ActionChains
-# from selenium.webdriver.chrome.service import Service as ChromiumService
-from webdriver_manager.chrome import ChromeDriverManager
-from webdriver_manager.core.os_manager import ChromeType
-from bs4 import BeautifulSoup
 import json
 from time import sleep
 import time
 import re
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator
 from urllib.parse import urlparse, urlencode
+from concurrent.futures import ThreadPoolExecutor
+from queue import Queue, Empty, Full
+from threading import Lock, Event
+
+from app.config import settings
+from app.rag.browser_pool import BrowserPool
+from app.rag.crawl_state import CrawlStateStore
+from app.rag.extractor import parse_html, extract_org, extract_goods, extract_reviews_count, extract_coordinates
+from app.rag.snapshots import SnapshotStore
 
 class WebParser:
     """
     Парсер данных о заведениях с Яндекс.Карт.
 
     Использует Selenium для имитации действий пользователя (поиск, прокрутка,
-    открытие карточек) и BeautifulSoup для извлечения данных из HTML.
+    открытие карточек) и lxml (`app.rag.extractor`) для извлечения данных из HTML.
     Этот подход необходим, так как Яндекс.Карты активно используют JavaScript для
     динамической загрузки контента.
+
+    Парсинг выполняется в два этапа: один браузер собирает ссылки на карточки
+    организаций из результатов поиска, после чего карточки и страницы отзывов
+    обходятся либо последовательно, либо пулом из нескольких браузеров.
+
+    Вместо фиксированных пауз используются явные ожидания готовности страницы
+    (WebDriverWait); время ожидания по каждому шагу накапливается в `wait_stats`.
+
+    Браузеры берутся из долгоживущего пула (`BrowserPool`), который
+    запускается один раз на экземпляр парсера; по окончании работы
+    необходимо вызвать `close()`.
+
+    Если передано хранилище состояния (`CrawlStateStore`), парсинг
+    инкрементальный: свежие (недавно загруженные в хранилища) карточки
+    пропускаются, каждая обработанная
+    карточка сразу сохраняется, а прерванный запуск продолжается с
+    контрольной точки.
+
+    Сжатые снимки карточек и страниц отзывов сохраняются в `SnapshotStore`
+    (если включен SNAPSHOT_ENABLED), чтобы поля можно было извлечь заново
+    без повторного обхода.
     """
 
-    def __init__(self, headless: bool = True):
-
-        chrome_options = Options()
-        if headless:
-            chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--disable-blink-features=AutomationControlled")
-        chrome_options.add_experimental_option("excludeSwitches", ["enable-automation"])
-        chrome_options.add_experimental_option('useAutomationExtension', False)
-        
-        # Инициализация драйвера
-        # self.driver = webdriver.Chrome(ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install())
-        # self.driver = webdriver.Chrome(options=chrome_options)
-        # self.wait = WebDriverWait(self.driver, 10)
+    def __init__(self, headless: bool = True, workers: Optional[int] = None,
+                 min_page_interval: Optional[float] = None, state: Optional[CrawlStateStore] = None,
+                 snapshots: Optional[SnapshotStore] = None):
+        self.headless = headless
+        self.state = state
+        self.snapshots = snapshots
+        if self.snapshots is None and settings.SNAPSHOT_ENABLED:
+            self.snapshots = SnapshotStore()
+        self.workers = max(1, workers or settings.PARSER_WORKERS)
+        self.min_page_interval = (
+            settings.PARSER_MIN_PAGE_INTERVAL if min_page_interval is None else min_page_interval
+        )
+        self.wait_timeout = settings.PARSER_WAIT_TIMEOUT
+        self.scroll_timeout = settings.PARSER_SCROLL_TIMEOUT
+        self.reviews_target = settings.PARSER_REVIEWS_TARGET
+        self.reviews_time_budget = settings.PARSER_REVIEWS_TIME_BUDGET
+        self.wait_stats: Dict[str, Dict[str, float]] = {}
+        # Прогресс текущего запуска: найдено ссылок, к обходу, обработано, ошибок, из контрольной точки
+        self.progress: Dict[str, int] = {"found": 0, "pending": 0, "parsed": 0, "failed": 0, "resumed": 0}
+        self._stats_lock = Lock()
+        self.pool = BrowserPool(size=self.workers, headless=headless)
+
+    def wait(self, driver, step: str, condition, timeout: Optional[float] = None):
+        """
+        Ожидание готовности страницы с учетом времени по шагам.
+
+        Args:
+            driver: Экземпляр браузера
+            step: Название шага для статистики (например, "org_header")
+            condition: Условие ожидания (expected_conditions или callable от driver)
+            timeout: Таймаут в секундах (по умолчанию PARSER_WAIT_TIMEOUT)
+
+        Returns:
+            Результат условия или None, если истек таймаут
+        """
+        started = time.perf_counter()
+        timed_out = False
+        try:
+            return WebDriverWait(driver, timeout or self.wait_timeout, poll_frequency=0.1).until(condition)
+        except TimeoutException:
+            timed_out = True
+            return None
+        finally:
+            with self._stats_lock:
+                stats = self.wait_stats.setdefault(step, {"count": 0, "seconds": 0.0, "timeouts": 0})
+                stats["count"] += 1
+                stats["seconds"] += time.perf_counter() - started
+                stats["timeouts"] += int(timed_out)
+
+    @staticmethod
+    def elements_grew(by: str, value: str, previous: int):
+        """Условие ожидания: количество элементов стало больше `previous`."""
+        def condition(driver):
+            return len(driver.find_elements(by, value)) > previous
+        return condition
+
+    def save_snapshot(self, yandex_id: str, kind: str, page_html: str, url: str):
+        """Сохранение снимка страницы; ошибка записи не прерывает парсинг."""
+        if self.snapshots is None:
+            return
+        try:
+            self.snapshots.save(yandex_id, kind, page_html, url=url)
+        except OSError as e:
+            print(f"Не удалось сохранить снимок {yandex_id}/{kind}: {e}")
+
+    def close(self):
+        """Остановка браузеров пула."""
+        self.pool.close()
 
     def parse_ymaps(self, city: str = "Москва", category: str = "Ресторан", items: int = 5) -> List[Dict[str, Any]]:
         """
@@ -53,26 +130,98 @@ class WebParser:
             items: Количество заведений для парсинга.
 
         Returns:
-            List[Dict[str, Any]]: Список словарей с данными о заведениях.
+            List[Dict[str, Any]]: Список словарей с данными о заведениях
+            в порядке готовности (см. `iter_ymaps`).
+        """
+        return list(self.iter_ymaps(city=city, category=category, items=items))
+
+    def iter_ymaps(self, city: str = "Москва", category: str = "Ресторан", items: int = 5) -> Iterator[Dict[str, Any]]:
+        """
+        Потоковый парсинг заведений: каждая карточка отдается сразу после обработки.
+
+        При последовательном обходе карточки идут в порядке выдачи поиска,
+        при параллельном - в порядке готовности. Очередь готовых карточек
+        ограничена, поэтому медленный потребитель притормаживает браузеры.
+
+        Args:
+            city: Город для поиска
+            category: Категория заведений
+            items: Количество заведений для парсинга
+
+        Yields:
+            Dict[str, Any]: Данные о заведении
 
         Note:
-            Для стабильности работы добавлены паузы (`sleep`). В продакшн-среде
-            рекомендуется заменить на явные ожидания (WebDriverWait).
+            Время ожидания готовности страниц по шагам после завершения
+            доступно в `wait_stats`. При инкрементальном парсинге не отдаются
+            свежие карточки из прошлых запусков, но отдаются карточки,
+            обработанные до прерывания продолжаемого запуска. Если потребитель
+            прекращает чтение досрочно, запуск остается незавершенным и будет
+            продолжен в следующий раз.
         """
         print(city, category)
+        self.progress = {"found": 0, "pending": 0, "parsed": 0, "failed": 0, "resumed": 0}
+
+        run_id, checkpoint = None, None
+        organization_urls = []
+        if self.state is not None:
+            run_id, checkpoint = self.state.start_run(city, category, items)
+            organization_urls = checkpoint["organization_urls"]
+            if checkpoint["resumed"]:
+                print(f"Продолжение прерванного запуска #{run_id}: "
+                      f"обработано {len(checkpoint['processed_ids'])} из {len(organization_urls)}")
+                for venue in self.state.payloads(checkpoint["processed_ids"]):
+                    self.progress["resumed"] += 1
+                    yield venue
+
+        if not organization_urls:
+            with self.pool.session() as driver:
+                organization_urls = self.collect_org_urls(driver, city, category, items)
+            if self.state is not None:
+                self.state.save_cursor(run_id, organization_urls)
+        self.progress["found"] = len(organization_urls)
+
+        if self.state is not None:
+            organization_urls = self.state.pending_urls(checkpoint, organization_urls)
+        self.progress["pending"] = len(organization_urls)
+
+        try:
+            if self.workers == 1:
+                # Последовательный обход одним браузером
+                limiter = RateLimiter(self.min_page_interval)
+                for url in organization_urls:
+                    venue = self._parse_org_safe(url, limiter, run_id)
+                    if venue is not None:
+                        yield venue
+            else:
+                yield from self._iter_parallel(organization_urls, run_id)
+
+            if self.state is not None:
+                self.state.finish_run(run_id)
+        finally:
+            print(f"Время ожидания по шагам: {self.wait_stats}")
+            print(f"Загрузка страниц: {self.pool.summary()}")
+
+    def collect_org_urls(self, driver, city: str, category: str, items: int) -> List[str]:
+        """
+        Сбор ссылок на карточки организаций из результатов поиска.
+
+        Args:
+            driver: Экземпляр браузера
+            city: Город для поиска
+            category: Категория заведений
+            items: Необходимое количество ссылок
 
-        # Настройка и запуск экземпляра браузера для данной сессии парсинга
-        chrome_options = Options()
-        chrome_options.add_argument('--no-sandbox')
-        chrome_options.add_argument('--headless')
-        chrome_options.add_argument('--disable-dev-shm-usage')
-        # driver = webdriver.Chrome(service=ChromiumService(ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install()), options=chrome_options)
-        driver = webdriver.Chrome(ChromeDriverManager(chrome_type=ChromeType.CHROMIUM).install(), options=chrome_options)
+        Returns:
+            List[str]: Уникальные ссылки на карточки в порядке выдачи
+        """
         driver.get('https://yandex.ru/maps')
-        sleep(2)
 
         # Ввод поискового запроса
-        form = driver.find_element(By.CLASS_NAME, "search-form-view__input")
+        form = self.wait(driver, "search_form", EC.presence_of_element_located((By.CLASS_NAME, "search-form-view__input")))
+        self.pool.record_page(driver)
+        if form is None:
+            raise TimeoutException("Не дождались формы поиска")
         searchbar = form.find_element(By.TAG_NAME, "input")
         if searchbar:
             if searchbar.get_attribute("type") == "text":
@@ -80,116 +229,241 @@ class WebParser:
 
         # Нажатие на кнопку поиска
         driver.find_element_by_class_name(name='small-search-form-view__button').click()
-        sleep(2)
+        self.wait(driver, "search_results", EC.presence_of_element_located((By.CLASS_NAME, "link-overlay")))
 
         # Элемент для прокрутки списка результатов
-        slider = driver.find_element_by_class_name(name='scroll__scrollbar-thumb')
+        slider = self.wait(driver, "search_scrollbar", EC.presence_of_element_located((By.CLASS_NAME, "scroll__scrollbar-thumb")))
+        if slider is None:
+            raise TimeoutException("Не дождались списка результатов поиска")
 
-        # Основная вкладка со списком всех организаций
-        parent_handle = driver.window_handles[0]
+        print(driver.current_url)
 
-        id = 0
-        organizations_href = ""
+        organization_urls = []
+        stalled = 0
+        while len(organization_urls) < items and stalled < 3:
+            links = driver.find_elements_by_class_name(name='link-overlay')
+            for link in links:
+                url = link.get_attribute("href")
+                if url and url not in organization_urls:
+                    organization_urls.append(url)
+            if len(organization_urls) >= items:
+                break
 
-        venues = []
+            # Прокрутка списка результатов и ожидание подгрузки новых элементов
+            ActionChains(driver).click_and_hold(slider).move_by_offset(0, 100).release().perform()
+            grew = self.wait(
+                driver, "search_scroll",
+                self.elements_grew(By.CLASS_NAME, "link-overlay", len(links)),
+                timeout=self.scroll_timeout
+            )
+            stalled = 0 if grew else stalled + 1
 
-        print(driver.current_url)
+        return organization_urls[:items]
 
-        for i in range(items):
-            # Прокрутка списка результатов для подгрузки новых элементов
-            ActionChains(driver).click_and_hold(slider).move_by_offset(0, 100).release().perform()
+    def parse_org(self, driver, organization_url: str) -> Dict[str, Any]:
+        """
+        Парсинг карточки организации и страницы ее отзывов.
 
-            # Обновление списка ссылок на организации каждые 5 итераций
-            if (id == 0) or (id % 5 == 0):
-                organizations_href = driver.find_elements_by_class_name(name='link-overlay')
-            organization_url = organizations_href[i].get_attribute("href")
-            print(organization_url)
-
-            # Открытие карточки организации в новой вкладке
-            driver.execute_script(f'window.open("{organization_url}","org_tab");')
-            child_handle = [x for x in driver.window_handles if x != parent_handle][0]
-            driver.switch_to.window(child_handle)
-            sleep(1)
-
-            # Парсинг HTML основной карточки организации
-            soup = BeautifulSoup(driver.page_source, "lxml")
-
-            venue = {
-                "source": "ymaps",
-                "parsed_at": time.strftime("%Y-%m-%d %H:%M:%S")
-            }
-            
-            ypage = driver.current_url
-            print("YPAGE", ypage)
-            current_url_split = ypage.split('/')
-
-            id += 1
-
-            # Извлечение Yandex ID из URL
-            venue["yandex_id"] = current_url_split[6]
-
-            # Извлечение различных атрибутов заведения с помощью класса InfoGetter
-            venue["name"] = InfoGetter.get_name(soup)
-            venue["category"] = InfoGetter.get_catergory(soup)
-            venue["address"] = InfoGetter.get_address(soup)
-            # venue["website"] = InfoGetter.get_website(soup)
-            venue["opening_hours"] = InfoGetter.get_opening_hours(soup)
-            venue["ypage"] = driver.current_url
-            venue["rating"] = InfoGetter.get_rating(soup)
-            # print(venues)
-
-            # Попытка извлечь товары и услуги (меню)
-            goods = ""
-            try:
-                menu = driver.find_element_by_class_name(name='card-feature-view__main-content')
-                menu_text = driver.find_element_by_class_name(name='card-feature-view__main-content').text
-
-                if ('товары и услуги' in menu_text.lower()) or ('меню' in menu_text.lower()):
-                    # Клик для раскрытия раздела с товарами/услугами
-                    menu.click()
-                    sleep(2)
-                    soup = BeautifulSoup(driver.page_source, "lxml")
-                    goods = InfoGetter.get_goods(soup)
-            except NoSuchElementException:
-                # Раздел с товарами/услугами отсутствует
-                pass
+        Args:
+            driver: Экземпляр браузера
+            organization_url: Ссылка на карточку организации
 
-            #  Переход на вкладку "Отзывы"
-            reviews_url = 'https://yandex.ru/maps/org/' + current_url_split[5] + '/' + current_url_split[6] + \
-                            '/reviews'
-            driver.get(reviews_url)
-            sleep(2)
-
-            venue["reviews"] = InfoGetter.get_reviews(soup, driver)
-            # print(venue)
-            venues.append(venue)
-
-            """
-            # Пример кода для сохранения данных в JSON файл
-            print(id, name, address, website, opening_hours, ypage, goods, rating,
-                                            reviews)
-            
-            import os
-            print(os.getcwd())
-            print(JSONWorker.into_json(id, name, address, website, opening_hours, ypage, goods, rating,
-                                            reviews))
-            # Записываем данные в OUTPUT.json
-            output = JSONWorker.into_json(id, name, address, website, opening_hours, ypage, goods, rating,
-                                            reviews)
-            JSONWorker("set", output, id+".json")
-            print(f'Данные добавлены, id - {id}')
-            """
-
-            # Закрытие вкладки с карточкой организации и возврат к списку результатов
-            driver.close()
-            driver.switch_to.window(parent_handle)
-            sleep(1)
-
-
-        # print('Данные сохранены в OUTPUT.json')
-        driver.quit()
-        print(venues)
-        return venues
+        Returns:
+            Dict[str, Any]: Данные о заведении
+        """
+        print(organization_url)
+        driver.get(organization_url)
+        self.wait(driver, "org_header", EC.presence_of_element_located((By.CLASS_NAME, "orgpage-header-view__header")))
+        self.pool.record_page(driver)
+
+        # Однократный разбор HTML основной карточки организации
+        page_source = driver.page_source
+        tree = parse_html(page_source)
+
+        venue = {
+            "source": "ymaps",
+            "parsed_at": time.strftime("%Y-%m-%d %H:%M:%S")
+        }
+
+        ypage = driver.current_url
+        print("YPAGE", ypage)
+        current_url_split = ypage.split('/')
+
+        # Извлечение Yandex ID из URL
+        venue["yandex_id"] = current_url_split[6]
+        self.save_snapshot(venue["yandex_id"], "org", page_source, ypage)
+
+        # Извлечение атрибутов заведения за один проход по дереву
+        # (результат совпадает с методами InfoGetter)
+        fields = extract_org(tree)
+        venue["name"] = fields["name"]
+        venue["category"] = fields["category"]
+        venue["address"] = fields["address"]
+        # venue["website"] = fields["website"]
+        venue["opening_hours"] = fields["opening_hours"]
+        venue["ypage"] = driver.current_url
+        venue["rating"] = fields["rating"]
+        coordinates = extract_coordinates(tree, ypage)
+        venue["coordinates"] = {"lat": coordinates[0], "lon": coordinates[1]} if coordinates else None
+
+        # Попытка извлечь товары и услуги (меню)
+        goods = ""
+        try:
+            menu = driver.find_element_by_class_name(name='card-feature-view__main-content')
+            menu_text = menu.text
+
+            if ('товары и услуги' in menu_text.lower()) or ('меню' in menu_text.lower()):
+                # Клик для раскрытия раздела с товарами/услугами
+                menu.click()
+                self.wait(driver, "menu_panel", EC.presence_of_element_located((
+                    By.CSS_SELECTOR, ".related-item-photo-view__title, .related-item-list-view__title"
+                )))
+                page_source = driver.page_source
+                self.save_snapshot(venue["yandex_id"], "menu", page_source, ypage)
+                tree = parse_html(page_source)
+                goods = extract_goods(tree)
+        except NoSuchElementException:
+            # Раздел с товарами/услугами отсутствует
+            pass
+        venue["goods"] = goods
+
+        #  Переход на вкладку "Отзывы"
+        reviews_url = 'https://yandex.ru/maps/org/' + current_url_split[5] + '/' + current_url_split[6] + \
+                        '/reviews'
+        driver.get(reviews_url)
+        self.wait(driver, "reviews_page", EC.presence_of_element_located((By.CLASS_NAME, "business-review-view")))
+        self.pool.record_page(driver)
+
+        venue["reviews"] = InfoGetter.get_reviews(
+            tree, driver,
+            wait=self.wait,
+            scroll_timeout=self.scroll_timeout,
+            target=self.reviews_target,
+            time_budget=self.reviews_time_budget
+        )
+        self.save_snapshot(venue["yandex_id"], "reviews", driver.page_source, reviews_url)
+        return venue
+
+    def _parse_org_safe(self, organization_url: str, limiter: "RateLimiter",
+                        run_id: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Парсинг карточки браузером из пула с ограничением частоты.
+        Любая ошибка одной карточки (браузер, разбор HTML, отсутствующее поле)
+        записывается в лог и не прерывает обход; упавший браузер пул перезапустит.
+        Успешно обработанная карточка сразу сохраняется в состоянии парсинга.
+        """
+        limiter.wait()
+        try:
+            with self.pool.session() as driver:
+                venue = self.parse_org(driver, organization_url)
+        except Exception as e:
+            print(f"Ошибка парсинга {organization_url}: {type(e).__name__}: {e}")
+            with self._stats_lock:
+                self.progress["failed"] += 1
+            return None
+
+        if self.state is not None:
+            self.state.record(run_id, venue)
+        with self._stats_lock:
+            self.progress["parsed"] += 1
+        return venue
+
+    def _iter_parallel(self, organization_urls: List[str], run_id: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Обход карточек пулом браузеров.
+
+        Каждый воркер берет браузер из пула, забирает ссылки из общей
+        очереди и соблюдает собственный интервал между загрузками страниц.
+        Готовые карточки передаются через ограниченную очередь и отдаются
+        в порядке готовности; при досрочном закрытии генератора воркеры
+        останавливаются после текущей карточки.
+        """
+        tasks = Queue()
+        for url in organization_urls:
+            tasks.put(url)
+
+        workers = min(self.workers, len(organization_urls)) or 1
+        results = Queue(maxsize=workers * 2)
+        stop = Event()
+        done = object()
+
+        def worker():
+            limiter = RateLimiter(self.min_page_interval)
+            try:
+                while not stop.is_set():
+                    try:
+                        url = tasks.get_nowait()
+                    except Empty:
+                        return
+                    venue = self._parse_org_safe(url, limiter, run_id)
+                    if venue is not None:
+                        while not stop.is_set():
+                            try:
+                                results.put(venue, timeout=1)
+                                break
+                            except Full:
+                                continue
+            finally:
+                results.put(done)
+
+        executor = ThreadPoolExecutor(max_workers=workers)
+        futures = [executor.submit(worker) for _ in range(workers)]
+        try:
+            finished = 0
+            while finished < workers:
+                item = results.get()
+                if item is done:
+                    finished += 1
+                else:
+                    yield item
+            for future in futures:
+                future.result()
+        finally:
+            stop.set()
+            # Освобождение очереди, чтобы воркеры могли записать маркер завершения
+            while not all(future.done() for future in futures):
+                try:
+                    results.get(timeout=0.1)
+                except Empty:
+                    pass
+            executor.shutdown(wait=True)
+
+
+class RateLimiter:
+    """Минимальный интервал между загрузками страниц в рамках одного браузера."""
+
+    def __init__(self, min_interval: float):
+        self.min_interval = min_interval
+        self._last = 0.0
+
+    def wait(self):
+        delay = self._last + self.min_interval - time.monotonic()
+        if delay > 0:
+            sleep(delay)
+        self._last = time.monotonic()
+
+# Чтение отзывов, появившихся после индекса `arguments[0]`; у новых отзывов
+# раскрывается полный текст. textContent соответствует getText() в BeautifulSoup.
+REVIEWS_HARVEST_SCRIPT = """
+const nodes = document.querySelectorAll('.business-review-view');
+const items = [];
+for (let i = arguments[0]; i < nodes.length; i++) {
+    const node = nodes[i];
+    const expand = node.querySelector('.business-review-view__expand');
+    if (expand) { try { expand.click(); } catch (e) {} }
+    const author = node.querySelector('.business-review-view__author');
+    items.push({
+        author: author ? author.textContent : '',
+        texts: Array.from(node.querySelectorAll('.spoiler-view__text-container'), el => el.textContent)
+    });
+}
+return {total: nodes.length, items: items};
+"""
+
+REVIEWS_SCROLL_SCRIPT = """
+const nodes = document.querySelectorAll('.business-review-view');
+if (nodes.length) { nodes[nodes.length - 1].scrollIntoView({block: 'end'}); }
+"""
 
 class InfoGetter(object):
 
@@ -309,57 +583,67 @@ class InfoGetter(object):
             return ""
 
     @staticmethod
-    def get_reviews(soup_content, driver):
+    def get_reviews(soup_content, driver, wait=None, scroll_timeout: float = 3.0,
+                    target: Optional[int] = None, time_budget: Optional[float] = None):
         """
-        Извлекает текст отзывов об организации.
-        Выполняет прокрутку страницы отзывов для подгрузки и раскрытия полного текста.
+        Адаптивный сбор текстов отзывов об организации.
+
+        Отзывы читаются из DOM порциями по мере роста списка: на каждом шаге
+        обрабатываются только новые элементы (раскрывается полный текст,
+        повторы отбрасываются по автору и тексту), после чего к последнему
+        отзыву выполняется прокрутка для подгрузки следующих. Сбор
+        прекращается, как только набрано `target` отзывов (но не больше, чем
+        указано в счетчике), исчерпан бюджет времени `time_budget` или список
+        перестал расти.
+
+        `soup_content` - разобранная карточка организации (дерево lxml или HTML);
+        `wait` - функция ожидания `WebParser.wait` для учета времени по шагам.
         """
+        target = target or settings.PARSER_REVIEWS_TARGET
+        time_budget = settings.PARSER_REVIEWS_TIME_BUDGET if time_budget is None else time_budget
+        deadline = time.monotonic() + time_budget
 
-        reviews = []
-        slider = driver.find_element_by_class_name(name='scroll__scrollbar-thumb')
+        # Счетчик на вкладке ограничивает цель: больше отзывов, чем есть, не подгрузится
+        reviews_count = extract_reviews_count(soup_content)
+        if reviews_count:
+            target = min(target, reviews_count)
 
-        # Определение количества отзывов
-        try:
-            reviews_count = int(soup_content.find_all("div", {"class": "tabs-select-view__counter"})[-1].text)
-
-        except ValueError:
-            reviews_count = 0
-
-        except AttributeError:
-            reviews_count = 0
-
-        except Exception:
-            return ""
-
-        # Определение необходимого количества итераций прокрутки
-        if reviews_count > 150:
-            find_range = range(5)
-        else:
-            find_range = range(3)
-
-        # Прокрутка и раскрытие текста отзывов
-        for i in find_range:
-            try:
-                driver.find_elements_by_class_name(name='business-review-view__expand')[0].click()
-                ActionChains(driver).click_and_hold(slider).move_by_offset(0, 25).release().perform()
-                
-
-            except MoveTargetOutOfBoundsException:
-                ActionChains(driver).click_and_hold(slider).move_by_offset(0, 25).release().perform()
-                continue
-
-            except Exception:
-                break
-
-        # Парсинг раскрытого текста отзывов
+        reviews = []
+        seen = set()
+        processed = 0
         try:
-            soup_content = BeautifulSoup(driver.page_source, "lxml") #business-review-view__body #spoiler-view__text-container
-            for data in soup_content.find_all("span", {"class": "spoiler-view__text-container"}):
-                reviews.append(data.getText())
-
-            return reviews
-        except Exception:
-            return ""
+            while True:
+                batch = driver.execute_script(REVIEWS_HARVEST_SCRIPT, processed)
+                processed = batch["total"]
+                for item in batch["items"]:
+                    for text in item["texts"]:
+                        key = (item["author"], text)
+                        if key not in seen:
+                            seen.add(key)
+                            reviews.append(text)
+
+                remaining = deadline - time.monotonic()
+                if len(reviews) >= target or remaining <= 0 or processed == 0:
+                    break
+
+                # Прокрутка к последнему отзыву и ожидание подгрузки новых;
+                # если список не растет, сбор прекращается
+                driver.execute_script(REVIEWS_SCROLL_SCRIPT)
+                condition = WebParser.elements_grew(By.CLASS_NAME, "business-review-view", processed)
+                timeout = min(scroll_timeout, remaining)
+                if wait is not None:
+                    grew = wait(driver, "reviews_scroll", condition, timeout=timeout)
+                else:
+                    try:
+                        grew = WebDriverWait(driver, timeout, poll_frequency=0.1).until(condition)
+                    except TimeoutException:
+                        grew = False
+                if not grew:
+                    break
+        except WebDriverException as e:
+            print(f"Сбор отзывов прерван: {e}")
+
+        return reviews[:target]
 
 class JSONWorker(object):
 
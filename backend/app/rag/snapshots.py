@@ -0,0 +1,177 @@
+import gzip
+import json
+import os
+from datetime import datetime
+from threading import Lock
+from typing import Dict, Any, Iterator, Optional
+
+from app.config import settings
+from app.rag.extractor import parse_html, extract_org, extract_reviews, extract_coordinates
+
+try:
+    import zstandard
+except ImportError:  # zstd необязателен, по умолчанию используется gzip
+    zstandard = None
+
+SNAPSHOT_KINDS = ("org", "menu", "reviews")
+EXTENSIONS = {"gzip": ".html.gz", "zstd": ".html.zst"}
+
+
+class SnapshotStore:
+    """
+    Хранилище сжатых HTML-снимков страниц заведений.
+
+    Снимки хранятся в файловой системе по ключу `yandex_id` и времени загрузки:
+        {SNAPSHOT_DIR}/{yandex_id}/{YYYYmmddTHHMMSS}_{kind}.html.gz
+    где kind - "org" (карточка), "menu" (карточка с раскрытым меню) или
+    "reviews" (страница отзывов после прокрутки). Рядом ведется index.jsonl
+    со ссылкой на страницу и временем загрузки каждого снимка.
+
+    Снимки позволяют заново извлечь поля после изменения разметки или
+    добавления нового поля без повторного обхода Яндекс.Карт
+    (см. `reextract_snapshots.py`).
+    """
+
+    def __init__(self, root: Optional[str] = None, compression: Optional[str] = None):
+        self.root = root or settings.SNAPSHOT_DIR
+        self.compression = compression or settings.SNAPSHOT_COMPRESSION
+        if self.compression == "zstd" and zstandard is None:
+            print("Пакет zstandard не установлен, снимки сжимаются gzip")
+            self.compression = "gzip"
+        if self.compression not in EXTENSIONS:
+            raise ValueError(f"Неизвестный формат сжатия: {self.compression}")
+        self._lock = Lock()
+
+    def _compress(self, data: bytes) -> bytes:
+        if self.compression == "zstd":
+            return zstandard.ZstdCompressor(level=settings.SNAPSHOT_COMPRESSION_LEVEL).compress(data)
+        return gzip.compress(data, compresslevel=settings.SNAPSHOT_COMPRESSION_LEVEL)
+
+    @staticmethod
+    def _decompress(path: str, data: bytes) -> bytes:
+        if path.endswith(EXTENSIONS["zstd"]):
+            if zstandard is None:
+                raise RuntimeError(f"Для чтения {path} требуется пакет zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return gzip.decompress(data)
+
+    def save(self, yandex_id: str, kind: str, page_html: str, url: Optional[str] = None,
+             fetched_at: Optional[datetime] = None) -> str:
+        """
+        Сохранение снимка страницы.
+
+        Args:
+            yandex_id: Yandex ID заведения
+            kind: Тип страницы ("org", "menu", "reviews")
+            page_html: HTML страницы
+            url: Адрес страницы
+            fetched_at: Время загрузки (по умолчанию текущее)
+
+        Returns:
+            str: Путь к файлу снимка
+        """
+        if kind not in SNAPSHOT_KINDS:
+            raise ValueError(f"Неизвестный тип снимка: {kind}")
+
+        fetched_at = fetched_at or datetime.now()
+        directory = os.path.join(self.root, str(yandex_id))
+        filename = f"{fetched_at.strftime('%Y%m%dT%H%M%S')}_{kind}{EXTENSIONS[self.compression]}"
+        path = os.path.join(directory, filename)
+        data = self._compress(page_html.encode("utf-8"))
+
+        os.makedirs(directory, exist_ok=True)
+        # Запись через временный файл, чтобы прерванный парсинг не оставлял битых снимков
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        entry = {
+            "kind": kind,
+            "file": filename,
+            "url": url,
+            "fetched_at": fetched_at.strftime("%Y-%m-%d %H:%M:%S"),
+            "bytes": len(data),
+        }
+        with self._lock, open(os.path.join(directory, "index.jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        return path
+
+    def load(self, path: str) -> str:
+        """Чтение HTML снимка."""
+        with open(path, "rb") as f:
+            return self._decompress(path, f.read()).decode("utf-8")
+
+    def entries(self, yandex_id: str) -> Iterator[Dict[str, Any]]:
+        """Записи индекса снимков заведения в порядке сохранения."""
+        index_path = os.path.join(self.root, str(yandex_id), "index.jsonl")
+        if not os.path.exists(index_path):
+            return
+        with open(index_path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    entry = json.loads(line)
+                    entry["path"] = os.path.join(self.root, str(yandex_id), entry["file"])
+                    yield entry
+
+    def latest(self, yandex_id: str) -> Dict[str, Dict[str, Any]]:
+        """
+        Последний снимок каждого типа для заведения.
+
+        Снимки меню и отзывов берутся только из того же обхода, что и карточка
+        (не раньше последнего снимка "org"), чтобы не смешивать разные версии страницы.
+        """
+        latest = {}
+        for entry in self.entries(yandex_id):
+            if entry["kind"] == "org":
+                latest = {}
+            if os.path.exists(entry["path"]):
+                latest[entry["kind"]] = entry
+        return latest if "org" in latest else {}
+
+    def yandex_ids(self) -> Iterator[str]:
+        """Все заведения, для которых есть снимки."""
+        if not os.path.isdir(self.root):
+            return
+        for name in sorted(os.listdir(self.root)):
+            if os.path.isdir(os.path.join(self.root, name)):
+                yield name
+
+
+def venue_from_snapshots(store: SnapshotStore, yandex_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Повторное извлечение данных о заведении из последних снимков без браузера.
+
+    Формирует словарь того же формата, что и `WebParser.parse_org`;
+    время парсинга - время загрузки снимка карточки.
+
+    Returns:
+        Optional[Dict[str, Any]]: Данные о заведении или None, если снимка карточки нет
+    """
+    snapshots = store.latest(yandex_id)
+    if not snapshots:
+        return None
+
+    org = snapshots["org"]
+    tree = parse_html(store.load(org["path"]))
+    fields = extract_org(tree)
+    coordinates = extract_coordinates(tree, org.get("url"))
+    venue = {
+        "source": "ymaps",
+        "parsed_at": org["fetched_at"],
+        "yandex_id": yandex_id,
+        "name": fields["name"],
+        "category": fields["category"],
+        "address": fields["address"],
+        "opening_hours": fields["opening_hours"],
+        "ypage": org.get("url") or f"https://yandex.ru/maps/org/{yandex_id}/",
+        "rating": fields["rating"],
+        "coordinates": {"lat": coordinates[0], "lon": coordinates[1]} if coordinates else None,
+        "goods": "",
+        "reviews": [],
+    }
+    if "menu" in snapshots:
+        venue["goods"] = extract_org(parse_html(store.load(snapshots["menu"]["path"])))["goods"]
+    if "reviews" in snapshots:
+        venue["reviews"] = extract_reviews(store.load(snapshots["reviews"]["path"]))
+    return venue
@@ -0,0 +1,735 @@
+# backend/app/rag/vector_index.py
+import json
+import os
+import shutil
+import sqlite3
+import tempfile
+from contextlib import contextmanager
+from threading import RLock
+from typing import List, Dict, Any, Optional, Sequence, Iterator
+
+import numpy as np
+
+# Метрики HNSW-индекса ChromaDB (`hnsw:space`)
+SPACES = ("cosine", "ip", "l2")
+
+# Не больше параметров в одном запросе к rows.db: SQLite до 3.32
+# ограничивает запрос 999 параметрами (SQLITE_MAX_VARIABLE_NUMBER)
+SQL_VARIABLE_LIMIT = 500
+
+_COMPARISONS = {
+    "$eq": lambda value, target: value == target,
+    "$ne": lambda value, target: value != target,
+    "$gt": lambda value, target: value > target,
+    "$gte": lambda value, target: value >= target,
+    "$lt": lambda value, target: value < target,
+    "$lte": lambda value, target: value <= target,
+    "$in": lambda value, target: value in target,
+    "$nin": lambda value, target: value not in target,
+}
+
+
+class UnsupportedFilterError(ValueError):
+    """Фильтр `where`, который реплика не умеет вычислять (поиск нужно выполнить в ChromaDB)."""
+
+
+def distance_to_score(distance: float, space: str) -> float:
+    """
+    Преобразование расстояния ChromaDB в оценку схожести с учетом метрики.
+    
+    Для "cosine" и "ip" ChromaDB возвращает 1 - сходство, поэтому оценка
+    восстанавливается напрямую; для "l2" используется 1 / (1 + d).
+    """
+    if space in ("cosine", "ip"):
+        return 1.0 - distance
+    return 1.0 / (1.0 + distance)
+
+
+def validate_where(where: Optional[Dict]):
+    """Проверка, что фильтр состоит только из поддерживаемых репликой операторов."""
+    for key, condition in (where or {}).items():
+        if key in ("$and", "$or"):
+            if not isinstance(condition, list):
+                raise UnsupportedFilterError(f"{key} ожидает список условий")
+            for item in condition:
+                validate_where(item)
+        elif key.startswith("$"):
+            raise UnsupportedFilterError(f"Оператор {key} не поддерживается репликой")
+        elif isinstance(condition, dict):
+            unknown = set(condition) - set(_COMPARISONS)
+            if unknown:
+                raise UnsupportedFilterError(f"Операторы {', '.join(sorted(unknown))} не поддерживаются репликой")
+
+
+def matches_where(metadata: Dict[str, Any], where: Optional[Dict]) -> bool:
+    """
+    Вычисление фильтра `where` ChromaDB по метаданным записи: равенство,
+    $eq/$ne/$gt/$gte/$lt/$lte/$in/$nin и вложенные $and/$or.
+    Как и в ChromaDB, условие по отсутствующему ключу не выполняется,
+    а сравнение значений разных типов - ложно.
+    """
+    for key, condition in (where or {}).items():
+        if key == "$and":
+            if not all(matches_where(metadata, item) for item in condition):
+                return False
+            continue
+        if key == "$or":
+            if not any(matches_where(metadata, item) for item in condition):
+                return False
+            continue
+        if key not in metadata:
+            return False
+        operators = condition if isinstance(condition, dict) else {"$eq": condition}
+        for operator, target in operators.items():
+            try:
+                if not _COMPARISONS[operator](metadata[key], target):
+                    return False
+            except TypeError:
+                return False
+    return True
+
+
+def _chunks(items: Sequence, size: int = SQL_VARIABLE_LIMIT):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+class MemmapVectorIndex:
+    """
+    Локальная реплика векторного индекса заведений для read-пути.
+
+    Эмбеддинги хранятся в memory-mapped матрице NumPy (float32), а
+    идентификаторы, документы и метаданные — в небольшой SQLite-базе рядом
+    с матрицей. Поиск выполняется векторизованным скалярным произведением по
+    всей матрице без обращения к клиенту ChromaDB, поэтому несколько
+    воркеров могут читать индекс одновременно без конкуренции за
+    `CHROMA_PERSIST_DIR`.
+
+    Ранжирование и расстояния совпадают с метрикой коллекции (`space`):
+    для cosine строки хранятся нормализованными, для ip - как есть, для l2
+    рядом хранятся квадраты норм строк, и расстояние ||x - q||^2
+    восстанавливается из скалярного произведения. Фильтры `where`
+    вычисляются по метаданным (`matches_where`); фильтр с другими
+    операторами вызывает UnsupportedFilterError.
+
+    Реплика обновляется инкрементально: `upsert` перезаписывает строки
+    существующих id или занимает свободные, `delete` освобождает строки.
+    После каждой записи увеличивается версия, по которой читатели в других
+    процессах понимают, что нужно перечитать карту строк.
+
+    Рядом с float32-матрицей хранится int8-копия векторов (скалярное
+    квантование с масштабом на строку). В режиме `quantization="int8"`
+    полный просмотр выполняется по int8-матрице, которая в 4 раза меньше,
+    а float32-строки читаются с диска только для точного пересчета оценок
+    `k * rescore_factor` лучших кандидатов.
+
+    В реплику пишут несколько процессов (API при запуске, исполнители задач
+    парсинга), поэтому каждая запись - выбор строк, запись в матрицы и commit -
+    выполняется под межпроцессной блокировкой (`BEGIN IMMEDIATE` в
+    lock.db). Файлы реплики лежат в каталоге данных, на который указывает
+    файл CURRENT: полная пересборка (`rebuilding`) заполняет новый каталог
+    и атомарно переключает CURRENT, поэтому читатели не видят наполовину
+    заполненную реплику. Без CURRENT каталогом данных служит сам `index_dir`
+    (реплики, созданные раньше).
+
+    Утилиты и бенчмарки открывают реплику с `read_only=True`: метрика
+    берется из самой реплики, реплика не очищается и не дополняется, а
+    попытка записи вызывает RuntimeError.
+    """
+
+    VECTORS_FILE = "vectors.f32"
+    CODES_FILE = "vectors.i8"
+    SCALES_FILE = "scales.f32"
+    NORMS_FILE = "norms.f32"
+    ROWS_FILE = "rows.db"
+    LOCK_FILE = "lock.db"
+    CURRENT_FILE = "CURRENT"
+    DATA_DIR_PREFIX = "data-"
+    DATA_FILES = (VECTORS_FILE, CODES_FILE, SCALES_FILE, NORMS_FILE, ROWS_FILE)
+    INITIAL_CAPACITY = 1024
+    SCAN_CHUNK = 8192
+    # Ожидание блокировки записи (секунды): полная пересборка держит ее до конца выгрузки
+    LOCK_TIMEOUT = 600
+
+    def __init__(self, index_dir: str, quantization: str = "none", rescore_factor: int = 4,
+                 space: str = "cosine", read_only: bool = False):
+        if quantization not in ("none", "int8"):
+            raise ValueError(f"Неизвестный режим квантования: {quantization}")
+        if space not in SPACES:
+            raise ValueError(f"Неизвестная метрика: {space}")
+
+        self.index_dir = index_dir
+        self.quantization = quantization
+        self.rescore_factor = max(1, rescore_factor)
+        self.space = space
+        self.read_only = read_only
+        if read_only:
+            if not os.path.exists(os.path.join(index_dir, self.ROWS_FILE)) \
+                    and not os.path.exists(os.path.join(index_dir, self.CURRENT_FILE)):
+                raise FileNotFoundError(f"Реплика индекса не найдена: {index_dir}")
+        else:
+            os.makedirs(index_dir, exist_ok=True)
+        self._lock_path = os.path.join(index_dir, self.LOCK_FILE)
+        self._current_path = os.path.join(index_dir, self.CURRENT_FILE)
+        self._lock = RLock()
+        self._lock_conn = None
+        self._lock_depth = 0
+
+        self._data_dir = None
+        self._conn = None
+        self._version = None
+        self._vectors = None
+        self._codes = None
+        self._scales = None
+        self._norms = None
+        self._alive = np.zeros(0, dtype=bool)
+        self._open_data_dir(self._current_data_dir())
+
+        if read_only:
+            self.space = self._get_meta("space", "cosine")
+            self._reload()
+            return
+
+        with self._locked():
+            # Векторы хранятся в виде, зависящем от метрики, поэтому реплика другой
+            # метрики очищается (и выгружается заново из коллекции). Реплики,
+            # созданные до появления настройки, построены для cosine.
+            if self._get_meta("space", "cosine") != space and self.capacity:
+                self.clear()
+            self._set_meta("space", space)
+            self._conn.commit()
+
+            # Реплики, созданные до появления квантования и норм, дополняются ими
+            if self.capacity and not os.path.exists(self._codes_path):
+                self._build_codes()
+            if self.capacity and not os.path.exists(self._norms_path):
+                self._build_norms()
+        self._reload()
+
+    # ------------------------------------------------------------------
+    # Служебные методы
+    # ------------------------------------------------------------------
+
+    def _current_data_dir(self) -> str:
+        """Каталог данных из файла CURRENT (без него - сам `index_dir`)."""
+        try:
+            with open(self._current_path, encoding="utf-8") as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return self.index_dir
+        return os.path.join(self.index_dir, name) if name else self.index_dir
+
+    def _open_data_dir(self, data_dir: str):
+        """Переключение на каталог данных: пути файлов и соединение с rows.db."""
+        self._data_dir = data_dir
+        self._vectors_path = os.path.join(data_dir, self.VECTORS_FILE)
+        self._codes_path = os.path.join(data_dir, self.CODES_FILE)
+        self._scales_path = os.path.join(data_dir, self.SCALES_FILE)
+        self._norms_path = os.path.join(data_dir, self.NORMS_FILE)
+        # Прежнее соединение не закрывается явно: его может использовать поиск в другом потоке
+        rows_path = os.path.join(data_dir, self.ROWS_FILE)
+        if self.read_only:
+            self._conn = sqlite3.connect(f"file:{rows_path}?mode=ro", uri=True, check_same_thread=False)
+            self._version = None
+            return
+        self._conn = sqlite3.connect(rows_path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+            CREATE TABLE IF NOT EXISTS rows (
+                row INTEGER PRIMARY KEY,
+                id TEXT UNIQUE,
+                document TEXT,
+                metadata TEXT
+            );
+            """
+        )
+        self._conn.commit()
+        self._version = None
+
+    @contextmanager
+    def _locked(self):
+        """
+        Межпроцессная блокировка записи в реплику (повторный вход в том же
+        потоке разрешен). При входе реплика перечитывается, чтобы выбор
+        строк шел по состоянию после записей других процессов.
+        """
+        if self.read_only:
+            raise RuntimeError(f"Реплика {self.index_dir} открыта только для чтения")
+        with self._lock:
+            if self._lock_depth == 0:
+                conn = sqlite3.connect(self._lock_path, timeout=self.LOCK_TIMEOUT,
+                                       isolation_level=None, check_same_thread=False)
+                conn.execute("BEGIN IMMEDIATE")
+                self._lock_conn = conn
+                self._reload()
+            self._lock_depth += 1
+            try:
+                yield
+            finally:
+                self._lock_depth -= 1
+                if self._lock_depth == 0:
+                    self._lock_conn.execute("ROLLBACK")
+                    self._lock_conn.close()
+                    self._lock_conn = None
+
+    def _remove_data_dir(self, data_dir: str):
+        """Удаление прежнего каталога данных после переключения CURRENT."""
+        if data_dir != self.index_dir:
+            shutil.rmtree(data_dir, ignore_errors=True)
+            return
+        # Реплика, созданная раньше: файлы лежат в самом index_dir
+        for name in self.DATA_FILES:
+            try:
+                os.remove(os.path.join(data_dir, name))
+            except OSError:
+                pass
+
+    def _get_meta(self, key: str, default: Optional[str] = None) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _set_meta(self, key: str, value: Any):
+        self._conn.execute(
+            "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, str(value))
+        )
+
+    @property
+    def dim(self) -> Optional[int]:
+        value = self._get_meta("dim")
+        return int(value) if value else None
+
+    @property
+    def capacity(self) -> int:
+        return int(self._get_meta("capacity", "0"))
+
+    def _open(self, path: str, dtype, mode: str = "r", per_row: bool = True):
+        dim, capacity = self.dim, self.capacity
+        if not dim or not capacity or not os.path.exists(path):
+            return None
+        shape = (capacity, dim) if per_row else (capacity,)
+        return np.memmap(path, dtype=dtype, mode=mode, shape=shape)
+
+    def _open_vectors(self, mode: str = "r"):
+        return self._open(self._vectors_path, np.float32, mode)
+
+    def _open_codes(self, mode: str = "r"):
+        codes = self._open(self._codes_path, np.int8, mode)
+        scales = self._open(self._scales_path, np.float32, mode, per_row=False)
+        return codes, scales
+
+    def _open_norms(self, mode: str = "r"):
+        return self._open(self._norms_path, np.float32, mode, per_row=False)
+
+    def _reload(self):
+        """Перечитывает карту строк и матрицу, если реплику изменил другой процесс."""
+        data_dir = self._current_data_dir()
+        if data_dir != self._data_dir:
+            self._open_data_dir(data_dir)
+        version = self._get_meta("version", "0")
+        if version == self._version:
+            return
+
+        alive = np.zeros(self.capacity, dtype=bool)
+        for (row,) in self._conn.execute("SELECT row FROM rows WHERE id IS NOT NULL"):
+            alive[row] = True
+
+        self._alive = alive
+        self._vectors = self._open_vectors("r")
+        self._codes, self._scales = self._open_codes("r")
+        self._norms = self._open_norms("r")
+        self._version = version
+
+    def _ensure_capacity(self, dim: int, required: int):
+        """Создает или расширяет файл матрицы до нужного числа строк."""
+        current_dim = self.dim
+        if current_dim is not None and current_dim != dim:
+            raise ValueError(
+                f"Размерность эмбеддингов {dim} не совпадает с размерностью реплики {current_dim}"
+            )
+
+        capacity = self.capacity
+        if required <= capacity:
+            return
+
+        new_capacity = max(self.INITIAL_CAPACITY, capacity)
+        while new_capacity < required:
+            new_capacity *= 2
+
+        # Увеличение файлов без перезаписи существующих строк
+        for path, row_bytes in (
+            (self._vectors_path, dim * np.dtype(np.float32).itemsize),
+            (self._codes_path, dim * np.dtype(np.int8).itemsize),
+            (self._scales_path, np.dtype(np.float32).itemsize),
+            (self._norms_path, np.dtype(np.float32).itemsize),
+        ):
+            with open(path, "ab") as f:
+                f.truncate(new_capacity * row_bytes)
+
+        self._set_meta("dim", dim)
+        self._set_meta("capacity", new_capacity)
+
+    def _bump_version(self):
+        self._set_meta("version", int(self._get_meta("version", "0")) + 1)
+
+    @staticmethod
+    def _normalize(matrix: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    @staticmethod
+    def _quantize(matrix: np.ndarray):
+        """Симметричное int8-квантование строк с собственным масштабом на строку."""
+        scales = np.abs(matrix).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(matrix / scales[:, None]), -127, 127).astype(np.int8)
+        return codes, scales.astype(np.float32)
+
+    def _build_codes(self):
+        """Построение int8-копии по уже сохраненной float32-матрице."""
+        vectors = self._open_vectors("r")
+        if vectors is None:
+            return
+        capacity, dim = vectors.shape
+        for path, size in ((self._codes_path, capacity * dim), (self._scales_path, capacity * 4)):
+            with open(path, "wb") as f:
+                f.truncate(size)
+
+        codes, scales = self._open_codes("r+")
+        for start in range(0, capacity, self.SCAN_CHUNK):
+            chunk_codes, chunk_scales = self._quantize(np.asarray(vectors[start:start + self.SCAN_CHUNK]))
+            codes[start:start + len(chunk_codes)] = chunk_codes
+            scales[start:start + len(chunk_scales)] = chunk_scales
+        codes.flush()
+        scales.flush()
+
+    def _build_norms(self):
+        """Расчет квадратов норм строк по уже сохраненной float32-матрице."""
+        vectors = self._open_vectors("r")
+        if vectors is None:
+            return
+        with open(self._norms_path, "wb") as f:
+            f.truncate(len(vectors) * np.dtype(np.float32).itemsize)
+        norms = self._open_norms("r+")
+        for start in range(0, len(vectors), self.SCAN_CHUNK):
+            chunk = np.asarray(vectors[start:start + self.SCAN_CHUNK])
+            norms[start:start + len(chunk)] = np.einsum("ij,ij->i", chunk, chunk)
+        norms.flush()
+
+    # ------------------------------------------------------------------
+    # Запись
+    # ------------------------------------------------------------------
+
+    def upsert(
+        self,
+        ids: Sequence[str],
+        embeddings: Sequence[Sequence[float]],
+        documents: Sequence[str],
+        metadatas: Sequence[Dict[str, Any]]
+    ) -> int:
+        """
+        Добавление или обновление записей реплики.
+
+        Args:
+            ids: Идентификаторы заведений
+            embeddings: Эмбеддинги документов
+            documents: Тексты документов
+            metadatas: Метаданные документов
+
+        Returns:
+            int: Количество записанных строк
+        """
+        if not ids:
+            return 0
+
+        # Повтор id в порции: остается последняя запись, иначе лишний вектор
+        # занял бы строку без метаданных
+        last = {venue_id: i for i, venue_id in enumerate(ids)}
+        keep = sorted(last.values())
+        ids = [ids[i] for i in keep]
+        documents = [documents[i] for i in keep]
+        metadatas = [metadatas[i] for i in keep]
+        matrix = np.asarray(embeddings, dtype=np.float32)[keep]
+        if self.space == "cosine":
+            matrix = self._normalize(matrix)
+
+        # Выбор строк, запись в матрицы и commit - под одной блокировкой, иначе
+        # параллельные записи заняли бы одни и те же свободные строки
+        with self._locked():
+            existing = {}
+            for chunk in _chunks(ids):
+                existing.update(self._conn.execute(
+                    f"SELECT id, row FROM rows WHERE id IN ({','.join('?' * len(chunk))})", chunk
+                ).fetchall())
+            free_rows = [
+                row for (row,) in self._conn.execute(
+                    "SELECT row FROM rows WHERE id IS NULL ORDER BY row"
+                ).fetchall()
+            ]
+            next_row = self._conn.execute("SELECT COALESCE(MAX(row) + 1, 0) FROM rows").fetchone()[0]
+
+            rows = []
+            for venue_id in ids:
+                if venue_id in existing:
+                    rows.append(existing[venue_id])
+                elif free_rows:
+                    rows.append(free_rows.pop(0))
+                else:
+                    rows.append(next_row)
+                    next_row += 1
+
+            self._ensure_capacity(matrix.shape[1], next_row)
+            vectors = self._open_vectors("r+")
+            vectors[rows] = matrix
+            vectors.flush()
+            del vectors
+
+            codes, scales = self._open_codes("r+")
+            codes[rows], scales[rows] = self._quantize(matrix)
+            codes.flush()
+            scales.flush()
+            del codes, scales
+
+            norms = self._open_norms("r+")
+            norms[rows] = np.einsum("ij,ij->i", matrix, matrix)
+            norms.flush()
+            del norms
+
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO rows (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (row, venue_id, document, json.dumps(metadata or {}, ensure_ascii=False))
+                    for row, venue_id, document, metadata in zip(rows, ids, documents, metadatas)
+                ]
+            )
+            self._bump_version()
+            self._conn.commit()
+            self._reload()
+            return len(rows)
+
+    def delete(self, ids: Sequence[str]) -> int:
+        """
+        Удаление записей из реплики. Освободившиеся строки переиспользуются.
+
+        Args:
+            ids: Идентификаторы заведений
+
+        Returns:
+            int: Количество удаленных строк
+        """
+        if not ids:
+            return 0
+
+        deleted = 0
+        with self._locked():
+            for chunk in _chunks(list(ids)):
+                deleted += self._conn.execute(
+                    f"UPDATE rows SET id = NULL, document = NULL, metadata = NULL "
+                    f"WHERE id IN ({','.join('?' * len(chunk))})",
+                    chunk
+                ).rowcount
+            self._bump_version()
+            self._conn.commit()
+            self._reload()
+        return deleted
+
+    def clear(self):
+        """Полная очистка реплики на месте (для пересборки без пустой реплики - `rebuilding`)."""
+        with self._locked():
+            self._conn.execute("DELETE FROM rows")
+            self._conn.execute("DELETE FROM meta WHERE key IN ('dim', 'capacity')")
+            self._bump_version()
+            self._conn.commit()
+            for path in (self._vectors_path, self._codes_path, self._scales_path, self._norms_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._reload()
+
+    @contextmanager
+    def rebuilding(self) -> Iterator["MemmapVectorIndex"]:
+        """
+        Полная пересборка реплики с атомарной заменой.
+
+        Возвращает пустую реплику в новом каталоге данных; после успешного
+        выхода из блока CURRENT переключается на нее, а прежний каталог
+        удаляется. До переключения читатели используют прежние данные, при
+        ошибке новый каталог удаляется. Блокировка записи удерживается на
+        все время пересборки, поэтому записи других процессов дожидаются ее
+        окончания и попадают уже в новую реплику.
+
+        Example:
+            with index.rebuilding() as staging:
+                staging.upsert(ids, embeddings, documents, metadatas)
+        """
+        with self._locked():
+            # Каталоги прерванных пересборок
+            for name in os.listdir(self.index_dir):
+                path = os.path.join(self.index_dir, name)
+                if name.startswith(self.DATA_DIR_PREFIX) and path != self._data_dir:
+                    shutil.rmtree(path, ignore_errors=True)
+
+            staging_dir = tempfile.mkdtemp(prefix=self.DATA_DIR_PREFIX, dir=self.index_dir)
+            try:
+                staging = MemmapVectorIndex(staging_dir, quantization=self.quantization,
+                                            rescore_factor=self.rescore_factor, space=self.space)
+                yield staging
+                staging.close()
+            except BaseException:
+                shutil.rmtree(staging_dir, ignore_errors=True)
+                raise
+
+            previous = self._data_dir
+            current_tmp = self._current_path + ".tmp"
+            with open(current_tmp, "w", encoding="utf-8") as f:
+                f.write(os.path.basename(staging_dir))
+            os.replace(current_tmp, self._current_path)
+            self._reload()
+            self._remove_data_dir(previous)
+
+    def close(self):
+        """Закрытие соединения с rows.db."""
+        self._conn.close()
+
+    # ------------------------------------------------------------------
+    # Чтение
+    # ------------------------------------------------------------------
+
+    def __len__(self) -> int:
+        self._reload()
+        return int(self._alive.sum())
+
+    def scan_bytes(self, quantized: Optional[bool] = None) -> int:
+        """Объем матрицы, просматриваемой целиком при каждом поиске."""
+        quantized = self.quantization == "int8" if quantized is None else quantized
+        dim, capacity = self.dim or 0, self.capacity
+        norms = capacity * np.dtype(np.float32).itemsize if self.space == "l2" else 0
+        if quantized:
+            return capacity * (dim + np.dtype(np.float32).itemsize) + norms
+        return capacity * dim * np.dtype(np.float32).itemsize + norms
+
+    def _approximate_scores(self, query: np.ndarray) -> np.ndarray:
+        """Оценки по int8-матрице; просмотр порциями, чтобы не распаковывать ее целиком."""
+        scores = np.empty(len(self._codes), dtype=np.float32)
+        for start in range(0, len(self._codes), self.SCAN_CHUNK):
+            chunk = self._codes[start:start + self.SCAN_CHUNK]
+            scores[start:start + len(chunk)] = chunk.astype(np.float32) @ query
+        scores *= self._scales
+        return scores
+
+    def _similarity(self, dots: np.ndarray, rows: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Оценка для ранжирования (больше - ближе) из скалярных произведений.
+        Для l2: 2 x·q - ||x||^2 = ||q||^2 - ||x - q||^2.
+        """
+        if self.space != "l2":
+            return dots
+        norms = self._norms if rows is None else self._norms[rows]
+        return 2.0 * dots - norms
+
+    def _distance(self, score: float, query_norm: float) -> float:
+        """Расстояние в терминах ChromaDB по оценке ранжирования."""
+        if self.space == "l2":
+            return max(query_norm - score, 0.0)
+        return 1.0 - score
+
+    def _rescore(self, candidates: np.ndarray, query: np.ndarray, scores: np.ndarray) -> np.ndarray:
+        """Точный пересчет оценок кандидатов по float32-строкам."""
+        rows = np.sort(candidates)
+        exact = self._similarity(np.asarray(self._vectors[rows]) @ query, rows)
+        scores[rows] = exact
+        return rows[np.argsort(-exact)]
+
+    def _fetch_rows(self, rows: Sequence[int]) -> Dict[int, tuple]:
+        fetched = {}
+        for chunk in _chunks([int(r) for r in rows]):
+            fetched.update({
+                row: (venue_id, document, json.loads(metadata or "{}"))
+                for row, venue_id, document, metadata in self._conn.execute(
+                    f"SELECT row, id, document, metadata FROM rows WHERE row IN ({','.join('?' * len(chunk))})",
+                    chunk
+                )
+            })
+        return fetched
+
+    def search(
+        self,
+        query_embedding: Sequence[float],
+        k: int = 5,
+        filters: Optional[Dict] = None,
+        quantized: Optional[bool] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        Поиск ближайших заведений по метрике реплики.
+
+        Args:
+            query_embedding: Эмбеддинг запроса
+            k: Количество возвращаемых результатов
+            filters: Опциональный фильтр `where` в формате ChromaDB
+            quantized: Использовать int8-матрицу с точным пересчетом top-кандидатов
+                       (по умолчанию определяется режимом квантования реплики)
+
+        Returns:
+            List[Dict[str, Any]]: Найденные записи с id, документом, метаданными и оценкой
+
+        Raises:
+            UnsupportedFilterError: Если фильтр содержит неподдерживаемые операторы
+        """
+        validate_where(filters)
+        self._reload()
+        if self._vectors is None or not self._alive.any():
+            return []
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        if self.space == "cosine":
+            norm = np.linalg.norm(query)
+            if norm:
+                query = query / norm
+        query_norm = float(query @ query)
+
+        quantized = self.quantization == "int8" if quantized is None else quantized
+        quantized = quantized and self._codes is not None
+        if quantized:
+            scores = self._similarity(self._approximate_scores(query))
+        else:
+            scores = self._similarity(np.asarray(self._vectors @ query))
+        scores[~self._alive] = -np.inf
+
+        # Для квантованного поиска берется больше кандидатов под точный пересчет
+        depth = k * self.rescore_factor if quantized else k
+
+        alive_rows = np.flatnonzero(self._alive)
+        if not filters and depth < len(alive_rows):
+            # Без фильтров достаточно частичной сортировки top-k
+            top = alive_rows[np.argpartition(-scores[alive_rows], depth)[:depth]]
+            ordered = top[np.argsort(-scores[top])]
+        else:
+            ordered = alive_rows[np.argsort(-scores[alive_rows])]
+
+        # С фильтрами кандидаты просматриваются по убыванию оценки порциями,
+        # пока не наберется k подходящих записей
+        batch = depth if not filters else max(depth * 4, 32)
+        results = []
+        for start in range(0, len(ordered), batch):
+            candidates = ordered[start:start + batch]
+            if quantized:
+                candidates = self._rescore(candidates, query, scores)
+            rows = self._fetch_rows(candidates)
+            for row in candidates:
+                if row not in rows:
+                    continue
+                venue_id, document, metadata = rows[row]
+                if not matches_where(metadata, filters):
+                    continue
+                distance = self._distance(float(scores[row]), query_norm)
+                results.append({
+                    "id": venue_id,
+                    "document": document,
+                    "metadata": metadata,
+                    "distance": distance,
+                    "score": distance_to_score(distance, self.space)
+                })
+                if len(results) >= k:
+                    return results
+
+        return results
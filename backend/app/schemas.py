@@ -73,6 +73,15 @@ class VenueResponse(VenueBase):
     class Config:
         from_attributes = True
 
+class VenueSearchResult(VenueResponse):
+    snippet: str = ""  # Фрагмент текста с подсветкой совпадений (<b>...</b>)
+    score: float  # BM25: меньше - релевантнее
+
+class VenueNearbyResult(VenueResponse):
+    lat: float
+    lon: float
+    distance_m: Optional[float] = None  # Расстояние от центра поиска (для поиска по радиусу)
+
 class VenueRatingCreate(BaseModel):
     venue_id: int
     rating: float
@@ -100,6 +109,28 @@ class ParserConfig(BaseModel):
     city: str
     category: str
     max_items: Optional[int] = 100
+    workers: Optional[int] = None
+    force_refresh: bool = False  # Обойти заново и свежие карточки
+
+class CrawlJobResponse(BaseModel):
+    id: int
+    city: str
+    category: str
+    max_items: int
+    workers: Optional[int] = None
+    force_refresh: bool = False
+    status: str
+    cancel_requested: bool = False
+    progress: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    worker_id: Optional[str] = None
+    created_at: Optional[datetime] = None
+    started_at: Optional[datetime] = None
+    heartbeat_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    
+    class Config:
+        from_attributes = True
 
 # User schemas
 class UserUpdate(BaseModel):
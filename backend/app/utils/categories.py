@@ -0,0 +1,137 @@
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy.dialects.sqlite import insert
+
+from app import models
+
+# Канонические категории (названия из хлебных крошек карточки Яндекс.Карт,
+# см. `InfoGetter.get_catergory`) и их варианты: множественное число,
+# сокращения, названия из формы парсера и английские запросы API
+CATEGORY_DICTIONARY = {
+    "Ресторан": ["рестораны", "restaurant", "restaurants"],
+    "Кафе": ["кафешка", "cafe", "cafes"],
+    "Бар, паб": ["бар", "бары", "паб", "пабы", "bar", "bars", "pub"],
+    "Кофейня": ["кофейни", "кофе", "coffee", "coffee shop"],
+    "Пиццерия": ["пиццерии", "пицца", "pizza"],
+    "Суши-бар": ["суши", "роллы", "sushi"],
+    "Быстрое питание": ["фастфуд", "фаст-фуд", "fast food"],
+    "Кондитерская": ["кондитерские", "десерты", "confectionery"],
+    "Пекарня": ["пекарни", "булочная", "bakery"],
+    "Ночной клуб": ["клуб", "клубы", "ночные клубы", "nightclub", "nightlife"],
+    "Караоке-клуб": ["караоке", "karaoke"],
+    "Кинотеатр": ["кинотеатры", "кино", "cinema"],
+    "Театр": ["театры", "theater", "theaters", "theatre"],
+    "Театр оперы и балета": ["опера", "балет", "opera"],
+    "Музей": ["музеи", "museum", "museums"],
+    "Парк культуры и отдыха": ["парк", "парки", "park", "parks"],
+    "Стадион": ["стадионы", "stadium"],
+    "Торговый центр": ["торговые центры", "тц", "shopping", "mall"],
+    "Боулинг-клуб": ["боулинг", "bowling"],
+}
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize_category(value: Optional[str]) -> str:
+    """Нормализованная запись категории для сравнения на равенство."""
+    return _SPACES.sub(" ", (value or "").replace("ё", "е").replace("Ё", "Е")).strip().lower()
+
+
+def seed_categories(db) -> int:
+    """
+    Заполнение справочника категорий из CATEGORY_DICTIONARY (без дубликатов).
+
+    Returns:
+        int: Количество добавленных записей (категорий и вариантов)
+    """
+    existing = {alias.alias: alias.category_id for alias in db.query(models.CategoryAlias)}
+    categories = {category.name: category for category in db.query(models.Category)}
+
+    added = 0
+    for name, aliases in CATEGORY_DICTIONARY.items():
+        category = categories.get(name)
+        if category is None:
+            category = models.Category(name=name)
+            db.add(category)
+            db.flush()
+            categories[name] = category
+            added += 1
+        for alias in [name, *aliases]:
+            alias = normalize_category(alias)
+            if alias and alias not in existing:
+                db.add(models.CategoryAlias(alias=alias, category_id=category.id))
+                existing[alias] = category.id
+                added += 1
+
+    db.commit()
+    return added
+
+
+def resolve_category_id(db, value: Optional[str], create: bool = True,
+                        cache: Optional[Dict[str, int]] = None) -> Optional[int]:
+    """
+    ID категории по названию из карточки или запроса (поиск по равенству).
+
+    Неизвестная категория из карточки добавляется в справочник как новая
+    каноническая (`create=True`), чтобы у каждого заведения была ссылка.
+    Вставка идет через ON CONFLICT DO NOTHING с повторным чтением: API и
+    исполнитель задач парсинга могут одновременно добавлять одну категорию.
+
+    Args:
+        db: Сессия базы данных
+        value: Название категории
+        create: Добавить категорию, если ее нет в справочнике
+        cache: Словарь для повторного использования в пределах порции
+
+    Returns:
+        Optional[int]: ID категории или None
+    """
+    alias = normalize_category(value)
+    if not alias:
+        return None
+    if cache is not None and alias in cache:
+        return cache[alias]
+
+    category_id = db.query(models.CategoryAlias.category_id).filter(
+        models.CategoryAlias.alias == alias
+    ).scalar()
+
+    if category_id is None and create:
+        name = value.strip()
+        db.execute(insert(models.Category).values(name=name).on_conflict_do_nothing(index_elements=["name"]))
+        new_id = db.query(models.Category.id).filter(models.Category.name == name).scalar()
+        db.execute(
+            insert(models.CategoryAlias).values(alias=alias, category_id=new_id)
+            .on_conflict_do_nothing(index_elements=["alias"])
+        )
+        # Если вариант успел добавить другой процесс, используется его категория
+        category_id = db.query(models.CategoryAlias.category_id).filter(
+            models.CategoryAlias.alias == alias
+        ).scalar()
+
+    if cache is not None and category_id is not None:
+        cache[alias] = category_id
+    return category_id
+
+
+def matching_category_ids(db, value: str) -> List[int]:
+    """
+    ID категорий для фильтра API.
+
+    Сначала точное совпадение с названием или вариантом; если его нет,
+    ищется вхождение строки в вариантах (как прежний фильтр ILIKE '%x%',
+    но по небольшому справочнику, а не по всем заведениям).
+    """
+    alias = normalize_category(value)
+    if not alias:
+        return []
+
+    category_id = resolve_category_id(db, alias, create=False)
+    if category_id is not None:
+        return [category_id]
+
+    rows = db.query(models.CategoryAlias.category_id).filter(
+        models.CategoryAlias.alias.contains(alias, autoescape=True)
+    ).distinct().all()
+    return [row.category_id for row in rows]
@@ -0,0 +1,119 @@
+import math
+from typing import List, Optional, Sequence, Tuple
+
+from sqlalchemy import inspect, text
+
+# Пространственный индекс заведений (SQLite R*Tree): точка хранится как
+# вырожденный прямоугольник min = max. R*Tree хранит координаты в float32
+# (погрешность до ~1 м), поэтому индекс отбирает кандидатов по
+# ограничивающему прямоугольнику, а расстояние считается по точным
+# venues.lat / venues.lon.
+RTREE_TABLE = "venues_rtree"
+
+EARTH_RADIUS_M = 6371008.8
+METERS_PER_DEGREE_LAT = 111320.0
+
+SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE_TABLE} USING rtree(
+        id, min_lat, max_lat, min_lon, max_lon
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS venues_rtree_insert AFTER INSERT ON venues
+        WHEN new.lat IS NOT NULL AND new.lon IS NOT NULL BEGIN
+        INSERT INTO {RTREE_TABLE} (id, min_lat, max_lat, min_lon, max_lon)
+        VALUES (new.id, new.lat, new.lat, new.lon, new.lon);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS venues_rtree_update AFTER UPDATE OF lat, lon ON venues BEGIN
+        DELETE FROM {RTREE_TABLE} WHERE id = old.id;
+        INSERT INTO {RTREE_TABLE} (id, min_lat, max_lat, min_lon, max_lon)
+        SELECT new.id, new.lat, new.lat, new.lon, new.lon
+        WHERE new.lat IS NOT NULL AND new.lon IS NOT NULL;
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS venues_rtree_delete AFTER DELETE ON venues BEGIN
+        DELETE FROM {RTREE_TABLE} WHERE id = old.id;
+    END""",
+]
+
+REBUILD = f"""
+    INSERT INTO {RTREE_TABLE} (id, min_lat, max_lat, min_lon, max_lon)
+    SELECT id, lat, lat, lon, lon FROM venues WHERE lat IS NOT NULL AND lon IS NOT NULL
+"""
+
+BoundingBox = Tuple[float, float, float, float]  # min_lat, min_lon, max_lat, max_lon
+
+
+def create_geo_index(engine) -> bool:
+    """
+    Создание R*Tree и триггеров синхронизации с venues.lat / venues.lon.
+
+    Returns:
+        bool: True, если индекс был создан (и заполнен сохраненными заведениями)
+    """
+    created = not inspect(engine).has_table(RTREE_TABLE)
+    with engine.begin() as connection:
+        for statement in SCHEMA:
+            connection.execute(text(statement))
+        if created:
+            connection.execute(text(REBUILD))
+    if created:
+        print(f"Создан пространственный индекс {RTREE_TABLE}")
+    return created
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Расстояние по поверхности Земли в метрах."""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_M * math.asin(min(1.0, math.sqrt(a)))
+
+
+def radius_bbox(lat: float, lon: float, radius_m: float) -> BoundingBox:
+    """Ограничивающий прямоугольник круга радиуса radius_m вокруг точки."""
+    d_lat = radius_m / METERS_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(lat)), 1e-6)
+    d_lon = min(radius_m / (METERS_PER_DEGREE_LAT * cos_lat), 180.0)
+    return max(lat - d_lat, -90.0), lon - d_lon, min(lat + d_lat, 90.0), lon + d_lon
+
+
+def bbox_candidates(db, bbox: BoundingBox, verified_only: bool = True,
+                    category_ids: Optional[Sequence[int]] = None,
+                    min_rating: Optional[float] = None,
+                    limit: Optional[int] = None) -> List[Tuple[int, float, float]]:
+    """
+    Заведения внутри прямоугольника (поиск по R*Tree) с фильтрами.
+    С limit возвращаются лучшие по рейтингу заведения.
+
+    Returns:
+        List[Tuple[int, float, float]]: ID, широта и долгота заведения
+    """
+    min_lat, min_lon, max_lat, max_lon = bbox
+    conditions = [
+        "r.max_lat >= :min_lat", "r.min_lat <= :max_lat",
+        "r.max_lon >= :min_lon", "r.min_lon <= :max_lon",
+        # Точная проверка: R*Tree округляет координаты
+        "v.lat BETWEEN :min_lat AND :max_lat", "v.lon BETWEEN :min_lon AND :max_lon",
+    ]
+    params = {"min_lat": min_lat, "min_lon": min_lon, "max_lat": max_lat, "max_lon": max_lon}
+    if verified_only:
+        conditions.append("v.is_verified = 1")
+    if category_ids is not None:
+        placeholders = ", ".join(f":category_{i}" for i in range(len(category_ids)))
+        conditions.append(f"v.category_id IN ({placeholders or 'NULL'})")
+        params.update({f"category_{i}": category_id for i, category_id in enumerate(category_ids)})
+    if min_rating is not None:
+        conditions.append("v.rating >= :min_rating")
+        params["min_rating"] = min_rating
+    order = ""
+    if limit is not None:
+        order = "ORDER BY v.rating DESC, v.id DESC LIMIT :limit"
+        params["limit"] = limit
+
+    rows = db.execute(text(f"""
+        SELECT v.id, v.lat, v.lon
+        FROM {RTREE_TABLE} r
+        JOIN venues v ON v.id = r.id
+        WHERE {" AND ".join(conditions)}
+        {order}
+    """), params)
+    return [(row.id, row.lat, row.lon) for row in rows]
@@ -0,0 +1,170 @@
+import re
+from datetime import datetime
+from functools import lru_cache
+from typing import Iterable, Optional, Tuple
+from zoneinfo import ZoneInfo
+
+from app.config import settings
+
+# Неделя делится на 15-минутные слоты, начиная с понедельника 00:00.
+# Битовая маска недели (672 бита) хранится строкой из 168 hex-символов:
+# символ i описывает слоты 4i..4i+3, старший бит - первый слот.
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEK_SLOTS = 7 * SLOTS_PER_DAY
+BITMAP_LENGTH = WEEK_SLOTS // 4
+
+DAYS = ["mo", "tu", "we", "th", "fr", "sa", "su"]
+
+TIME_RANGE = r"\d{1,2}:\d{2}\s*-\s*\d{1,2}:\d{2}"
+LINE_PATTERN = re.compile(
+    rf"^(?P<days>[A-Za-z]{{2}}(?:\s*[-,]\s*[A-Za-z]{{2}})*)?\s*"
+    rf"(?P<times>{TIME_RANGE}(?:\s*,\s*{TIME_RANGE})*|off|closed)$",
+    re.IGNORECASE
+)
+
+# Запросы вида «открыто сейчас», «что работает сейчас»
+OPEN_NOW_PATTERN = re.compile(
+    r"(открыт\w*|работа\w*)\s+(прямо\s+)?сейчас|сейчас\s+(открыт\w*|работа\w*)|open\s+now",
+    re.IGNORECASE
+)
+
+
+def _minutes(value: str) -> int:
+    hours, minutes = value.strip().split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _days(spec: Optional[str]) -> list:
+    """Номера дней недели из записи вида "Mo-Fr,Su" (без записи - все дни)."""
+    if not spec:
+        return list(range(7))
+    days = []
+    for part in spec.lower().replace(" ", "").split(","):
+        if "-" in part:
+            first, last = (DAYS.index(day) for day in part.split("-"))
+            # Диапазон может переходить через воскресенье (например, "Fr-Mo")
+            days.extend((first + offset) % 7 for offset in range((last - first) % 7 + 1))
+        else:
+            days.append(DAYS.index(part))
+    return days
+
+
+def parse_opening_hours(lines: Iterable[str]) -> Optional[str]:
+    """
+    Преобразование строк `itemprop="openingHours"` в битовую маску недели.
+
+    Поддерживаются записи schema.org: "Mo-Su 10:00-23:00", "Mo,We 10:00-18:00",
+    несколько интервалов через запятую, интервалы через полночь
+    ("Fr-Sa 12:00-02:00" продолжается в следующий день), круглосуточный режим
+    ("Mo-Su 00:00-24:00", "24/7") и выходные ("Su off").
+
+    Слоты принадлежат дню, интервалы которого их задали: выходной сбрасывает
+    только собственные интервалы дня, поэтому ночная работа предыдущего дня
+    ("Sa 20:00-04:00", "Su off") сохраняется независимо от порядка строк.
+
+    Args:
+        lines: Строки графика работы в формате парсера
+
+    Returns:
+        Optional[str]: Маска из 168 hex-символов или None, если график не распознан
+    """
+    if isinstance(lines, str):
+        lines = [lines]
+
+    # Слоты недели, заданные интервалами каждого дня (с переходом через полночь)
+    day_slots = [set() for _ in DAYS]
+    recognized = False
+    for line in lines or []:
+        line = (line or "").strip()
+        if line.lower() == "24/7":
+            for day in range(7):
+                day_slots[day] = set(range(day * SLOTS_PER_DAY, (day + 1) * SLOTS_PER_DAY))
+            recognized = True
+            continue
+
+        match = LINE_PATTERN.match(line)
+        if not match:
+            continue
+        try:
+            days = _days(match.group("days"))
+        except ValueError:
+            continue
+        recognized = True
+
+        times = match.group("times").lower()
+        for day in days:
+            if times in ("off", "closed"):
+                day_slots[day] = set()
+                continue
+
+            for time_range in times.split(","):
+                start, end = (_minutes(value) for value in time_range.split("-"))
+                if end <= start:
+                    end += 24 * 60  # Работа через полночь или круглосуточно (00:00-00:00)
+                first = start // SLOT_MINUTES
+                last = -(-end // SLOT_MINUTES)
+                day_slots[day].update((day * SLOTS_PER_DAY + slot) % WEEK_SLOTS for slot in range(first, last))
+
+    if not recognized:
+        return None
+
+    slots = [False] * WEEK_SLOTS
+    for owned in day_slots:
+        for slot in owned:
+            slots[slot] = True
+
+    return "".join(
+        format(sum(slots[i + bit] << (3 - bit) for bit in range(4)), "x")
+        for i in range(0, WEEK_SLOTS, 4)
+    )
+
+
+def venue_time(at: Optional[datetime] = None) -> datetime:
+    """
+    Время в часовом поясе заведений (VENUE_TIMEZONE).
+    Время без часового пояса считается уже местным.
+    """
+    zone = ZoneInfo(settings.VENUE_TIMEZONE)
+    if at is None:
+        return datetime.now(zone)
+    if at.tzinfo is None:
+        return at
+    return at.astimezone(zone)
+
+
+def week_slot(at: Optional[datetime] = None) -> int:
+    """Номер 15-минутного слота недели для момента времени."""
+    at = venue_time(at)
+    return at.weekday() * SLOTS_PER_DAY + (at.hour * 60 + at.minute) // SLOT_MINUTES
+
+
+@lru_cache(maxsize=4)
+def open_chars(bit: int) -> str:
+    """Hex-символы, в которых установлен бит `bit` (0 - старший)."""
+    return "".join(format(value, "x") for value in range(16) if value & (8 >> bit))
+
+
+def slot_filter(at: Optional[datetime] = None) -> Tuple[int, str]:
+    """
+    Параметры проверки маски в SQL без разбора строки:
+    `instr(chars, substr(hours_bitmap, position, 1)) > 0`.
+
+    Returns:
+        Tuple[int, str]: Позиция символа (с 1) и допустимые hex-символы
+    """
+    slot = week_slot(at)
+    return slot // 4 + 1, open_chars(slot % 4)
+
+
+def is_open(bitmap: Optional[str], at: Optional[datetime] = None) -> bool:
+    """Открыто ли заведение в момент `at` (по умолчанию - сейчас); без графика - False."""
+    if not bitmap or len(bitmap) != BITMAP_LENGTH:
+        return False
+    position, chars = slot_filter(at)
+    return bitmap[position - 1] in chars
+
+
+def wants_open_now(query: str) -> bool:
+    """Запрашивает ли пользователь заведения, открытые сейчас."""
+    return bool(OPEN_NOW_PATTERN.search(query or ""))
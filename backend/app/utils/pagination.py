@@ -0,0 +1,75 @@
+import base64
+import binascii
+import json
+import math
+from datetime import datetime
+from typing import Any, List, Sequence
+
+from sqlalchemy import literal, tuple_
+
+# Заголовок ответа со ссылкой на следующую страницу
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def _cursor_value(value: Any) -> Any:
+    """
+    Значение ключа сортировки для курсора.
+
+    Дата сохраняется строкой в том же виде, в каком ее хранит SQLite
+    (CURRENT_TIMESTAMP - без микросекунд), чтобы сравнение в условии
+    курсора шло по тем же строкам, что и сортировка.
+    """
+    if isinstance(value, datetime):
+        fmt = "%Y-%m-%d %H:%M:%S.%f" if value.microsecond else "%Y-%m-%d %H:%M:%S"
+        return value.replace(tzinfo=None).strftime(fmt)
+    return value
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    """Непрозрачный курсор из значений ключа сортировки последней строки страницы."""
+    payload = json.dumps([_cursor_value(value) for value in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    Разбор курсора.
+
+    Курсор приходит от клиента, поэтому значения проверяются до подстановки
+    в запрос: строки, числа или null, последнее значение - целый id.
+
+    Raises:
+        ValueError: Курсор поврежден или относится к другой сортировке
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, binascii.Error, UnicodeError):
+        raise ValueError("Некорректный курсор")
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError("Некорректный курсор")
+    if not all(_valid_cursor_value(value) for value in values):
+        raise ValueError("Некорректный курсор")
+    if isinstance(values[-1], bool) or not isinstance(values[-1], int):
+        raise ValueError("Некорректный курсор")
+    return values
+
+
+def _valid_cursor_value(value: Any) -> bool:
+    if value is None or isinstance(value, str):
+        return True
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        return False
+    return math.isfinite(value)
+
+
+def after_cursor(columns: Sequence, values: Sequence[Any]):
+    """
+    Условие keyset-пагинации для сортировки по убыванию всех столбцов:
+    строки строго после курсора, `(a, id) < (:a, :id)`.
+
+    Значения передаются без преобразования типа столбца, поэтому дата
+    сравнивается с курсором как хранимая строка. Сравнение кортежей
+    позволяет SQLite пройти по составному индексу диапазоном, без OFFSET.
+    """
+    return tuple_(*columns) < tuple_(*(literal(value) for value in values))
@@ -0,0 +1,123 @@
+from typing import List
+
+from sqlalchemy import case, func, select, text, update
+
+from app import models
+
+Venue = models.Venue
+VenueRating = models.VenueRating
+
+
+def apply_rating_delta(db, venue_id: int, delta_sum, delta_count: int = 0):
+    """
+    Изменение агрегатов рейтинга заведения одним UPDATE.
+
+    Сумма и количество оценок меняются на месте (`rating_sum = rating_sum + :delta`),
+    а средний рейтинг и review_count пересчитываются из них же, поэтому
+    одновременные оценки не перезаписывают друг друга и не требуют
+    AVG/COUNT по всем оценкам заведения. Выражения в SET SQLite вычисляет
+    по значениям строки до обновления. Вызывается в транзакции, изменяющей
+    саму оценку; фиксация - на стороне вызывающего кода.
+
+    Args:
+        db: Сессия базы данных
+        venue_id: ID заведения
+        delta_sum: Изменение суммы оценок (число или SQL-выражение)
+        delta_count: Изменение количества оценок
+    """
+    new_sum = func.coalesce(Venue.rating_sum, 0.0) + delta_sum
+    new_count = func.coalesce(Venue.rating_count, 0) + delta_count
+    db.execute(
+        update(Venue)
+        .where(Venue.id == venue_id)
+        .values(
+            rating_sum=new_sum,
+            rating_count=new_count,
+            review_count=new_count,
+            rating=case((new_count > 0, new_sum / new_count), else_=0.0),
+        )
+        .execution_options(synchronize_session=False)
+    )
+
+
+def current_rating(user_id: int, venue_id: int):
+    """Подзапрос: текущая оценка пользователя (для изменения суммы в том же UPDATE)."""
+    return (
+        select(VenueRating.rating)
+        .where(VenueRating.user_id == user_id, VenueRating.venue_id == venue_id)
+        .order_by(VenueRating.id)
+        .limit(1)
+        .scalar_subquery()
+    )
+
+
+_AGGREGATES = """
+    SELECT venue_id, SUM(rating) AS rating_sum, COUNT(*) AS rating_count
+    FROM venue_ratings
+    GROUP BY venue_id
+"""
+
+
+def find_rating_drift(db, only_missing: bool = False) -> List[int]:
+    """
+    Заведения, у которых сохраненные сумма и количество оценок не совпадают
+    с фактическими оценками (или еще не рассчитаны).
+    """
+    condition = (
+        "v.rating_sum IS NULL OR v.rating_count IS NULL" if only_missing else
+        "COALESCE(v.rating_count, -1) != COALESCE(a.rating_count, 0) "
+        "OR ABS(COALESCE(v.rating_sum, -1) - COALESCE(a.rating_sum, 0)) > 1e-6"
+    )
+    rows = db.execute(text(f"""
+        SELECT v.id
+        FROM venues v
+        LEFT JOIN ({_AGGREGATES}) a ON a.venue_id = v.id
+        WHERE {condition}
+    """))
+    return [row.id for row in rows]
+
+
+def reconcile_rating_aggregates(db, only_missing: bool = False, dry_run: bool = False,
+                                chunk_size: int = 500) -> List[int]:
+    """
+    Пересчет агрегатов рейтинга по фактическим оценкам.
+
+    Исправляет расхождения, появившиеся в обход `apply_rating_delta`
+    (удаление пользователя с каскадным удалением оценок, ручные правки),
+    и заполняет агрегаты у заведений, сохраненных до их появления.
+    Пересчитываются только заведения с расхождением, порциями по chunk_size.
+
+    Returns:
+        List[int]: ID заведений с расхождением
+    """
+    venue_ids = find_rating_drift(db, only_missing=only_missing)
+    if dry_run or not venue_ids:
+        return venue_ids
+
+    for start in range(0, len(venue_ids), chunk_size):
+        chunk = venue_ids[start:start + chunk_size]
+        aggregates = {
+            row.venue_id: row
+            for row in db.execute(
+                select(
+                    VenueRating.venue_id,
+                    func.sum(VenueRating.rating).label("rating_sum"),
+                    func.count(VenueRating.id).label("rating_count"),
+                ).where(VenueRating.venue_id.in_(chunk)).group_by(VenueRating.venue_id)
+            )
+        }
+        values = []
+        for venue_id in chunk:
+            row = aggregates.get(venue_id)
+            rating_sum = float(row.rating_sum) if row else 0.0
+            rating_count = int(row.rating_count) if row else 0
+            values.append({
+                "id": venue_id,
+                "rating_sum": rating_sum,
+                "rating_count": rating_count,
+                "review_count": rating_count,
+                "rating": rating_sum / rating_count if rating_count else 0.0,
+            })
+        db.execute(update(Venue), values)
+        db.commit()
+    return venue_ids
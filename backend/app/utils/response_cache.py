@@ -0,0 +1,200 @@
+import hashlib
+import json
+import time
+from threading import Lock
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import redis
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+
+from app.config import settings
+
+LIST_GENERATION_KEY = "venues:list:generation"
+LIST_KEY_PREFIX = "venues:list"
+ITEM_KEY_PREFIX = "venues:item"
+
+
+def normalize_params(params: Dict[str, Any]) -> str:
+    """
+    Каноническая запись параметров запроса для ключа кэша: без пустых
+    значений, в порядке имен, после разбора FastAPI (4 и 4.0 - один ключ).
+    """
+    normalized = {
+        name: value.isoformat() if hasattr(value, "isoformat") else value
+        for name, value in sorted(params.items())
+        if value is not None and value != ""
+    }
+    return json.dumps(normalized, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+
+
+def make_etag(body: bytes) -> str:
+    return '"' + hashlib.sha1(body).hexdigest() + '"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Проверка заголовка If-None-Match (список тегов или *)."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return "*" in tags or etag in tags
+
+
+class ResponseCache:
+    """
+    Кэш готовых JSON-ответов в Redis.
+
+    Запись хранит тело ответа, его ETag и дополнительные заголовки
+    (например, X-Next-Cursor), поэтому повторный запрос не обращается
+    к базе и не собирает ORM-объекты и pydantic-модели; при совпадении
+    If-None-Match отдается 304 без тела.
+
+    Инвалидация через номера поколений в ключах: старые записи перестают
+    читаться сразу и истекают по TTL.
+        - списки зависят от многих заведений сразу, поэтому их ключи
+          содержат общее поколение (`venues:list:generation`), которое
+          увеличивается при любом изменении заведений;
+        - ключ карточки заведения содержит общее поколение и поколение
+          самого заведения (`venues:item:{id}:generation`), которое
+          увеличивается при изменении этого заведения.
+    Поколение читается до запроса к базе, а увеличивается после commit,
+    поэтому ответ, построенный по данным до изменения, записывается под
+    устаревшим ключом и не отдается.
+
+    Клиент синхронный: эндпоинты заведений и загрузка данных выполняются
+    в потоках. При недоступности Redis кэш отключается на
+    RESPONSE_CACHE_RETRY_SECONDS, ответы строятся как без кэша.
+    """
+
+    def __init__(self, url: Optional[str] = None, ttl: Optional[int] = None):
+        self.url = url or settings.REDIS_URL
+        self.ttl = ttl or settings.RESPONSE_CACHE_TTL
+        self._client = None
+        self._retry_at = 0.0
+        self._lock = Lock()
+
+    @property
+    def client(self) -> Optional[redis.Redis]:
+        if not settings.RESPONSE_CACHE_ENABLED or time.monotonic() < self._retry_at:
+            return None
+        with self._lock:
+            if self._client is None:
+                self._client = redis.Redis.from_url(
+                    self.url,
+                    socket_timeout=settings.RESPONSE_CACHE_SOCKET_TIMEOUT,
+                    socket_connect_timeout=settings.RESPONSE_CACHE_SOCKET_TIMEOUT,
+                )
+        return self._client
+
+    def _failed(self, error: Exception):
+        if time.monotonic() >= self._retry_at:
+            print(f"Кэш ответов недоступен ({error}), повтор через {settings.RESPONSE_CACHE_RETRY_SECONDS} сек")
+        self._retry_at = time.monotonic() + settings.RESPONSE_CACHE_RETRY_SECONDS
+
+    def _generations(self, *keys: str) -> Optional[List[int]]:
+        """Текущие номера поколений (None, если Redis недоступен)."""
+        client = self.client
+        if client is None:
+            return None
+        try:
+            return [int(value or 0) for value in client.mget(keys)]
+        except redis.RedisError as e:
+            self._failed(e)
+            return None
+
+    def list_key(self, name: str, params: Dict[str, Any]) -> Optional[str]:
+        """Ключ страницы списка с текущим поколением (None, если Redis недоступен)."""
+        generations = self._generations(LIST_GENERATION_KEY)
+        if generations is None:
+            return None
+        digest = hashlib.sha1(normalize_params(params).encode("utf-8")).hexdigest()
+        return f"{LIST_KEY_PREFIX}:{name}:g{generations[0]}:{digest}"
+
+    @staticmethod
+    def item_generation_key(venue_id: int) -> str:
+        return f"{ITEM_KEY_PREFIX}:{venue_id}:generation"
+
+    def item_key(self, venue_id: int) -> Optional[str]:
+        """Ключ карточки заведения с текущими поколениями (None, если Redis недоступен)."""
+        generations = self._generations(LIST_GENERATION_KEY, self.item_generation_key(venue_id))
+        if generations is None:
+            return None
+        return f"{ITEM_KEY_PREFIX}:{venue_id}:g{generations[0]}.{generations[1]}"
+
+    def get(self, key: Optional[str]) -> Optional[Dict[str, Any]]:
+        client = self.client
+        if key is None or client is None:
+            return None
+        try:
+            entry = client.hgetall(key)
+        except redis.RedisError as e:
+            self._failed(e)
+            return None
+        if not entry:
+            return None
+        return {
+            "etag": entry[b"etag"].decode("ascii"),
+            "body": entry[b"body"],
+            "headers": json.loads(entry.get(b"headers") or b"{}"),
+        }
+
+    def set(self, key: Optional[str], entry: Dict[str, Any]):
+        client = self.client
+        if key is None or client is None:
+            return
+        try:
+            with client.pipeline() as pipe:
+                pipe.hset(key, mapping={
+                    "etag": entry["etag"],
+                    "body": entry["body"],
+                    "headers": json.dumps(entry["headers"]),
+                })
+                pipe.expire(key, self.ttl)
+                pipe.execute()
+        except redis.RedisError as e:
+            self._failed(e)
+
+    def invalidate_venues(self, venue_ids: Iterable[int] = ()):
+        """
+        Сброс карточек измененных заведений и всех страниц списков.
+
+        Без `venue_ids` сбрасываются все записи (общее поколение входит и в
+        ключи карточек). Вызывается после commit изменений.
+        """
+        client = self.client
+        if client is None:
+            return
+        try:
+            with client.pipeline() as pipe:
+                # Поколения заведений хранятся без TTL: после сброса счетчика
+                # снова читались бы еще не истекшие записи прежних поколений
+                for venue_id in venue_ids:
+                    pipe.incr(self.item_generation_key(venue_id))
+                pipe.incr(LIST_GENERATION_KEY)
+                pipe.execute()
+        except redis.RedisError as e:
+            self._failed(e)
+
+
+response_cache = ResponseCache()
+
+
+def cached_json_response(request: Request, key: Optional[str],
+                         build: Callable[[], Tuple[Any, Dict[str, str]]]) -> Response:
+    """
+    Ответ из кэша или построенный `build()` (данные и заголовки) с записью в кэш.
+
+    В ответе всегда есть ETag; при совпадении If-None-Match - 304 без тела.
+    """
+    entry = response_cache.get(key)
+    if entry is None:
+        payload, headers = build()
+        body = json.dumps(jsonable_encoder(payload), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        entry = {"etag": make_etag(body), "body": body, "headers": headers}
+        response_cache.set(key, entry)
+
+    headers = {**entry["headers"], "ETag": entry["etag"]}
+    if etag_matches(request, entry["etag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=entry["body"], media_type="application/json", headers=headers)
@@ -0,0 +1,108 @@
+import re
+from typing import List, Tuple
+
+from sqlalchemy import inspect, text
+
+# Полнотекстовый индекс заведений (SQLite FTS5). Таблица хранит собственную
+# копию текста: адрес и отзывы берутся из parsed_data, которого нет среди
+# столбцов venues, поэтому external content не подходит. rowid = venues.id.
+# unicode61 с remove_diacritics приводит регистр кириллицы и «ё» к «е»;
+# prefix-индексы ускоряют запросы по началу слова.
+FTS_TABLE = "venues_fts"
+
+# Вес столбцов в BM25: совпадение в названии важнее, чем в отзывах
+BM25_WEIGHTS = {"name": 10.0, "category": 5.0, "description": 2.0, "address": 2.0, "reviews": 1.0}
+
+_VENUE_TEXT = """
+    {row}.name,
+    {row}.category,
+    {row}.description,
+    json_extract({row}.parsed_data, '$.address'),
+    (SELECT group_concat(value, ' ') FROM json_each({row}.parsed_data, '$.reviews'))
+"""
+
+SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        name, category, description, address, reviews,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS venues_fts_insert AFTER INSERT ON venues BEGIN
+        INSERT INTO {FTS_TABLE} (rowid, name, category, description, address, reviews)
+        VALUES (new.id, {_VENUE_TEXT.format(row="new")});
+    END""",
+    # Обновление рейтинга и служебных полей не переиндексирует текст
+    f"""CREATE TRIGGER IF NOT EXISTS venues_fts_update
+        AFTER UPDATE OF name, category, description, parsed_data ON venues BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+        INSERT INTO {FTS_TABLE} (rowid, name, category, description, address, reviews)
+        VALUES (new.id, {_VENUE_TEXT.format(row="new")});
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS venues_fts_delete AFTER DELETE ON venues BEGIN
+        DELETE FROM {FTS_TABLE} WHERE rowid = old.id;
+    END""",
+]
+
+REBUILD = f"""
+    INSERT INTO {FTS_TABLE} (rowid, name, category, description, address, reviews)
+    SELECT venues.id, {_VENUE_TEXT.format(row="venues")} FROM venues
+"""
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def create_search_index(engine) -> bool:
+    """
+    Создание индекса FTS5 и триггеров синхронизации с venues.
+
+    При первом создании индекс заполняется уже сохраненными заведениями.
+
+    Returns:
+        bool: True, если индекс был создан
+    """
+    created = not inspect(engine).has_table(FTS_TABLE)
+    with engine.begin() as connection:
+        for statement in SCHEMA:
+            connection.execute(text(statement))
+        if created:
+            connection.execute(text(REBUILD))
+    if created:
+        print(f"Создан полнотекстовый индекс {FTS_TABLE}")
+    return created
+
+
+def match_expression(query: str) -> str:
+    """
+    Запрос FTS5 из пользовательской строки: все слова обязательны,
+    каждое ищется по началу («пиц» найдет «пиццерия»).
+    Спецсимволы синтаксиса FTS5 отбрасываются.
+    """
+    return " ".join(f'"{token}"*' for token in _TOKEN.findall(query or ""))
+
+
+def search_venue_ids(db, query: str, limit: int = 20, offset: int = 0,
+                     verified_only: bool = True) -> List[Tuple[int, str, float]]:
+    """
+    Поиск заведений по тексту с ранжированием BM25.
+
+    Returns:
+        List[Tuple[int, str, float]]: ID заведения, фрагмент с подсветкой
+        совпадений и оценка релевантности (меньше - релевантнее)
+    """
+    expression = match_expression(query)
+    if not expression:
+        return []
+
+    weights = ", ".join(str(weight) for weight in BM25_WEIGHTS.values())
+    rows = db.execute(text(f"""
+        SELECT venues.id,
+               snippet({FTS_TABLE}, -1, '<b>', '</b>', '…', 16) AS snippet,
+               bm25({FTS_TABLE}, {weights}) AS score
+        FROM {FTS_TABLE}
+        JOIN venues ON venues.id = {FTS_TABLE}.rowid
+        WHERE {FTS_TABLE} MATCH :expression
+          AND (:verified_only = 0 OR venues.is_verified = 1)
+        ORDER BY score
+        LIMIT :limit OFFSET :offset
+    """), {"expression": expression, "verified_only": int(verified_only), "limit": limit, "offset": offset})
+    return [(row.id, row.snippet, row.score) for row in rows]
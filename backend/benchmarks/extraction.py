@@ -0,0 +1,145 @@
+#!/usr/bin/env python
+"""
+Микробенчмарк извлечения полей из сохраненных страниц Яндекс.Карт.
+
+Сравниваются два способа на корпусе фикстур (benchmarks/fixtures/ymaps):
+    - текущий: BeautifulSoup(html, "lxml") + методы InfoGetter, каждый из
+      которых обходит все дерево через find_all;
+    - однопроходный: `app.rag.extractor` (один разбор lxml и скомпилированные
+      XPath-выражения).
+
+Для каждой страницы проверяется совпадение результатов и измеряется
+среднее время извлечения. При расхождении результатов скрипт завершается
+с ненулевым кодом.
+
+Пример:
+    python benchmarks/extraction.py --repeat 50 --output extraction.json
+"""
+import argparse
+import glob
+import json
+import os
+import platform
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bs4 import BeautifulSoup
+
+from app.rag.extractor import parse_html, extract_org, extract_reviews, extract_reviews_count
+from app.rag.parser import InfoGetter
+from benchmarks.ymaps_fixtures import FIXTURES_DIR
+
+
+def reference_org(page_html: str) -> dict:
+    """Извлечение полей карточки текущим способом."""
+    soup = BeautifulSoup(page_html, "lxml")
+    return {
+        "name": InfoGetter.get_name(soup),
+        "category": InfoGetter.get_catergory(soup),
+        "address": InfoGetter.get_address(soup),
+        "website": InfoGetter.get_website(soup),
+        "opening_hours": InfoGetter.get_opening_hours(soup),
+        "rating": InfoGetter.get_rating(soup),
+        "goods": InfoGetter.get_goods(soup),
+    }
+
+
+def reference_reviews(page_html: str) -> dict:
+    """Счетчик и тексты отзывов так, как их разбирает `InfoGetter.get_reviews`."""
+    soup = BeautifulSoup(page_html, "lxml")
+    counters = soup.find_all("div", {"class": "tabs-select-view__counter"})
+    try:
+        count = int(counters[-1].text) if counters else None
+    except ValueError:
+        count = 0
+    reviews = [data.getText() for data in soup.find_all("span", {"class": "spoiler-view__text-container"})]
+    return {"reviews_count": count, "reviews": reviews}
+
+
+def single_pass_reviews(page_html: str) -> dict:
+    tree = parse_html(page_html)
+    return {"reviews_count": extract_reviews_count(tree), "reviews": extract_reviews(tree)}
+
+
+def measure(func, page_html: str, repeat: int) -> float:
+    """Среднее время вызова в миллисекундах."""
+    started = time.perf_counter()
+    for _ in range(repeat):
+        func(page_html)
+    return (time.perf_counter() - started) * 1000 / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Каталог с org_*.html и reviews_*.html")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--output", help="Путь для сохранения отчета в JSON")
+    args = parser.parse_args()
+
+    paths = sorted(glob.glob(os.path.join(args.fixtures, "*.html")))
+    if not paths:
+        print(f"❌ Фикстуры не найдены в {args.fixtures} (см. benchmarks/ymaps_fixtures.py)")
+        sys.exit(1)
+
+    report = {
+        "benchmark": "extraction",
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": {"python": platform.python_version(), "machine": platform.machine()},
+        "repeat": args.repeat,
+        "results": [],
+    }
+    mismatches = 0
+    total_reference = total_single_pass = 0.0
+
+    for path in paths:
+        name = os.path.basename(path)
+        with open(path, encoding="utf-8") as f:
+            page_html = f.read()
+
+        if name.startswith("reviews"):
+            reference, single_pass = reference_reviews, single_pass_reviews
+        else:
+            reference, single_pass = reference_org, extract_org
+
+        equal = reference(page_html) == single_pass(page_html)
+        mismatches += int(not equal)
+
+        reference_ms = measure(reference, page_html, args.repeat)
+        single_pass_ms = measure(single_pass, page_html, args.repeat)
+        total_reference += reference_ms
+        total_single_pass += single_pass_ms
+
+        result = {
+            "fixture": name,
+            "bytes": len(page_html.encode("utf-8")),
+            "equal_output": equal,
+            "reference_ms": reference_ms,
+            "single_pass_ms": single_pass_ms,
+            "speedup": reference_ms / single_pass_ms if single_pass_ms else None,
+        }
+        report["results"].append(result)
+        status = "✅" if equal else "❌"
+        print(f"{status} {name}: InfoGetter {reference_ms:.2f} мс, однопроходный {single_pass_ms:.2f} мс "
+              f"(x{result['speedup']:.1f})")
+
+    report["total"] = {
+        "reference_ms": total_reference,
+        "single_pass_ms": total_single_pass,
+        "speedup": total_reference / total_single_pass if total_single_pass else None,
+        "mismatches": mismatches,
+    }
+    print(json.dumps(report["total"], ensure_ascii=False, indent=4))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+        print(f"✅ Результаты сохранены в {args.output}")
+
+    if mismatches:
+        print(f"❌ Результаты различаются на {mismatches} страницах")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+"""
+Детерминированная локальная функция эмбеддингов для бенчмарков.
+
+Тексты разбиваются на слова, каждое слово хешируется в одну из `size`
+координат со знаком (feature hashing), вектор нормализуется. Тексты с общими
+словами получают близкие векторы, поэтому поиск ведет себя правдоподобно,
+а результаты воспроизводимы между запусками и не требуют LocalAI.
+"""
+import hashlib
+import re
+from typing import List
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+class HashEmbeddings(Embeddings):
+
+    def __init__(self, size: int = 128):
+        self.size = size
+        self._cache = {}
+
+    def _token(self, token: str):
+        cached = self._cache.get(token)
+        if cached is None:
+            digest = hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest()
+            value = int.from_bytes(digest, "little")
+            cached = (value % self.size, 1.0 if (value >> 63) & 1 else -1.0)
+            if len(self._cache) < 1_000_000:
+                self._cache[token] = cached
+        return cached
+
+    def embed_matrix(self, texts: List[str]) -> np.ndarray:
+        """Эмбеддинги текстов в виде матрицы float32 (строки нормализованы)."""
+        matrix = np.zeros((len(texts), self.size), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for token in TOKEN_RE.findall(text.lower()):
+                column, sign = self._token(token)
+                matrix[row, column] += sign
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return matrix / norms
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_matrix(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_matrix([text])[0].tolist()
@@ -0,0 +1,122 @@
+#!/usr/bin/env python
+"""
+Сравнение int8-квантованной реплики индекса с float32-базой.
+
+Запросы строятся из сохраненных векторов корпуса с добавлением шума
+(или берутся из текстового файла и эмбеддятся через LocalAI), эталонный
+top-k считается точным перебором по float32-матрице. Для обоих режимов
+выводятся recall@k, задержки p50/p99 и объем просматриваемой матрицы.
+
+Пример:
+    python benchmarks/quantization.py --k 10 --queries 200 --output quantization.json
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from app.rag.vector_index import MemmapVectorIndex
+
+
+def build_queries(index: MemmapVectorIndex, count: int, noise: float, seed: int) -> np.ndarray:
+    """Зашумленные копии случайных векторов корпуса."""
+    rng = np.random.default_rng(seed)
+    rows = np.flatnonzero(index._alive)
+    sample = rng.choice(rows, size=min(count, len(rows)), replace=False)
+    vectors = np.asarray(index._vectors[np.sort(sample)])
+    return vectors + rng.normal(scale=noise, size=vectors.shape).astype(np.float32)
+
+
+def embed_text_queries(path: str) -> np.ndarray:
+    """Эмбеддинги текстовых запросов (по одному на строку) через LocalAI."""
+    from app.rag.chroma_manager import ChromaManager
+
+    with open(path, encoding="utf-8") as f:
+        queries = [line.strip() for line in f if line.strip()]
+    embeddings = ChromaManager().embedding_function.embed_documents(queries)
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def run_mode(index: MemmapVectorIndex, queries: np.ndarray, k: int, quantized: bool):
+    results, latencies = [], []
+    for query in queries:
+        started = time.perf_counter()
+        found = index.search(query, k=k, quantized=quantized)
+        latencies.append((time.perf_counter() - started) * 1000)
+        results.append([item["id"] for item in found])
+    return results, latencies
+
+
+def recall_at_k(results, reference) -> float:
+    hits = sum(len(set(found) & set(expected)) for found, expected in zip(results, reference))
+    total = sum(len(expected) for expected in reference)
+    return hits / total if total else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--index-dir", default=settings.VECTOR_INDEX_DIR)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200, help="Количество синтетических запросов")
+    parser.add_argument("--text-queries", help="Файл с текстовыми запросами вместо синтетических")
+    parser.add_argument("--noise", type=float, default=0.05)
+    parser.add_argument("--rescore-factor", type=int, default=settings.VECTOR_INDEX_RESCORE_FACTOR)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Путь для сохранения отчета в JSON")
+    args = parser.parse_args()
+
+    # Только чтение: метрика берется из реплики, бенчмарк не очищает и не меняет ее
+    try:
+        index = MemmapVectorIndex(args.index_dir, quantization="int8", rescore_factor=args.rescore_factor,
+                                  read_only=True)
+    except FileNotFoundError as e:
+        sys.exit(str(e))
+    if len(index) == 0:
+        sys.exit(f"Реплика индекса в {args.index_dir} пуста")
+
+    if args.text_queries:
+        queries = embed_text_queries(args.text_queries)
+    else:
+        queries = build_queries(index, args.queries, args.noise, args.seed)
+
+    # Прогрев страниц memmap, чтобы первый режим не платил за чтение с диска
+    run_mode(index, queries[:5], args.k, quantized=False)
+    run_mode(index, queries[:5], args.k, quantized=True)
+
+    reference, float_latencies = run_mode(index, queries, args.k, quantized=False)
+    quantized, int8_latencies = run_mode(index, queries, args.k, quantized=True)
+
+    report = {
+        "corpus_size": len(index),
+        "dim": index.dim,
+        "k": args.k,
+        "queries": len(queries),
+        "rescore_factor": args.rescore_factor,
+        "float32": {
+            "recall_at_k": 1.0,
+            "p50_ms": float(np.percentile(float_latencies, 50)),
+            "p99_ms": float(np.percentile(float_latencies, 99)),
+            "scan_bytes": index.scan_bytes(quantized=False),
+        },
+        "int8": {
+            "recall_at_k": recall_at_k(quantized, reference),
+            "p50_ms": float(np.percentile(int8_latencies, 50)),
+            "p99_ms": float(np.percentile(int8_latencies, 99)),
+            "scan_bytes": index.scan_bytes(quantized=True),
+        },
+    }
+
+    print(json.dumps(report, ensure_ascii=False, indent=4))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+#!/usr/bin/env python
+"""
+Бенчмарк ретривала ChromaManager на синтетическом корпусе.
+
+Для каждого размера корпуса создается отдельное временное хранилище,
+в него загружаются синтетические заведения через `ChromaManager.add_venues`
+с детерминированной функцией эмбеддингов (LocalAI не нужен), после чего
+измеряются:
+    - пропускная способность загрузки (заведений в секунду);
+    - задержки `search_similar` p50/p99;
+    - recall@k относительно точного перебора;
+    - память процесса (RSS и пиковый RSS) и размер хранилища на диске.
+
+Результаты выводятся и (с --output) пишутся в JSON, чтобы прогоны можно
+было сравнивать между собой.
+
+Пример:
+    python benchmarks/retrieval.py --sizes 1000 10000 --output retrieval.json
+    python benchmarks/retrieval.py --backend memmap --sizes 100000
+"""
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from benchmarks.fake_embeddings import HashEmbeddings
+from benchmarks.synthetic import generate_venues, generate_queries
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def rss_bytes() -> int:
+    """Текущий RSS процесса."""
+    with open("/proc/self/statm") as f:
+        pages = int(f.read().split()[1])
+    return pages * os.sysconf("SC_PAGE_SIZE")
+
+
+def peak_rss_bytes() -> int:
+    """Пиковый RSS процесса (ru_maxrss в Linux указан в килобайтах)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def dir_size(path: str) -> int:
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            total += os.path.getsize(os.path.join(root, name))
+    return total
+
+
+def exact_top_k(embedder: HashEmbeddings, size: int, queries: np.ndarray, k: int, seed: int):
+    """
+    Точный top-k по всему корпусу потоковым перебором, без хранения матрицы
+    эмбеддингов корпуса в памяти.
+    """
+    from app.rag.chroma_manager import ChromaManager
+
+    best_scores = np.full((len(queries), k), -np.inf, dtype=np.float32)
+    best_ids = np.empty((len(queries), k), dtype=object)
+
+    batch, batch_ids = [], []
+
+    def flush():
+        nonlocal best_scores, best_ids
+        scores = queries @ embedder.embed_matrix(batch).T
+        merged_scores = np.concatenate([best_scores, scores], axis=1)
+        merged_ids = np.concatenate([best_ids, np.tile(np.asarray(batch_ids, dtype=object), (len(queries), 1))], axis=1)
+        order = np.argsort(-merged_scores, axis=1)[:, :k]
+        best_scores = np.take_along_axis(merged_scores, order, axis=1)
+        best_ids = np.take_along_axis(merged_ids, order, axis=1)
+        batch.clear()
+        batch_ids.clear()
+
+    for venue in generate_venues(size, seed):
+        doc_text, _ = ChromaManager.venue_document(venue)
+        batch.append(doc_text)
+        batch_ids.append(ChromaManager.venue_id(venue))
+        if len(batch) >= 4096:
+            flush()
+    if batch:
+        flush()
+
+    return [set(row) for row in best_ids]
+
+
+def run_size(size: int, args) -> dict:
+    from app.rag.chroma_manager import ChromaManager
+
+    workdir = tempfile.mkdtemp(prefix=f"bench_{size}_", dir=args.workdir)
+    # Always a local store in the working directory, even if CHROMA_HOST is configured
+    settings.CHROMA_HOST = ""
+    settings.CHROMA_PERSIST_DIR = os.path.join(workdir, "chroma")
+    settings.VECTOR_INDEX_DIR = os.path.join(workdir, "replica")
+    settings.VECTOR_INDEX_BACKEND = args.backend
+    settings.VECTOR_INDEX_QUANTIZATION = args.quantization
+
+    try:
+        embedder = HashEmbeddings(size=args.dim)
+        manager = ChromaManager(embedding_function=embedder)
+
+        print(f"🔄 [{size}] Загрузка корпуса...")
+        started = time.perf_counter()
+        ingest_stats = manager.add_venues(generate_venues(size, args.seed))
+        ingest_seconds = time.perf_counter() - started
+
+        query_texts = generate_queries(args.queries, args.seed)
+        for text in query_texts[:10]:
+            manager.search_similar(text, n_results=args.k)
+
+        print(f"🔄 [{size}] Запросы...")
+        latencies, found = [], []
+        for text in query_texts:
+            started = time.perf_counter()
+            results = manager.search_similar(text, n_results=args.k)
+            latencies.append((time.perf_counter() - started) * 1000)
+            found.append({item["id"] for item in results})
+
+        print(f"🔄 [{size}] Точный перебор для recall@k...")
+        expected = exact_top_k(embedder, size, embedder.embed_matrix(query_texts), args.k, args.seed)
+        hits = sum(len(f & e) for f, e in zip(found, expected))
+
+        return {
+            "size": size,
+            "ingest": {
+                "seconds": ingest_seconds,
+                "venues_per_second": size / ingest_seconds if ingest_seconds else None,
+                "stats": ingest_stats,
+            },
+            "query": {
+                "count": len(latencies),
+                "p50_ms": float(np.percentile(latencies, 50)),
+                "p99_ms": float(np.percentile(latencies, 99)),
+                "mean_ms": float(np.mean(latencies)),
+            },
+            "recall_at_k": hits / (len(expected) * args.k),
+            "memory": {
+                "rss_bytes": rss_bytes(),
+                "peak_rss_bytes": peak_rss_bytes(),
+                "chroma_disk_bytes": dir_size(settings.CHROMA_PERSIST_DIR),
+                "replica_disk_bytes": dir_size(settings.VECTOR_INDEX_DIR),
+            },
+        }
+    finally:
+        if not args.keep:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--backend", choices=["chroma", "memmap"], default="chroma")
+    parser.add_argument("--quantization", choices=["none", "int8"], default="none")
+    parser.add_argument("--dim", type=int, default=128, help="Размерность фиктивных эмбеддингов")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workdir", default=None, help="Каталог для временных хранилищ")
+    parser.add_argument("--keep", action="store_true", help="Не удалять хранилища после прогона")
+    parser.add_argument("--output", help="Путь для сохранения отчета в JSON")
+    args = parser.parse_args()
+
+    import chromadb
+
+    report = {
+        "benchmark": "retrieval",
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "chromadb": chromadb.__version__,
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+        },
+        "config": {
+            "backend": args.backend,
+            "quantization": args.quantization,
+            "dim": args.dim,
+            "k": args.k,
+            "queries": args.queries,
+            "seed": args.seed,
+            "hnsw": {
+                "space": settings.CHROMA_HNSW_SPACE,
+                "M": settings.CHROMA_HNSW_M,
+                "construction_ef": settings.CHROMA_HNSW_CONSTRUCTION_EF,
+                "search_ef": settings.CHROMA_HNSW_SEARCH_EF,
+            },
+        },
+        "results": [],
+    }
+
+    for size in args.sizes:
+        result = run_size(size, args)
+        report["results"].append(result)
+        print(json.dumps(result, ensure_ascii=False, indent=4))
+
+        # Отчет перезаписывается после каждого размера, чтобы долгий прогон
+        # на 1M не терял уже посчитанные результаты
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=4)
+
+    if args.output:
+        print(f"✅ Результаты сохранены в {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+Генератор синтетических заведений в формате словарей `WebParser.parse_ymaps`.
+
+Данные детерминированы (зависят только от seed и номера заведения), поэтому
+один и тот же корпус можно сгенерировать повторно, не держа его в памяти.
+"""
+import random
+from typing import Dict, Any, Iterator, List
+
+CATEGORIES = [
+    "Ресторан", "Кафе", "Бар, паб", "Кофейня", "Пиццерия", "Суши-бар",
+    "Быстрое питание", "Кондитерская", "Ночной клуб", "Караоке-клуб",
+    "Кинотеатр", "Театр", "Музей", "Парк культуры и отдыха", "Боулинг-клуб",
+]
+
+CUISINES = [
+    "итальянская", "грузинская", "японская", "русская", "французская",
+    "паназиатская", "мексиканская", "узбекская", "американская", "вегетарианская",
+]
+
+NAME_PARTS = [
+    "Лофт", "Веранда", "Пятница", "Терраса", "Дворик", "Маяк", "Сад", "Огонь",
+    "Север", "Бульвар", "Гавань", "Причал", "Купол", "Ласточка", "Самовар",
+]
+
+STREETS = [
+    "Тверская улица", "Арбат", "Никольская улица", "Покровка", "Мясницкая улица",
+    "Пятницкая улица", "Большая Дмитровка", "Садовая-Кудринская улица",
+    "Ленинский проспект", "Кутузовский проспект",
+]
+
+DISHES = [
+    "Паста карбонара", "Хачапури по-аджарски", "Рамен", "Борщ", "Стейк рибай",
+    "Том ям", "Тако", "Плов", "Бургер", "Сырники", "Капучино", "Чизкейк",
+]
+
+REVIEW_PHRASES = [
+    "Отличное место", "вкусная еда", "уютная атмосфера", "быстрое обслуживание",
+    "вежливый персонал", "немного шумно", "большие порции", "цены выше среднего",
+    "живая музыка по выходным", "удобно с детьми", "красивый вид", "долго ждали заказ",
+]
+
+OPENING_HOURS = [
+    ["Mo-Su 10:00-23:00"],
+    ["Mo-Th 12:00-00:00", "Fr-Sa 12:00-02:00", "Su 12:00-00:00"],
+    ["Mo-Fr 08:00-22:00", "Sa-Su 10:00-22:00"],
+    ["Mo-Su 00:00-24:00"],
+    ["Tu-Su 11:00-20:00"],
+]
+
+
+def generate_venue(index: int, seed: int = 42) -> Dict[str, Any]:
+    """Синтетическое заведение с номером `index`."""
+    rng = random.Random(seed * 1_000_003 + index)
+    category = rng.choice(CATEGORIES)
+    cuisine = rng.choice(CUISINES)
+    name = f"{rng.choice(NAME_PARTS)} {rng.choice(NAME_PARTS)} {index}"
+    yandex_id = str(10_000_000 + index)
+    slug = f"venue_{index}"
+
+    return {
+        "source": "ymaps",
+        "parsed_at": "2024-01-01 00:00:00",
+        "yandex_id": yandex_id,
+        "name": name,
+        "category": category,
+        "address": f"{rng.choice(STREETS)}, {rng.randint(1, 120)}",
+        "opening_hours": rng.choice(OPENING_HOURS),
+        "ypage": f"https://yandex.ru/maps/org/{slug}/{yandex_id}/",
+        "rating": f"{rng.randint(30, 50) / 10:.1f}".replace(".", ","),
+        "goods": {
+            dish: f"{rng.randint(2, 30) * 50} ₽"
+            for dish in rng.sample(DISHES, rng.randint(0, 5))
+        },
+        "reviews": [
+            f"{rng.choice(REVIEW_PHRASES)}, {rng.choice(REVIEW_PHRASES)}. Кухня {cuisine}."
+            for _ in range(rng.randint(0, 5))
+        ],
+    }
+
+
+def generate_venues(count: int, seed: int = 42) -> Iterator[Dict[str, Any]]:
+    """Поток из `count` синтетических заведений."""
+    for index in range(count):
+        yield generate_venue(index, seed)
+
+
+def generate_queries(count: int, seed: int = 7) -> List[str]:
+    """Пользовательские запросы в стиле чата рекомендаций."""
+    rng = random.Random(seed)
+    templates = [
+        "{category} где {phrase}",
+        "Посоветуй {category} рядом с {street}",
+        "Где поесть {dish}",
+        "{category}, {cuisine} кухня, {phrase}",
+    ]
+    return [
+        rng.choice(templates).format(
+            category=rng.choice(CATEGORIES).lower(),
+            phrase=rng.choice(REVIEW_PHRASES).lower(),
+            street=rng.choice(STREETS),
+            dish=rng.choice(DISHES).lower(),
+            cuisine=rng.choice(CUISINES),
+        )
+        for _ in range(count)
+    ]
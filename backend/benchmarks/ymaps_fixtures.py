@@ -0,0 +1,184 @@
+#!/usr/bin/env python
+"""
+Генератор HTML-фикстур страниц Яндекс.Карт для бенчмарка извлечения.
+
+Страницы повторяют разметку, которую читает парсер (классы карточки,
+меню в виде витрины и списка, рейтинг из нескольких фрагментов, счетчик
+и тексты отзывов), и окружены «шумом» типичной страницы: вложенные блоки,
+иконки, скрипты с состоянием приложения. Содержимое берется из
+синтетических заведений, поэтому фикстуры детерминированы.
+
+Сохраненные страницы лежат в benchmarks/fixtures/ymaps; в тот же каталог
+можно добавить реальные страницы (org_*.html, reviews_*.html), например
+из хранилища снимков.
+
+Пример:
+    python benchmarks/ymaps_fixtures.py --output benchmarks/fixtures/ymaps
+"""
+import argparse
+import html
+import json
+import os
+import random
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_venue, REVIEW_PHRASES
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "ymaps")
+
+ICON = '<svg class="inline-image _loaded" width="16" height="16" viewBox="0 0 16 16"><path d="M8 1l2 5h5l-4 3 2 5-5-3-5 3 2-5-4-3h5z"/></svg>'
+
+
+def noise(rng: random.Random, blocks: int) -> str:
+    """Разметка, не относящаяся к извлекаемым полям."""
+    parts = []
+    for i in range(blocks):
+        parts.append(
+            f'<div class="card-feature-view _view_normal _size_large" data-index="{i}">'
+            f'<div class="card-feature-view__icon">{ICON}</div>'
+            f'<div class="card-feature-view__content"><div class="card-feature-view__wrapper">'
+            f'<span class="card-feature-view__text">{html.escape(rng.choice(REVIEW_PHRASES))}</span>'
+            f'<a class="card-feature-view__link" href="/maps/?feature={i}">Подробнее</a>'
+            f'</div></div></div>'
+        )
+    return "\n".join(parts)
+
+
+def app_state_script(rng: random.Random, size: int) -> str:
+    """Скрипт с сериализованным состоянием приложения, как на реальных страницах."""
+    state = {"config": {"requestId": rng.getrandbits(64), "experiments": [rng.getrandbits(32) for _ in range(size)]}}
+    return f'<script type="application/json" class="state-view">{json.dumps(state)}</script>'
+
+
+def page(title: str, body: str, rng: random.Random, noise_blocks: int) -> str:
+    return (
+        '<!DOCTYPE html>\n<html lang="ru"><head><meta charset="utf-8">'
+        f'<title>{html.escape(title)} — Яндекс Карты</title>'
+        '<link rel="stylesheet" href="/maps/build/client/desktop.css">'
+        '<script>window.__ym_start = Date.now();</script></head>'
+        '<body class="body _desktop"><div class="app"><div class="sidebar-view _name_orgpage">'
+        f'<div class="scroll__container"><div class="scroll__content">{body}'
+        f'{noise(rng, noise_blocks)}</div>'
+        '<div class="scroll__scrollbar"><div class="scroll__scrollbar-thumb"></div></div></div>'
+        f'</div><div class="map-container"></div></div>{app_state_script(rng, noise_blocks * 4)}</body></html>'
+    )
+
+
+def rating_markup(rating: str) -> str:
+    # Рейтинг на странице разбит на фрагменты: целая часть, разделитель, дробная часть
+    return "".join(
+        f'<span class="business-summary-rating-badge-view__rating-text">{html.escape(part)}</span>'
+        for part in rating
+    )
+
+
+def org_page(index: int, menu: str = "photo", minimal: bool = False, noise_blocks: int = 150) -> str:
+    venue = generate_venue(index)
+    rng = random.Random(index)
+    name = html.escape(venue["name"])
+
+    parts = [
+        '<div class="orgpage-header-view"><div class="orgpage-header-view__wrapper">'
+        f'<h1 class="orgpage-header-view__header" itemprop="name">{name}<!-- noindex --></h1>'
+        '</div></div>',
+        '<div class="breadcrumbs-view">'
+        '<a class="breadcrumbs-view__breadcrumb _outline" href="/maps/213/moscow/">Москва</a>'
+        f'<a class="breadcrumbs-view__breadcrumb _outline" href="/maps/213/moscow/category/">'
+        f'{html.escape(venue["category"])}</a>'
+        '<a class="breadcrumbs-view__breadcrumb" href="#">Еще</a></div>',
+    ]
+
+    if not minimal:
+        parts.append(
+            '<div class="business-summary-rating-badge-view">'
+            f'{rating_markup(venue["rating"])}'
+            '<span class="business-summary-rating-badge-view__rating-count">оценок</span></div>'
+        )
+        parts.append(
+            '<div class="business-contacts-view">'
+            f'<a class="business-contacts-view__address-link" href="/maps/?text=addr">'
+            f'{html.escape(venue["address"])}</a>'
+            '<div class="business-urls-view"><span class="business-urls-view__text">'
+            f'venue{index}.ru</span></div></div>'
+        )
+        parts.append("".join(
+            f'<meta itemprop="openingHours" content="{html.escape(hours)}"/>'
+            for hours in venue["opening_hours"]
+        ))
+
+    dishes = list(venue["goods"].items()) or [("Лимонад", "300 ₽")]
+    if menu == "photo":
+        parts.append('<div class="card-feature-view__main-content">Меню</div><div class="related-items-view">' + "".join(
+            '<div class="related-item-photo-view">'
+            f'<div class="related-item-photo-view__title">{html.escape(dish)}</div>'
+            f'<span class="related-product-view__price">{html.escape(price)}</span></div>'
+            for dish, price in dishes
+        ) + '</div>')
+    elif menu == "list":
+        parts.append('<div class="card-feature-view__main-content">Товары и услуги</div><div class="related-items-view">' + "".join(
+            '<div class="related-item-list-view">'
+            f'<div class="related-item-list-view__title">{html.escape(dish)}</div>'
+            f'<div class="related-item-list-view__price">{html.escape(price)}</div></div>'
+            for dish, price in dishes
+        ) + '</div>')
+
+    parts.append(
+        '<div class="tabs-select-view"><div class="tabs-select-view__title">Обзор</div>'
+        '<div class="tabs-select-view__title">Отзывы<div class="tabs-select-view__counter">'
+        f'{rng.randint(5, 400)}</div></div></div>'
+    )
+    return page(venue["name"], "".join(parts), rng, noise_blocks)
+
+
+def reviews_page(index: int, count: int = 20, counter: str = None, noise_blocks: int = 100) -> str:
+    venue = generate_venue(index)
+    rng = random.Random(index + 1)
+    counter = str(count * 10) if counter is None else counter
+
+    reviews = []
+    for i in range(count):
+        text = f"{rng.choice(REVIEW_PHRASES)}, {rng.choice(REVIEW_PHRASES)}. " * rng.randint(1, 6)
+        reviews.append(
+            '<div class="business-review-view"><div class="business-review-view__info">'
+            f'<div class="business-review-view__author">Гость {i}</div>'
+            '<div class="business-review-view__body"><div class="spoiler-view">'
+            f'<span class="spoiler-view__text-container">{html.escape(text.strip())}'
+            '<span class="spoiler-view__emoji">😊</span></span></div>'
+            '<div class="business-review-view__expand">Ещё</div></div></div></div>'
+        )
+
+    body = (
+        f'<h1 class="orgpage-header-view__header">{html.escape(venue["name"])}</h1>'
+        f'<div class="tabs-select-view__title">Отзывы<div class="tabs-select-view__counter">{counter}</div></div>'
+        + "".join(reviews)
+    )
+    return page(venue["name"], body, rng, noise_blocks)
+
+
+FIXTURES = {
+    "org_photo_menu.html": lambda: org_page(1, menu="photo"),
+    "org_list_menu.html": lambda: org_page(2, menu="list"),
+    "org_no_menu.html": lambda: org_page(3, menu=None),
+    "org_minimal.html": lambda: org_page(4, menu=None, minimal=True, noise_blocks=40),
+    "reviews_many.html": lambda: reviews_page(5, count=40),
+    "reviews_few.html": lambda: reviews_page(6, count=3, counter="много"),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--output", default=FIXTURES_DIR)
+    args = parser.parse_args()
+
+    os.makedirs(args.output, exist_ok=True)
+    for filename, render in FIXTURES.items():
+        path = os.path.join(args.output, filename)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(render())
+        print(f"✅ {path} ({os.path.getsize(path)} байт)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,250 @@
+#!/usr/bin/env python
+"""
+Query plan regression check for the API endpoints.
+
+Creates a temporary SQLite database (schema from init_db: create_all and
+migrations), fills it with synthetic venues, users, chats and ratings,
+calls the hot-path endpoints through the FastAPI test client and runs
+EXPLAIN QUERY PLAN on every SQL statement they execute. Exits with status 1
+if any statement reads a table with a full scan or walks a whole index, so
+an index dropped from a migration or a query rewritten so that it no longer
+uses its index fails the build. An endpoint that runs the same statement
+more than MAX_REPEATED_STATEMENTS times (an N+1 over a relationship) fails
+as well.
+
+Endpoints that call external services (POST /api/chat/message needs the LLM,
+POST /api/chat/rate-answer writes to ClickHouse) are not exercised; the
+answer_ratings lookup is covered by GET /api/users/me/stats.
+
+Example:
+    python check_query_plans.py
+    python check_query_plans.py --verbose
+"""
+import argparse
+import os
+import re
+import shutil
+import sqlite3
+import sys
+import tempfile
+from collections import Counter
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+WORKDIR = tempfile.mkdtemp(prefix="query_plans_")
+DATABASE_PATH = os.path.join(WORKDIR, "plans.db")
+# Settings are read at import time: point the app at the temporary database
+# and disable the response cache, so every request reaches SQLite
+os.environ["DATABASE_URL"] = f"sqlite:///{DATABASE_PATH}"
+os.environ["RESPONSE_CACHE_ENABLED"] = "false"
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app import models
+from app.auth import create_access_token
+from app.database import SessionLocal, engine, init_db
+from app.main import app
+from app.rag.ingestion import upsert_venue_rows
+from app.utils.pagination import NEXT_CURSOR_HEADER
+from benchmarks.synthetic import generate_venues
+
+# "SCAN <table>" ("SCAN TABLE <table>" before SQLite 3.36) reads every row,
+# "SCAN <table> USING [COVERING] INDEX" walks the whole index: hot-path
+# queries must SEARCH an index instead. Virtual tables (FTS5, R*Tree) are fine
+FULL_SCAN = re.compile(r"^SCAN (?:TABLE )?(\w+)(?: AS \w+)?(?: USING (?:COVERING )?INDEX \w+)?$")
+TEMP_BTREE = "USE TEMP B-TREE"
+
+# More executions of one statement per request are reported as an N+1
+MAX_REPEATED_STATEMENTS = 3
+
+# Small dictionary tables that are scanned on purpose
+ALLOWED_SCANS = {
+    "category_aliases": "substring match over the category dictionary",
+}
+
+STATEMENT_KINDS = ("SELECT", "UPDATE", "DELETE", "INSERT", "WITH")
+
+
+class StatementRecorder:
+    """Collects SQL statements executed by the application engine."""
+
+    def __init__(self):
+        self.statements = []
+        event.listen(engine, "before_cursor_execute", self.record)
+
+    def record(self, connection, cursor, statement, parameters, context, executemany):
+        if not statement.lstrip().upper().startswith(STATEMENT_KINDS):
+            return
+        if executemany:
+            parameters = parameters[0] if parameters else ()
+        self.statements.append((statement, parameters))
+
+    def take(self):
+        statements, self.statements = self.statements, []
+        return statements
+
+
+def seed(venue_count: int):
+    """Synthetic data so that every endpoint runs its full set of queries."""
+    db = SessionLocal()
+    try:
+        upsert_venue_rows(db, list(generate_venues(venue_count)))
+        db.query(models.Venue).filter(models.Venue.id % 2 == 0).update(
+            {"is_verified": True}, synchronize_session=False
+        )
+
+        users = [
+            models.User(username=f"user{i}", email=f"user{i}@example.com", hashed_password="-",
+                        role="admin" if i == 0 else "user")
+            for i in range(5)
+        ]
+        db.add_all(users)
+        db.flush()
+
+        venue_ids = [venue_id for venue_id, in db.query(models.Venue.id).filter(models.Venue.is_verified == True).limit(50)]
+        for user in users:
+            for i in range(30):
+                db.add(models.ChatHistory(user_id=user.id, session_id=f"session-{user.id}-{i % 3}",
+                                          message=f"Вопрос {i}", response=f"Ответ {i}"))
+            for i, venue_id in enumerate(venue_ids):
+                if (i + user.id) % 2:
+                    db.add(models.VenueRating(user_id=user.id, venue_id=venue_id, rating=1 + i % 5,
+                                              review="Отзыв", is_moderated=(i + user.id) % 3 != 0))
+        db.flush()
+        for chat in db.query(models.ChatHistory).filter(models.ChatHistory.id % 5 == 0):
+            db.add(models.AnswerRating(user_id=chat.user_id, chat_id=chat.id, rating=4))
+        db.add(models.CrawlJob(city="Москва", category="Кафе", max_items=10))
+        db.commit()
+        # Has two moderated reviews and no rating from user1
+        return venue_ids[1]
+    finally:
+        db.close()
+
+
+def run_requests(client: TestClient, venue_id: int):
+    """Calls the endpoints; yields the label of each request once it has finished."""
+    user = {"Authorization": f"Bearer {create_access_token({'sub': 'user1'})}"}
+    admin = {"Authorization": f"Bearer {create_access_token({'sub': 'user0'})}"}
+
+    def call(method, url, headers=None, **kwargs):
+        response = client.request(method, url, headers=headers, **kwargs)
+        if response.status_code >= 400:
+            raise RuntimeError(f"{method} {url}: {response.status_code} {response.text}")
+        return response
+
+    response = call("GET", "/api/venues/?limit=5")
+    yield "GET /api/venues/"
+    call("GET", f"/api/venues/?limit=5&cursor={response.headers[NEXT_CURSOR_HEADER]}")
+    yield "GET /api/venues/?cursor="
+    call("GET", "/api/venues/?category=Кафе&min_rating=1&limit=5")
+    yield "GET /api/venues/?category=&min_rating="
+    call("GET", "/api/venues/?open_now=true&limit=5")
+    yield "GET /api/venues/?open_now=true"
+    call("GET", "/api/venues/search?q=кафе")
+    yield "GET /api/venues/search"
+    call("GET", "/api/venues/nearby?lat=55.75&lon=37.62&radius_m=2000")
+    yield "GET /api/venues/nearby"
+    call("GET", f"/api/venues/{venue_id}")
+    yield "GET /api/venues/{id}"
+    rating = {"venue_id": venue_id, "rating": 5, "review": "Отлично"}
+    call("POST", f"/api/venues/{venue_id}/rate", headers=user, json=rating)
+    yield "POST /api/venues/{id}/rate (new)"
+    call("POST", f"/api/venues/{venue_id}/rate", headers=user, json={**rating, "rating": 4})
+    yield "POST /api/venues/{id}/rate (update)"
+    response = call("GET", f"/api/venues/{venue_id}/reviews?limit=1")
+    yield "GET /api/venues/{id}/reviews"
+    call("GET", f"/api/venues/{venue_id}/reviews?limit=1&cursor={response.headers[NEXT_CURSOR_HEADER]}")
+    yield "GET /api/venues/{id}/reviews?cursor="
+
+    call("GET", "/api/chat/history", headers=user)
+    yield "GET /api/chat/history"
+    call("GET", "/api/chat/history?session_id=session-2-1", headers=user)
+    yield "GET /api/chat/history?session_id="
+    call("GET", "/api/users/me/history", headers=user)
+    yield "GET /api/users/me/history"
+    call("GET", "/api/users/me/ratings", headers=user)
+    yield "GET /api/users/me/ratings"
+    call("GET", "/api/users/me/stats", headers=user)
+    yield "GET /api/users/me/stats"
+
+    ratings = call("GET", "/api/admin/unmoderated-ratings", headers=admin).json()
+    yield "GET /api/admin/unmoderated-ratings"
+    call("POST", f"/api/admin/moderate-rating/{ratings[0]['id']}?approve=true", headers=admin)
+    yield "POST /api/admin/moderate-rating/{id}?approve=true"
+    call("POST", f"/api/admin/moderate-rating/{ratings[1]['id']}?approve=false", headers=admin)
+    yield "POST /api/admin/moderate-rating/{id}?approve=false"
+    jobs = call("GET", "/api/admin/crawl-jobs?status=queued", headers=admin).json()
+    yield "GET /api/admin/crawl-jobs"
+    call("GET", f"/api/admin/crawl-jobs/{jobs[0]['id']}", headers=admin)
+    yield "GET /api/admin/crawl-jobs/{id}"
+    call("POST", f"/api/admin/crawl-jobs/{jobs[0]['id']}/cancel", headers=admin)
+    yield "POST /api/admin/crawl-jobs/{id}/cancel"
+
+
+def explain(connection: sqlite3.Connection, statement: str, parameters):
+    return [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--venues", type=int, default=300, help="Number of synthetic venues")
+    parser.add_argument("--verbose", action="store_true", help="Print the plan of every statement")
+    args = parser.parse_args()
+
+    try:
+        init_db()
+        venue_id = seed(args.venues)
+
+        recorder = StatementRecorder()
+        # Without the context manager the lifespan (Redis, ChromaDB, LLM cache) is not started
+        client = TestClient(app)
+        plans = sqlite3.connect(DATABASE_PATH)
+
+        failures = warnings = 0
+        for label in run_requests(client, venue_id):
+            problems, notes = [], []
+            statements = recorder.take()
+            repeats = Counter(statement for statement, _ in statements)
+            repeated = {statement: count for statement, count in repeats.items() if count > MAX_REPEATED_STATEMENTS}
+            for statement, parameters in statements:
+                plan = explain(plans, statement, parameters)
+                scans = [
+                    match.group(1) for match in map(FULL_SCAN.match, plan)
+                    if match and match.group(1) not in ALLOWED_SCANS
+                ]
+                report = (" ".join(statement.split())[:200], plan)
+                if scans:
+                    problems.append(report)
+                elif any(line.startswith(TEMP_BTREE) for line in plan):
+                    notes.append(report)
+                elif args.verbose:
+                    notes.append(report)
+
+            if problems or repeated:
+                failures += 1
+                if problems:
+                    print(f"❌ {label}: full scan in {len(problems)} of {len(statements)} statements")
+                for statement, count in repeated.items():
+                    print(f"❌ {label}: N+1, statement executed {count} times")
+                    print(f"     {' '.join(statement.split())[:200]}")
+            else:
+                warnings += any(any(line.startswith(TEMP_BTREE) for line in plan) for _, plan in notes)
+                print(f"✅ {label} ({len(statements)} statements)")
+            for statement, plan in problems + notes:
+                print(f"     {statement}")
+                for line in plan:
+                    print(f"       {'⚠️ ' if line.startswith(TEMP_BTREE) else ''}{line}")
+        plans.close()
+    finally:
+        engine.dispose()
+        shutil.rmtree(WORKDIR, ignore_errors=True)
+
+    if failures:
+        print(f"\n❌ {failures} endpoints fall back to a full scan or run N+1 queries")
+        sys.exit(1)
+    print(f"\n✅ No full scans or N+1 queries{f' ({warnings} endpoints sort with a temp B-tree)' if warnings else ''}")
+
+
+if __name__ == "__main__":
+    main()
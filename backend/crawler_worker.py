@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+Crawl job worker: runs parsing jobs queued through the admin API.
+
+Polls the crawl_jobs table every CRAWL_JOB_POLL_INTERVAL seconds, claims the
+oldest queued job and runs it (parser + streaming ingestion) in this process,
+saving progress and checking for cancellation every
+CRAWL_JOB_HEARTBEAT_INTERVAL seconds. Several workers may run at once.
+
+On SIGTERM/SIGINT the current job is stopped, the venues parsed so far are
+stored, and the job goes back to the queue; the next worker resumes it from
+the crawl checkpoint.
+
+Example:
+    python crawler_worker.py
+    python crawler_worker.py --once
+"""
+import argparse
+import os
+import signal
+import sys
+from threading import Event
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.database import init_db
+from app.rag.crawl_jobs import CrawlJobQueue, default_worker_id, run_job
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--worker-id", default=default_worker_id())
+    parser.add_argument("--once", action="store_true", help="Run at most one job and exit")
+    args = parser.parse_args()
+
+    init_db()
+    queue = CrawlJobQueue()
+    shutdown = Event()
+
+    def stop(signum, frame):
+        print(f"🛑 Signal {signum} received, stopping after the current venue...")
+        shutdown.set()
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    print(f"🚀 Crawler worker {args.worker_id} started")
+    while not shutdown.is_set():
+        job = queue.claim(args.worker_id)
+        if job is None:
+            if args.once:
+                break
+            shutdown.wait(settings.CRAWL_JOB_POLL_INTERVAL)
+            continue
+
+        print(f"🔄 Job #{job['id']} claimed")
+        status = run_job(queue, job, args.worker_id, shutdown=shutdown)
+        print(f"✅ Job #{job['id']} finished: {status}")
+        if args.once:
+            break
+
+    print("👋 Crawler worker stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python
+"""
+Нагрузочный драйвер для сквозного сценария чата.
+
+Каждый виртуальный пользователь регистрируется, входит в систему и отправляет
+серию сообщений в /api/chat/message. Часть сообщений повторяется из небольшого
+«горячего» набора, чтобы нагружать семантический кэш. Прогоняются все
+комбинации параметров --users/--latency-ms/--token-rate; параметры заглушки
+LocalAI (loadtest/stub_server.py) выставляются перед каждым прогоном.
+
+По каждой конфигурации выводятся пропускная способность, задержки
+p50/p95/p99 по шагам, доля ошибок и доля попаданий в кэш. Доля попаданий
+считается по заглушке: каждое сообщение, для которого не было вызова
+LLM-модели, обслужено из кэша. Полный отчет выводится в конце прогона
+или (с --output) пишется в JSON.
+
+Пример:
+    python loadtest/driver.py --users 10 50 --messages 5 --latency-ms 100 500 --output load.json
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import sys
+import time
+import uuid
+from collections import Counter, defaultdict
+
+import httpx
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from benchmarks.synthetic import generate_queries
+
+
+class Recorder:
+    """Сбор задержек и ошибок по шагам сценария."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(Counter)
+        self.counts = Counter()
+
+    async def call(self, step: str, request):
+        started = time.perf_counter()
+        try:
+            response = await request
+        except httpx.HTTPError as e:
+            self.counts[step] += 1
+            self.errors[step][type(e).__name__] += 1
+            return None
+        self.latencies[step].append((time.perf_counter() - started) * 1000)
+        self.counts[step] += 1
+        if response.status_code >= 400:
+            self.errors[step][str(response.status_code)] += 1
+            return None
+        return response
+
+    def summary(self) -> dict:
+        result = {}
+        for step, count in self.counts.items():
+            latencies = self.latencies[step]
+            errors = sum(self.errors[step].values())
+            result[step] = {
+                "requests": count,
+                "errors": dict(self.errors[step]),
+                "error_rate": errors / count if count else 0.0,
+                "p50_ms": float(np.percentile(latencies, 50)) if latencies else None,
+                "p95_ms": float(np.percentile(latencies, 95)) if latencies else None,
+                "p99_ms": float(np.percentile(latencies, 99)) if latencies else None,
+            }
+        return result
+
+
+async def run_user(client: httpx.AsyncClient, recorder: Recorder, run_id: str, user_index: int, messages, args):
+    username = f"load_{run_id}_{user_index}"
+    password = "loadtest123"
+
+    await recorder.call("register", client.post("/api/users/register", json={
+        "username": username,
+        "email": f"{username}@loadtest.local",
+        "password": password,
+    }))
+
+    response = await recorder.call("login", client.post("/api/users/login", json={
+        "username": username,
+        "password": password,
+    }))
+    if response is None:
+        return 0
+
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+    session_id = str(uuid.uuid4())
+    sent = 0
+    for message in messages:
+        response = await recorder.call("chat", client.post(
+            "/api/chat/message",
+            json={"message": message, "session_id": session_id},
+            headers=headers,
+        ))
+        if response is not None:
+            sent += 1
+    return sent
+
+
+def build_messages(args, user_index: int, hot_set, rng: random.Random):
+    unique = generate_queries(args.messages, seed=args.seed * 10_000 + user_index)
+    return [rng.choice(hot_set) if rng.random() < args.repeat_ratio else text for text in unique]
+
+
+def llm_calls(stats: dict) -> int:
+    return sum(value for key, value in stats.items() if key.endswith(f":{settings.LLM_MODEL}"))
+
+
+async def run_config(args, users: int, latency_ms: float, token_rate: float) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    rng = random.Random(args.seed)
+    hot_set = generate_queries(args.hot_queries, seed=args.seed)
+
+    async with httpx.AsyncClient(base_url=args.stub_url, timeout=args.timeout) as stub:
+        current = (await stub.get("/stub/config")).json()
+        current.update({"latency_ms": latency_ms, "token_rate": token_rate})
+        await stub.post("/stub/config", json=current)
+        await stub.post("/stub/reset")
+
+    recorder = Recorder()
+    limits = httpx.Limits(max_connections=users, max_keepalive_connections=users)
+    async with httpx.AsyncClient(base_url=args.base_url, timeout=args.timeout, limits=limits) as client:
+        started = time.perf_counter()
+        sent = await asyncio.gather(*[
+            run_user(client, recorder, run_id, i, build_messages(args, i, hot_set, rng), args)
+            for i in range(users)
+        ])
+        elapsed = time.perf_counter() - started
+
+    async with httpx.AsyncClient(base_url=args.stub_url, timeout=args.timeout) as stub:
+        stub_stats = (await stub.get("/stub/stats")).json()
+
+    chats_ok = sum(sent)
+    total_requests = sum(recorder.counts.values())
+    return {
+        "config": {
+            "users": users,
+            "messages_per_user": args.messages,
+            "latency_ms": latency_ms,
+            "token_rate": token_rate,
+            "repeat_ratio": args.repeat_ratio,
+        },
+        "elapsed_seconds": elapsed,
+        "throughput": {
+            "requests_per_second": total_requests / elapsed if elapsed else None,
+            "chat_messages_per_second": chats_ok / elapsed if elapsed else None,
+        },
+        "cache_hit_rate": max(0.0, 1 - llm_calls(stub_stats) / chats_ok) if chats_ok else None,
+        "steps": recorder.summary(),
+        "stub_stats": stub_stats,
+    }
+
+
+async def main_async(args):
+    report = {
+        "benchmark": "chat_load",
+        "created_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "base_url": args.base_url,
+        "results": [],
+    }
+    for users, latency_ms, token_rate in itertools.product(args.users, args.latency_ms, args.token_rate):
+        print(f"🔄 users={users} latency={latency_ms}ms token_rate={token_rate}/s")
+        result = await run_config(args, users, latency_ms, token_rate)
+        report["results"].append(result)
+        print(json.dumps({k: result[k] for k in ("throughput", "cache_hit_rate")}, ensure_ascii=False))
+        for step, summary in result["steps"].items():
+            print(f"   {step}: p50={summary['p50_ms']} p95={summary['p95_ms']} "
+                  f"p99={summary['p99_ms']} errors={summary['error_rate']:.2%}")
+
+        # Отчет перезаписывается после каждой конфигурации, чтобы прерванный прогон не терялся
+        if args.output:
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=4)
+
+    if args.output:
+        print(f"✅ Результаты сохранены в {args.output}")
+    else:
+        print(json.dumps(report, ensure_ascii=False, indent=4))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--stub-url", default="http://localhost:8080")
+    parser.add_argument("--users", type=int, nargs="+", default=[10])
+    parser.add_argument("--messages", type=int, default=5, help="Сообщений на пользователя")
+    parser.add_argument("--latency-ms", type=float, nargs="+", default=[200.0])
+    parser.add_argument("--token-rate", type=float, nargs="+", default=[50.0])
+    parser.add_argument("--repeat-ratio", type=float, default=0.3, help="Доля сообщений из горячего набора")
+    parser.add_argument("--hot-queries", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="Путь для сохранения отчета в JSON")
+    args = parser.parse_args()
+    asyncio.run(main_async(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python
+"""
+Локальная заглушка LocalAI с OpenAI-совместимым API для нагрузочного тестирования.
+
+Поддерживаются эндпоинты:
+    POST /v1/chat/completions   - ответ чата (в т.ч. потоковый, stream=true)
+    POST /v1/completions        - текстовое дополнение
+    POST /v1/embeddings         - детерминированные эмбеддинги
+    GET  /v1/models             - список моделей
+
+Для модели модерации (MODERATION_MODEL) всегда возвращается "safe".
+Задержка ответа складывается из фиксированной задержки и времени генерации
+токенов с заданной скоростью; параметры меняются на лету через /stub/config,
+счетчики вызовов доступны через /stub/stats.
+
+Пример:
+    python loadtest/stub_server.py --port 8080 --latency-ms 300 --token-rate 40
+    LOCALAI_BASE_URL=http://localhost:8080/v1 uvicorn app.main:app
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from collections import Counter
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from app.config import settings
+from benchmarks.fake_embeddings import HashEmbeddings
+
+WORDS = (
+    "Рекомендую обратить внимание на уютное заведение с отличной кухней "
+    "и приятной атмосферой где можно спокойно провести вечер с друзьями"
+).split()
+
+
+class StubConfig(BaseModel):
+    latency_ms: float = 200.0
+    token_rate: float = 50.0  # токенов в секунду
+    completion_tokens: int = 60
+    embedding_latency_ms: float = 20.0
+    embedding_dim: int = 768
+
+
+app = FastAPI(title="LocalAI stub")
+app.state.config = StubConfig()
+app.state.stats = Counter()
+
+
+def config() -> StubConfig:
+    return app.state.config
+
+
+def completion_text(tokens: int) -> str:
+    return " ".join(WORDS[i % len(WORDS)] for i in range(tokens))
+
+
+def is_moderation(model: Optional[str]) -> bool:
+    return bool(model) and (model == settings.MODERATION_MODEL or "guard" in model)
+
+
+async def generation_delay(tokens: int):
+    await asyncio.sleep(config().latency_ms / 1000 + tokens / max(config().token_rate, 1e-6))
+
+
+def usage(prompt: str, tokens: int) -> dict:
+    prompt_tokens = len(prompt.split())
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": tokens, "total_tokens": prompt_tokens + tokens}
+
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    model = body.get("model")
+    app.state.stats[f"chat:{model}"] += 1
+    prompt = " ".join(str(message.get("content", "")) for message in body.get("messages", []))
+
+    if is_moderation(model):
+        text, tokens = "safe", 1
+    else:
+        tokens = config().completion_tokens
+        text = completion_text(tokens)
+
+    if body.get("stream"):
+        async def events():
+            await asyncio.sleep(config().latency_ms / 1000)
+            for word in text.split(" "):
+                await asyncio.sleep(1 / max(config().token_rate, 1e-6))
+                chunk = {
+                    "id": f"chatcmpl-{uuid.uuid4().hex}",
+                    "object": "chat.completion.chunk",
+                    "created": int(time.time()),
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {"content": word + " "}, "finish_reason": None}],
+                }
+                yield f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n"
+            yield "data: [DONE]\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    await generation_delay(tokens)
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": usage(prompt, tokens),
+    }
+
+
+@app.post("/v1/completions")
+async def completions(request: Request):
+    body = await request.json()
+    model = body.get("model")
+    app.state.stats[f"completion:{model}"] += 1
+    prompt = body.get("prompt") or ""
+    prompt = " ".join(prompt) if isinstance(prompt, list) else str(prompt)
+
+    if is_moderation(model):
+        text, tokens = "safe", 1
+    else:
+        tokens = config().completion_tokens
+        text = completion_text(tokens)
+
+    await generation_delay(tokens)
+    return {
+        "id": f"cmpl-{uuid.uuid4().hex}",
+        "object": "text_completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "text": text, "finish_reason": "stop", "logprobs": None}],
+        "usage": usage(prompt, tokens),
+    }
+
+
+@app.post("/v1/embeddings")
+async def embeddings(request: Request):
+    body = await request.json()
+    model = body.get("model")
+    inputs = body.get("input") or []
+    if isinstance(inputs, str):
+        inputs = [inputs]
+    # LangChain может передавать токенизированный ввод (списки id токенов)
+    texts = [" ".join(map(str, item)) if isinstance(item, list) else str(item) for item in inputs]
+    app.state.stats[f"embeddings:{model}"] += 1
+    app.state.stats["embedded_texts"] += len(texts)
+
+    await asyncio.sleep(config().embedding_latency_ms / 1000)
+    vectors = HashEmbeddings(size=config().embedding_dim).embed_documents(texts)
+    return {
+        "object": "list",
+        "model": model,
+        "data": [{"object": "embedding", "index": i, "embedding": vector} for i, vector in enumerate(vectors)],
+        "usage": {"prompt_tokens": 0, "total_tokens": 0},
+    }
+
+
+@app.get("/v1/models")
+async def models():
+    names = [settings.LLM_MODEL, settings.MODERATION_MODEL, settings.EMBEDDING_MODEL]
+    return {"object": "list", "data": [{"id": name, "object": "model", "owned_by": "stub"} for name in names]}
+
+
+@app.get("/stub/config")
+async def get_config():
+    return config()
+
+
+@app.post("/stub/config")
+async def set_config(new_config: StubConfig):
+    app.state.config = new_config
+    return new_config
+
+
+@app.get("/stub/stats")
+async def get_stats():
+    return dict(app.state.stats)
+
+
+@app.post("/stub/reset")
+async def reset_stats():
+    app.state.stats = Counter()
+    return {"message": "ok"}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latency-ms", type=float, default=200.0)
+    parser.add_argument("--token-rate", type=float, default=50.0)
+    parser.add_argument("--completion-tokens", type=int, default=60)
+    parser.add_argument("--embedding-latency-ms", type=float, default=20.0)
+    parser.add_argument("--embedding-dim", type=int, default=768)
+    args = parser.parse_args()
+
+    app.state.config = StubConfig(
+        latency_ms=args.latency_ms,
+        token_rate=args.token_rate,
+        completion_tokens=args.completion_tokens,
+        embedding_latency_ms=args.embedding_latency_ms,
+        embedding_dim=args.embedding_dim,
+    )
+    uvicorn.run(app, host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+"""
+Rebuild the venue collection with new HNSW parameters.
+
+Copies every record (ids, embeddings, documents, metadata) of the source
+collection into a new collection created with the requested distance space,
+M, construction_ef and search_ef, without calling the embedding model.
+Recall@k against exact brute-force search and query latency are measured
+for both collections, so the new parameters can be compared before
+switching CHROMA_COLLECTION_NAME to the new collection.
+
+Example:
+    python rebuild_index.py --target venue_data_cosine --space cosine --m 32 --search-ef 64
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.rag.chroma_manager import chroma_client, collection_metadata
+
+
+def exact_neighbours(embeddings: np.ndarray, queries: np.ndarray, k: int, space: str) -> np.ndarray:
+    """Exact top-k row indices for the given distance space."""
+    if space == "cosine":
+        matrix = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+        queries = queries / np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+        distances = -(queries @ matrix.T)
+    elif space == "ip":
+        distances = -(queries @ embeddings.T)
+    else:
+        distances = (
+            (queries ** 2).sum(axis=1, keepdims=True)
+            - 2 * queries @ embeddings.T
+            + (embeddings ** 2).sum(axis=1)
+        )
+    return np.argsort(distances, axis=1)[:, :k]
+
+
+def evaluate(collection, ids, embeddings: np.ndarray, queries: np.ndarray, k: int) -> dict:
+    """Recall@k and latency of a collection against exact search."""
+    space = (collection.metadata or {}).get("hnsw:space", "l2")
+    expected = exact_neighbours(embeddings, queries, k, space)
+
+    hits, latencies = 0, []
+    for query, expected_rows in zip(queries, expected):
+        started = time.perf_counter()
+        result = collection.query(query_embeddings=[query.tolist()], n_results=k, include=[])
+        latencies.append((time.perf_counter() - started) * 1000)
+        hits += len(set(result["ids"][0]) & {ids[row] for row in expected_rows})
+
+    return {
+        "collection": collection.name,
+        "metadata": collection.metadata,
+        "recall_at_k": hits / (len(queries) * k),
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--source", default=settings.CHROMA_COLLECTION_NAME)
+    parser.add_argument("--target", required=True)
+    parser.add_argument("--space", choices=["l2", "cosine", "ip"], default=settings.CHROMA_HNSW_SPACE)
+    parser.add_argument("--m", type=int, default=settings.CHROMA_HNSW_M)
+    parser.add_argument("--construction-ef", type=int, default=settings.CHROMA_HNSW_CONSTRUCTION_EF)
+    parser.add_argument("--search-ef", type=int, default=settings.CHROMA_HNSW_SEARCH_EF)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--overwrite", action="store_true", help="Drop the target collection if it exists")
+    parser.add_argument("--output", help="Write the report to this JSON file")
+    args = parser.parse_args()
+
+    client = chroma_client()
+    source = client.get_collection(args.source)
+
+    if args.overwrite:
+        if args.target in {collection.name for collection in client.list_collections()}:
+            client.delete_collection(args.target)
+
+    target = client.create_collection(
+        args.target,
+        metadata=collection_metadata(
+            space=args.space,
+            m=args.m,
+            construction_ef=args.construction_ef,
+            search_ef=args.search_ef,
+        ),
+    )
+
+    print(f"🔄 Copying '{args.source}' into '{args.target}'...")
+    ids, embeddings = [], []
+    offset = 0
+    while True:
+        batch = source.get(
+            include=["embeddings", "documents", "metadatas"],
+            limit=args.batch_size,
+            offset=offset,
+        )
+        if not batch["ids"]:
+            break
+        target.add(
+            ids=batch["ids"],
+            embeddings=batch["embeddings"],
+            documents=batch["documents"],
+            metadatas=batch["metadatas"],
+        )
+        ids.extend(batch["ids"])
+        embeddings.extend(batch["embeddings"])
+        offset += args.batch_size
+    print(f"✅ Copied {len(ids)} records")
+
+    if not ids:
+        sys.exit("Source collection is empty, nothing to evaluate")
+
+    embeddings = np.asarray(embeddings, dtype=np.float32)
+    rng = np.random.default_rng(42)
+    sample = rng.choice(len(ids), size=min(args.queries, len(ids)), replace=False)
+    queries = embeddings[sample] + rng.normal(scale=0.01, size=(len(sample), embeddings.shape[1])).astype(np.float32)
+    k = min(args.k, len(ids))
+
+    report = {
+        "records": len(ids),
+        "k": k,
+        "queries": len(queries),
+        "before": evaluate(source, ids, embeddings, queries, k),
+        "after": evaluate(target, ids, embeddings, queries, k),
+    }
+
+    print(json.dumps(report, ensure_ascii=False, indent=4))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=4)
+
+    print(f"\n🎉 Rebuild complete! Set CHROMA_COLLECTION_NAME={args.target} to switch to the new collection.")
+
+
+if __name__ == "__main__":
+    main()
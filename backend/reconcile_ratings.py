@@ -0,0 +1,53 @@
+#!/usr/bin/env python
+"""
+Recompute venue rating aggregates (rating_sum, rating_count, rating,
+review_count) from the venue_ratings table.
+
+Ratings are maintained incrementally on every vote and moderation; this
+command finds venues whose stored aggregates drifted from the actual
+ratings (e.g. ratings removed by a cascading user delete or edited by hand)
+and rewrites them in bulk.
+
+Example:
+    python reconcile_ratings.py --dry-run
+    python reconcile_ratings.py
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.database import SessionLocal, init_db
+from app.utils.ratings import reconcile_rating_aggregates
+from app.utils.response_cache import response_cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dry-run", action="store_true", help="Only report venues with drifted aggregates")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    init_db()
+    db = SessionLocal()
+    try:
+        started = time.perf_counter()
+        venue_ids = reconcile_rating_aggregates(db, dry_run=args.dry_run, chunk_size=args.chunk_size)
+        elapsed = time.perf_counter() - started
+    finally:
+        db.close()
+
+    if not venue_ids:
+        print(f"✅ All rating aggregates are consistent ({elapsed:.2f}s)")
+    elif args.dry_run:
+        print(f"⚠️  {len(venue_ids)} venues have drifted aggregates: {venue_ids[:20]}{' ...' if len(venue_ids) > 20 else ''}")
+        sys.exit(1)
+    else:
+        response_cache.invalidate_venues(venue_ids)
+        print(f"✅ Fixed rating aggregates of {len(venue_ids)} venues ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+"""
+Re-extract venue data from stored raw page snapshots, without a browser.
+
+Runs the extractor (same output as InfoGetter) over the latest org, menu
+and reviews snapshots of every venue in SNAPSHOT_DIR using a process pool,
+and writes one venue per line to a JSONL file. Use it after a markup change
+or after adding a new field instead of re-crawling Yandex Maps.
+With --ingest the re-extracted venues are also streamed into ChromaDB and
+the relational database through the ingestion pipeline.
+
+Example:
+    python reextract_snapshots.py --output venues.jsonl --workers 8
+    python reextract_snapshots.py --ids 1234567 7654321 --ingest
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from app.config import settings
+from app.rag.snapshots import SnapshotStore, venue_from_snapshots
+
+
+def extract_one(task):
+    """Worker: re-extract one venue (runs in a separate process)."""
+    root, yandex_id = task
+    try:
+        return yandex_id, venue_from_snapshots(SnapshotStore(root), yandex_id), None
+    except Exception as e:
+        return yandex_id, None, f"{type(e).__name__}: {e}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--snapshot-dir", default=settings.SNAPSHOT_DIR)
+    parser.add_argument("--ids", nargs="+", help="Only these yandex_ids (default: every venue with snapshots)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", default="reextracted_venues.jsonl")
+    parser.add_argument("--ingest", action="store_true", help="Also upsert into ChromaDB and the database")
+    args = parser.parse_args()
+
+    store = SnapshotStore(args.snapshot_dir)
+    yandex_ids = args.ids or list(store.yandex_ids())
+    if not yandex_ids:
+        print(f"❌ No snapshots found in {args.snapshot_dir}")
+        sys.exit(1)
+
+    print(f"🔄 Re-extracting {len(yandex_ids)} venues with {args.workers} processes...")
+    stats = {"extracted": 0, "missing": 0, "failed": 0}
+    started = time.perf_counter()
+
+    def venues():
+        tasks = [(args.snapshot_dir, yandex_id) for yandex_id in yandex_ids]
+        chunksize = max(1, len(tasks) // (args.workers * 4))
+        with ProcessPoolExecutor(max_workers=args.workers) as executor, \
+                open(args.output, "w", encoding="utf-8") as f:
+            for yandex_id, venue, error in executor.map(extract_one, tasks, chunksize=chunksize):
+                if error:
+                    stats["failed"] += 1
+                    print(f"⚠️  {yandex_id}: {error}")
+                    continue
+                if venue is None:
+                    stats["missing"] += 1
+                    continue
+                stats["extracted"] += 1
+                f.write(json.dumps(venue, ensure_ascii=False) + "\n")
+                yield venue
+
+    if args.ingest:
+        from app.rag.chroma_manager import ChromaManager
+        from app.rag.ingestion import IngestionPipeline
+
+        stats["ingest"] = IngestionPipeline(ChromaManager()).run(venues())
+    else:
+        for _ in venues():
+            pass
+
+    stats["seconds"] = time.perf_counter() - started
+    print(json.dumps(stats, ensure_ascii=False, indent=4))
+    print(f"✅ Venues written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,22 @@
+from datetime import datetime
+
+from app.utils.opening_hours import is_open, parse_opening_hours
+
+# 2024-01-06 - суббота, 2024-01-07 - воскресенье
+SATURDAY_NIGHT = datetime(2024, 1, 6, 23, 0)
+SUNDAY_NIGHT = datetime(2024, 1, 7, 1, 0)
+SUNDAY_DAY = datetime(2024, 1, 7, 12, 0)
+
+
+def test_day_off_keeps_previous_overnight_hours():
+    for lines in (["Sa 20:00-04:00", "Su off"], ["Su off", "Sa 20:00-04:00"]):
+        bitmap = parse_opening_hours(lines)
+        assert is_open(bitmap, SATURDAY_NIGHT)
+        assert is_open(bitmap, SUNDAY_NIGHT)
+        assert not is_open(bitmap, SUNDAY_DAY)
+
+
+def test_day_off_overrides_own_hours():
+    bitmap = parse_opening_hours(["Mo-Su 10:00-20:00", "Su off"])
+    assert not is_open(bitmap, SUNDAY_DAY)
+    assert is_open(bitmap, datetime(2024, 1, 6, 12, 0))
@@ -0,0 +1,20 @@
+import base64
+import json
+
+import pytest
+
+from app.utils.pagination import decode_cursor, encode_cursor
+
+
+def raw_cursor(values) -> str:
+    return base64.urlsafe_b64encode(json.dumps(values).encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def test_round_trip():
+    assert decode_cursor(encode_cursor([4.5, "2024-01-01 10:00:00", 7]), 3) == [4.5, "2024-01-01 10:00:00", 7]
+
+
+@pytest.mark.parametrize("values", [[{}, 1], [[1], 1], [1.5, "7"], [1.5, True], [1.5, 7.0], [1.5]])
+def test_rejects_malformed_values(values):
+    with pytest.raises(ValueError):
+        decode_cursor(raw_cursor(values), 2)
@@ -1,4 +1,4 @@
-import React, { useState } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
 import { adminAPI } from '../../services/api';
 import './ParserControl.css';
 
@@ -7,10 +7,42 @@ const ParserControl = () => {
     city: 'Москва',
     category: 'restaurants',
     max_items: 10,
+    workers: 1,
   });
   const [parsing, setParsing] = useState(false);
   const [result, setResult] = useState(null);
   const [error, setError] = useState('');
+  const [jobs, setJobs] = useState([]);
+
+  const JOB_STATUSES = {
+    queued: { label: 'В очереди', className: 'status-running' },
+    running: { label: 'Выполняется', className: 'status-running' },
+    completed: { label: 'Завершено', className: 'status-success' },
+    failed: { label: 'Ошибка', className: 'status-error' },
+    cancelled: { label: 'Отменено', className: 'status-error' },
+  };
+
+  const loadJobs = useCallback(async () => {
+    try {
+      const response = await adminAPI.getCrawlJobs({ limit: 10 });
+      setJobs(response.data);
+    } catch (error) {
+      console.error('Не удалось загрузить задачи парсинга', error);
+    }
+  }, []);
+
+  // Прогресс задач обновляется, пока есть задачи в очереди или в работе
+  const hasActiveJobs = jobs.some(job => job.status === 'queued' || job.status === 'running');
+
+  useEffect(() => {
+    loadJobs();
+  }, [loadJobs]);
+
+  useEffect(() => {
+    if (!hasActiveJobs) return undefined;
+    const timer = setInterval(loadJobs, 3000);
+    return () => clearInterval(timer);
+  }, [hasActiveJobs, loadJobs]);
 
   /*
   const categories = [
@@ -33,9 +65,10 @@ const ParserControl = () => {
     try {
       const response = await adminAPI.parseVenues(parserConfig);
       setResult({
-        message: 'Сбор данных запущен',
-        details: 'Процесс выполняется в фоне. Результаты появятся позже'
+        message: `Задача #${response.data.job_id} поставлена в очередь`,
+        details: 'Сбор выполняет отдельный процесс, прогресс отображается ниже'
       });
+      loadJobs();
     } catch (error) {
       setError(error.response?.data?.detail || 'Не удалось запустить сбор данных');
     } finally {
@@ -43,11 +76,31 @@ const ParserControl = () => {
     }
   };
 
+  const handleCancel = async (jobId) => {
+    try {
+      await adminAPI.cancelCrawlJob(jobId);
+      loadJobs();
+    } catch (error) {
+      setError(error.response?.data?.detail || 'Не удалось отменить задачу');
+    }
+  };
+
+  const jobProgress = (job) => {
+    const progress = job.progress || {};
+    const total = progress.pending || 0;
+    const done = (progress.parsed || 0) + (progress.failed || 0);
+    const percent = job.status === 'completed' ? 100
+      : total > 0 ? Math.min(100, Math.round(done * 100 / total)) : 0;
+    return { total, done, percent, stored: (progress.ingest?.inserted || 0) + (progress.ingest?.updated || 0) };
+  };
+
   const handleChange = (e) => {
     const { name, value } = e.target;
     setParserConfig(prev => ({
       ...prev,
-      [name]: name === 'max_items' ? parseInt(value) || 10 : value
+      [name]: name === 'max_items' ? parseInt(value) || 10
+        : name === 'workers' ? parseInt(value) || 1
+        : value
     }));
   };
 
@@ -98,6 +151,19 @@ const ParserControl = () => {
           />
         </div>
 
+        <div className="form-group">
+          <label htmlFor="workers">Количество браузеров</label>
+          <input
+            type="number"
+            id="workers"
+            name="workers"
+            value={parserConfig.workers}
+            onChange={handleChange}
+            min="1"
+            max="8"
+          />
+        </div>
+
         <button
           type="submit"
           className="parse-button"
@@ -120,13 +186,58 @@ const ParserControl = () => {
         </div>
       )}
 
+      {jobs.length > 0 && (
+        <div className="recent-parses">
+          <h4>Задачи парсинга</h4>
+          <div className="parse-history">
+            {jobs.map(job => {
+              const status = JOB_STATUSES[job.status] || { label: job.status, className: '' };
+              const { total, done, percent, stored } = jobProgress(job);
+              const active = job.status === 'queued' || job.status === 'running';
+              return (
+                <div key={job.id} className="parse-item">
+                  <div>
+                    <div>#{job.id} {job.city}, {job.category} ({job.max_items})</div>
+                    <div className="parse-date">
+                      {new Date(job.created_at).toLocaleString('ru-RU')}
+                    </div>
+                    {job.status !== 'queued' && (
+                      <div className="parser-progress">
+                        <div className="progress-bar">
+                          <div className="progress-fill" style={{ width: `${percent}%` }} />
+                        </div>
+                        <div className="progress-text">
+                          <span>Карточек: {done} из {total}</span>
+                          <span>Сохранено: {stored}</span>
+                        </div>
+                      </div>
+                    )}
+                    {job.error && <div className="parse-date">{job.error}</div>}
+                  </div>
+                  <div>
+                    <span className={`parse-status ${status.className}`}>
+                      {job.cancel_requested && active ? 'Отменяется' : status.label}
+                    </span>
+                    {active && !job.cancel_requested && (
+                      <button type="button" onClick={() => handleCancel(job.id)}>
+                        Отменить
+                      </button>
+                    )}
+                  </div>
+                </div>
+              );
+            })}
+          </div>
+        </div>
+      )}
+
       <div className="parser-info">
         <h4>Parser Information</h4>
         <ul>
           <li>На данный момент поддерживается только Яндекс.Карты</li>
           <li>Собираемые данные: название, рейтинг, ценовой уровень, категория, адрес, удобства</li>
           <li>Данные сохраняются в векторной базе ChromaDB</li>
-          <li>Сбор данных выполняется в фоновом режиме</li>
+          <li>Сбор данных выполняет отдельный процесс (crawler_worker.py), задачу можно отменить</li>
         </ul>
       </div>
     </div>
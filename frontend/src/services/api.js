@@ -52,19 +52,30 @@ export const chatAPI = {
 export const venuesAPI = {
   getVenues: (params) => api.get('/api/venues', { params }),
   
+  searchVenues: (q, limit = 20, offset = 0) =>
+    api.get('/api/venues/search', { params: { q, limit, offset } }),
+  
+  getNearbyVenues: (params) => api.get('/api/venues/nearby', { params }),
+  
   getVenue: (venueId) => api.get(`/api/venues/${venueId}`),
   
   rateVenue: (venueId, rating, review = '') =>
     api.post(`/api/venues/${venueId}/rate`, { venue_id: venueId, rating, review }),
   
-  getReviews: (venueId, limit = 10, offset = 0) =>
-    api.get(`/api/venues/${venueId}/reviews`, { params: { limit, offset } }),
+  getReviews: (venueId, limit = 10, offset = 0, cursor = undefined) =>
+    api.get(`/api/venues/${venueId}/reviews`, { params: { limit, offset, cursor } }),
 };
 
 // Admin API
 export const adminAPI = {
   parseVenues: (config) => api.post('/api/admin/parse-venues', config),
   
+  getCrawlJobs: (params) => api.get('/api/admin/crawl-jobs', { params }),
+  
+  getCrawlJob: (jobId) => api.get(`/api/admin/crawl-jobs/${jobId}`),
+  
+  cancelCrawlJob: (jobId) => api.post(`/api/admin/crawl-jobs/${jobId}/cancel`),
+  
   getUnmoderatedRatings: (limit = 50) =>
     api.get('/api/admin/unmoderated-ratings', { params: { limit } }),
   